@@ -0,0 +1,90 @@
+"""
+Importtid for slektstre-pakken
+
+Måler hvor lang tid en ny Python-prosess bruker på å importere pakken og
+enkeltnavn fra den, og hvilke tunge avhengigheter som da blir lastet.
+Avslutter med feilkode hvis `import src` laster tunge moduler eller
+bruker mer enn budsjettet, så skriptet kan brukes som vakt i CI.
+
+Bruk:
+    python benchmarks/import_time.py [--runs 5] [--budget-ms 150] [--json]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROT = Path(__file__).resolve().parent.parent
+
+# Moduler som ikke skal lastes av en ren `import src`
+TUNGE_MODULER = ('matplotlib', 'plotly', 'pandas', 'numpy', 'networkx', 'pyarrow', 'pydantic')
+
+# Navn -> kode som kjøres etter at sys.path er satt opp
+SCENARIER = {
+    'import src': "import src",
+    'src.Person': "import src; src.Person",
+    'src.load': "import src; src.load",
+    'src.Slektstre': "import src; src.Slektstre",
+    'src.plot_fan_chart': "import src; src.plot_fan_chart",
+}
+
+_MÅLING = """
+import sys, time, json
+sys.path[:0] = [{rot!r}, {src!r}]
+start = time.perf_counter()
+try:
+    {kode}
+    feil = None
+except ImportError as e:
+    feil = str(e)
+tid = time.perf_counter() - start
+tunge = sorted({{m.split('.')[0] for m in sys.modules}} & set({tunge!r}))
+print(json.dumps({{'tid': tid, 'tunge': tunge, 'feil': feil}}))
+"""
+
+
+def mål(kode: str, runs: int) -> dict:
+    """Kjør koden i `runs` nye prosesser og returner median tid og lastede tunge moduler."""
+    skript = _MÅLING.format(rot=str(ROT), src=str(ROT / 'src'), kode=kode, tunge=TUNGE_MODULER)
+    resultater = []
+    for _ in range(runs):
+        ut = subprocess.run([sys.executable, '-c', skript], capture_output=True,
+                            text=True, check=True, cwd=ROT)
+        resultater.append(json.loads(ut.stdout.strip().splitlines()[-1]))
+    return {
+        'median_ms': round(statistics.median(r['tid'] for r in resultater) * 1000, 1),
+        'tunge': resultater[-1]['tunge'],
+        'feil': resultater[-1]['feil'],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Mål importtid for slektstre")
+    parser.add_argument('--runs', type=int, default=5, help="Antall prosesser per scenario")
+    parser.add_argument('--budget-ms', type=float, default=150.0,
+                        help="Maks median tid for `import src`")
+    parser.add_argument('--json', action='store_true', help="Skriv resultatet som JSON")
+    args = parser.parse_args()
+
+    resultat = {navn: mål(kode, args.runs) for navn, kode in SCENARIER.items()}
+
+    if args.json:
+        print(json.dumps(resultat, ensure_ascii=False, indent=2))
+    else:
+        for navn, r in resultat.items():
+            tillegg = f"  (mangler: {r['feil']})" if r['feil'] else ''
+            print(f"{navn:<22} {r['median_ms']:>8.1f} ms  tunge: {', '.join(r['tunge']) or '-'}{tillegg}")
+
+    bare = resultat['import src']
+    if bare['feil'] or bare['tunge'] or bare['median_ms'] > args.budget_ms:
+        print(f"FEIL: `import src` skal være under {args.budget_ms} ms uten tunge moduler",
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,276 @@
+"""
+Ytelsesmålinger for slektstre-pakken
+
+Måler innlasting, grafbygging, spørringer, validering og tegning på
+syntetiske slektstrær (se src/synthetic.py) av flere størrelser. For hver
+måling registreres tid per kall (beste av flere runder) og maksimal
+minnebruk (tracemalloc, i en egen runde så den ikke påvirker tiden).
+
+Resultatet sammenlignes med en lagret referanse (benchmarks/baseline.json),
+og skriptet avslutter med feilkode hvis noe er blitt tregere eller bruker
+mer minne enn toleransen tillater, så det kan brukes som vakt før utgivelse.
+
+Tegnemålingene hoppes over når matplotlib eller plotly mangler. Målinger
+som ut fra de forrige størrelsene ser ut til å ta mer enn --max-seconds,
+hoppes også over for større trær, unntatt med --save-baseline, så
+referansen alltid har alle størrelsene.
+
+Bruk:
+    python benchmarks/suite.py [--sizes 100 1000 10000] [--filter load] [--json]
+    python benchmarks/suite.py --save-baseline
+"""
+
+import argparse
+import gc
+import json
+import math
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+ROT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROT / 'src')]
+
+BASELINE = ROT / 'benchmarks' / 'baseline.json'
+STØRRELSER = (100, 1000, 10000)
+
+
+class Måling(NamedTuple):
+    """En måling: navn og en funksjon som lager kallet som skal måles."""
+    navn: str
+    forbered: Callable[['Oppsett'], Callable[[], Any]]
+    tegning: bool = False
+
+
+class Oppsett:
+    """Syntetisk tre av en gitt størrelse, lagret i formatene som lastes."""
+
+    def __init__(self, n: int, seed: int, mappe: Path):
+        from family_io import save
+        from synthetic import generate_pedigree
+        from tree import Slektstre
+
+        self.n = n
+        self.familie_data = generate_pedigree(n, seed=seed)
+        self.filer = {}
+        for format_ in ('yaml', 'json', 'csv'):
+            self.filer[format_] = mappe / f"tre_{n}.{format_}"
+            save(self.familie_data, str(self.filer[format_]))
+
+        self.tre = Slektstre(self.familie_data)
+        personer = self.familie_data.personer
+        # Den siste som ble født (flest forfedre), en i midten og en stamforelder til den yngste
+        self.yngst = max(personer, key=lambda p: (len(p.foreldre), p.fødselsdato)).id
+        self.midten = personer[len(personer) // 2].id
+        self.stamforelder = self.yngst
+        while self.tre.get_person(self.stamforelder).foreldre:
+            self.stamforelder = self.tre.get_person(self.stamforelder).foreldre[0]
+
+
+def _last(funksjon: str, format_: str):
+    def forbered(o: Oppsett):
+        import family_io
+        return lambda: getattr(family_io, funksjon)(str(o.filer[format_]))
+    return forbered
+
+
+def _tegn(funksjon: str, *person: str):
+    def forbered(o: Oppsett):
+        import matplotlib.pyplot as plt
+        import visualization
+        plot = getattr(visualization, funksjon)
+        argumenter = [getattr(o, navn) for navn in person]
+
+        def kall():
+            figur = plot(o.tre, *argumenter)
+            if hasattr(figur, 'savefig'):
+                plt.close(figur)
+        return kall
+    return forbered
+
+
+MÅLINGER = [
+    Måling('load_from_yaml', _last('load_from_yaml', 'yaml')),
+    Måling('load_from_json', _last('load_from_json', 'json')),
+    Måling('load_from_csv', _last('load_from_csv', 'csv')),
+    Måling('Slektstre._build_graph', lambda o: o.tre._build_graph),
+    Måling('get_ancestors', lambda o: lambda: o.tre.get_ancestors(o.yngst)),
+    Måling('get_descendants', lambda o: lambda: o.tre.get_descendants(o.stamforelder)),
+    Måling('get_generation', lambda o: lambda: o.tre.get_generation(o.yngst)),
+    Måling('find_relation', lambda o: lambda: o.tre.find_relation(o.yngst, o.midten)),
+    Måling('get_statistics', lambda o: o.tre.get_statistics),
+    Måling('validate_tree', lambda o: o.tre.validate_tree),
+    Måling('plot_hierarchical_tree', _tegn('plot_hierarchical_tree'), tegning=True),
+    Måling('plot_fan_chart', _tegn('plot_fan_chart', 'yngst'), tegning=True),
+    Måling('plot_hourglass_view', _tegn('plot_hourglass_view', 'yngst'), tegning=True),
+    Måling('plot_interactive_tree', _tegn('plot_interactive_tree'), tegning=True),
+    Måling('plot_statistics', _tegn('plot_statistics'), tegning=True),
+]
+
+
+def mål(kall: Callable[[], Any], runder: int) -> Dict[str, float]:
+    """
+    Mål ett kall: beste tid per kall over `runder` runder og maks minnebruk.
+
+    Raske kall gjentas i hver runde til runden tar minst 50 ms.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    kall()
+    første = time.perf_counter() - start
+    antall = max(1, int(0.05 / første)) if første > 0 else 1000
+
+    tider = [første]
+    for _ in range(runder - 1 if antall == 1 else runder):
+        gc.collect()
+        start = time.perf_counter()
+        for _ in range(antall):
+            kall()
+        tider.append((time.perf_counter() - start) / antall)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        kall()
+        _, topp = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'tid_ms': round(min(tider) * 1000, 4),
+        'median_ms': round(statistics.median(tider) * 1000, 4),
+        'minne_kb': round(topp / 1024, 1),
+    }
+
+
+def kjør(størrelser: List[int], runder: int, seed: int, filter_: Optional[str],
+         max_seconds: float, utskrift: Callable[[str], None]) -> Dict[str, Any]:
+    """Kjør alle målinger for alle størrelser. Returnerer resultat per `navn@størrelse`."""
+    målinger = [m for m in MÅLINGER if not filter_ or filter_ in m.navn]
+
+    tegnefeil = None
+    if any(m.tegning for m in målinger):
+        try:
+            import matplotlib
+            matplotlib.use('Agg')
+            import visualization  # noqa: F401
+        except ImportError as e:
+            tegnefeil = str(e)
+
+    resultater: Dict[str, Any] = {}
+    forrige: Dict[str, List[tuple]] = {}
+    with tempfile.TemporaryDirectory(prefix='slektstre-bench-') as mappe:
+        for n in sorted(størrelser):
+            oppsett = Oppsett(n, seed, Path(mappe))
+            for måling in målinger:
+                nøkkel = f"{måling.navn}@{n}"
+                if måling.tegning and tegnefeil:
+                    resultater[nøkkel] = {'hoppet_over': tegnefeil}
+                elif måling.navn in forrige and _anslag(forrige[måling.navn], n, runder) > max_seconds:
+                    resultater[nøkkel] = {
+                        'hoppet_over': f"anslått {_anslag(forrige[måling.navn], n, runder):.0f} s"
+                    }
+                else:
+                    resultater[nøkkel] = mål(måling.forbered(oppsett), runder)
+                    forrige.setdefault(måling.navn, []).append((n, resultater[nøkkel]['tid_ms'] / 1000))
+                utskrift(_linje(nøkkel, resultater[nøkkel]))
+    return resultater
+
+
+def sammenlign(resultater: Dict[str, Any], referanse: Dict[str, Any],
+               toleranse_tid: float, toleranse_minne: float) -> List[str]:
+    """Finn målinger som er tregere eller bruker mer minne enn referansen tillater."""
+    avvik = []
+    for nøkkel, r in resultater.items():
+        ref = referanse.get(nøkkel)
+        if not ref or 'hoppet_over' in r or 'hoppet_over' in ref:
+            continue
+        # Korte kall varierer mye mellom prosesser; 0,5 ms slingringsmonn
+        if r['tid_ms'] > ref['tid_ms'] * (1 + toleranse_tid) + 0.5:
+            avvik.append(f"{nøkkel}: tid {r['tid_ms']:.3f} ms mot {ref['tid_ms']:.3f} ms "
+                         f"({r['tid_ms'] / ref['tid_ms']:.2f}x)")
+        # Små allokeringer varierer; 64 KB slingringsmonn
+        if r['minne_kb'] > ref['minne_kb'] * (1 + toleranse_minne) + 64:
+            avvik.append(f"{nøkkel}: minne {r['minne_kb']:.0f} KB mot {ref['minne_kb']:.0f} KB "
+                         f"({r['minne_kb'] / max(ref['minne_kb'], 1):.2f}x)")
+    return avvik
+
+
+def _anslag(forrige: List[tuple], n: int, runder: int) -> float:
+    """
+    Anslått total tid for neste størrelse.
+
+    Veksten (eksponenten) anslås fra de to siste størrelsene, og antas
+    lineær når bare én er målt.
+    """
+    eksponent = 1.0
+    if len(forrige) >= 2:
+        (n1, t1), (n2, t2) = forrige[-2:]
+        if t1 > 0 and t2 > 0:
+            eksponent = min(3.0, max(1.0, math.log(t2 / t1) / math.log(n2 / n1)))
+    forrige_n, tid = forrige[-1]
+    return tid * (n / forrige_n) ** eksponent * (runder + 1)
+
+
+def _linje(nøkkel: str, r: Dict[str, Any]) -> str:
+    if 'hoppet_over' in r:
+        return f"{nøkkel:<32} hoppet over ({r['hoppet_over']})"
+    return f"{nøkkel:<32} {r['tid_ms']:>12.3f} ms {r['minne_kb']:>12.1f} KB"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Ytelsesmålinger for slektstre")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(STØRRELSER),
+                        help="Antall personer i treet")
+    parser.add_argument('--runs', type=int, default=3, help="Runder per måling")
+    parser.add_argument('--seed', type=int, default=0, help="Frø for de syntetiske trærne")
+    parser.add_argument('--filter', help="Kjør bare målinger med navn som inneholder dette")
+    parser.add_argument('--max-seconds', type=float, default=60.0,
+                        help="Hopp over målinger som anslås å ta lengre tid "
+                             "(ikke med --save-baseline)")
+    parser.add_argument('--baseline', default=str(BASELINE), help="Referansefil")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Lagre resultatet som ny referanse i stedet for å sammenligne")
+    parser.add_argument('--time-tolerance', type=float, default=0.5,
+                        help="Tillatt økning i tid (0.5 = 50 %%)")
+    parser.add_argument('--memory-tolerance', type=float, default=0.1,
+                        help="Tillatt økning i minnebruk (0.1 = 10 %%)")
+    parser.add_argument('--json', action='store_true', help="Skriv resultatet som JSON")
+    args = parser.parse_args()
+
+    utskrift = (lambda linje: None) if args.json else (lambda linje: print(linje, flush=True))
+    max_seconds = math.inf if args.save_baseline else args.max_seconds
+    resultater = kjør(args.sizes, args.runs, args.seed, args.filter, max_seconds, utskrift)
+
+    baseline = Path(args.baseline)
+    if args.save_baseline:
+        baseline.write_text(json.dumps({
+            'python': platform.python_version(),
+            'plattform': platform.platform(),
+            'seed': args.seed,
+            'resultater': resultater,
+        }, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+        if not args.json:
+            print(f"Referanse lagret i {baseline}")
+
+    avvik = []
+    if not args.save_baseline and baseline.exists():
+        referanse = json.loads(baseline.read_text(encoding='utf-8'))
+        if referanse.get('seed') == args.seed:
+            avvik = sammenlign(resultater, referanse['resultater'],
+                               args.time_tolerance, args.memory_tolerance)
+
+    if args.json:
+        print(json.dumps({'resultater': resultater, 'avvik': avvik}, ensure_ascii=False, indent=2))
+    for linje in avvik:
+        print(f"TREGERE: {linje}", file=sys.stderr)
+    return 1 if avvik else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
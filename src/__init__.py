@@ -1,47 +1,108 @@
 """
 Slektstre - Et Python-bibliotek for å bygge og visualisere familie-trær med NetworkX
+
+Navnene under importeres først ved første bruk (PEP 562), så `import slektstre`
+er raskt, og f.eks. matplotlib og plotly lastes bare når et plot_*-navn brukes.
 """
 
-from models import Person, Ekteskap, FamilieData, Gender
-from tree import Slektstre
-from family_io import (
-    load_from_yaml, save_to_yaml,
-    load_from_json, save_to_json,
-    load_from_csv, save_to_csv,
-    export_to_gedcom
-)
-from visualization import (
-    plot_hierarchical_tree,
-    plot_fan_chart,
-    plot_interactive_tree,
-    plot_statistics,
-    plot_hourglass_view
-)
-from localization import t, get_available_languages
+import importlib
+from typing import TYPE_CHECKING
 
 __version__ = "1.0.0"
 __author__ = "Arvid Lundervold"
 
-__all__ = [
+# Modul -> offentlige navn fra modulen
+_MODULER = {
     # Models
-    'Person', 'Ekteskap', 'FamilieData', 'Gender',
-    
+    'models': ('Person', 'Ekteskap', 'FamilieData', 'Gender'),
+
     # Main class
-    'Slektstre',
-    
+    'tree': ('Slektstre',),
+    'journal': ('Endringsjournal',),
+    'snapshot': ('FrossetSlektstre', 'Publiserer'),
+
     # I/O functions
-    'load_from_yaml', 'save_to_yaml',
-    'load_from_json', 'save_to_json',
-    'load_from_csv', 'save_to_csv',
-    'export_to_gedcom',
-    
+    'family_io': (
+        'load_from_yaml', 'save_to_yaml',
+        'load_from_json', 'save_to_json',
+        'load_from_jsonl', 'save_to_jsonl',
+        'load_from_csv', 'save_to_csv',
+        'load_from_parquet', 'save_to_parquet',
+        'load_from_sqlite', 'save_to_sqlite',
+        'load_from_gedcom', 'export_to_gedcom',
+        'load_many', 'load', 'detect_format', 'save',
+    ),
+    'import_report': ('Importrapport', 'Importfeil'),
+    'migrations': ('SCHEMA_VERSION', 'register_migration', 'detect_version', 'migrate'),
+    'changelog': ('Endringslogg',),
+    'sqlite_store': ('SqliteSlektstre',),
+    'mmap_store': ('MmapSlektstre', 'save_to_binary', 'load_from_binary'),
+    'jsonl_store': ('JsonlIndeks', 'build_jsonl_index', 'load_neighborhood'),
+    'synthetic': ('SlektsGenerator', 'generate_pedigree', 'write_pedigree'),
+
     # Visualization functions
-    'plot_hierarchical_tree',
-    'plot_fan_chart',
-    'plot_interactive_tree',
-    'plot_statistics',
-    'plot_hourglass_view',
-    
+    'visualization': (
+        'plot_hierarchical_tree',
+        'plot_fan_chart',
+        'plot_interactive_tree',
+        'plot_statistics',
+        'plot_hourglass_view',
+    ),
+
     # Localization
-    't', 'get_available_languages'
-]
+    'localization': ('t', 'get_available_languages'),
+
+    # Query service
+    'server': ('SlektstreService',),
+}
+
+_MODUL_FOR = {navn: modul for modul, navnene in _MODULER.items() for navn in navnene}
+
+__all__ = list(_MODUL_FOR)
+
+
+def __getattr__(name: str):
+    """Importer modulen bak et offentlig navn ved første oppslag."""
+    modul = _MODUL_FOR.get(name)
+    if modul is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    verdi = getattr(importlib.import_module(modul), name)
+    globals()[name] = verdi
+    return verdi
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from models import Person, Ekteskap, FamilieData, Gender
+    from tree import Slektstre
+    from journal import Endringsjournal
+    from snapshot import FrossetSlektstre, Publiserer
+    from family_io import (
+        load_from_yaml, save_to_yaml,
+        load_from_json, save_to_json,
+        load_from_jsonl, save_to_jsonl,
+        load_from_csv, save_to_csv,
+        load_from_parquet, save_to_parquet,
+        load_from_sqlite, save_to_sqlite,
+        load_from_gedcom, export_to_gedcom,
+        load_many, load, detect_format, save
+    )
+    from import_report import Importrapport, Importfeil
+    from migrations import SCHEMA_VERSION, register_migration, detect_version, migrate
+    from changelog import Endringslogg
+    from sqlite_store import SqliteSlektstre
+    from mmap_store import MmapSlektstre, save_to_binary, load_from_binary
+    from jsonl_store import JsonlIndeks, build_jsonl_index, load_neighborhood
+    from synthetic import SlektsGenerator, generate_pedigree, write_pedigree
+    from visualization import (
+        plot_hierarchical_tree,
+        plot_fan_chart,
+        plot_interactive_tree,
+        plot_statistics,
+        plot_hourglass_view
+    )
+    from localization import t, get_available_languages
+    from server import SlektstreService
@@ -0,0 +1,258 @@
+"""
+Append-only endringslogg for slektstre-prosjektet
+Lagrer kun endringene ved siden av et basis-øyeblikksbilde (YAML/JSON/CSV)
+"""
+
+import json
+import os
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Union
+
+from models import Person, Ekteskap, FamilieData
+from family_io import (
+    _loader_for, _saver_for, _ekteskap_csv_path, _format_suffix,
+    _person_to_dict, _ekteskap_to_dict, _parse_datetime, _patch_path
+)
+
+
+def changelog_path(file_path: Union[str, Path]) -> Path:
+    """Returner stien til endringsloggen som hører til et øyeblikksbilde."""
+    return _patch_path(Path(file_path))
+
+
+class Endringslogg:
+    """
+    Append-only endringslogg ved siden av et basis-øyeblikksbilde.
+
+    Hver lagring legger kun til de endrede postene som én JSON-linje per
+    post i `<filnavn>.endringer.jsonl`. Ved lasting leses øyeblikksbildet og
+    loggen spilles av. `compact()` skriver et nytt øyeblikksbilde og tømmer
+    loggen. Hver linje inneholder postens fulle sluttilstand, så avspilling
+    er idempotent: krasjer prosessen mellom nytt øyeblikksbilde og tømming
+    av loggen, gir avspilling samme resultat.
+    """
+
+    def __init__(self, file_path: Union[str, Path],
+                 compact_every: Optional[int] = 10000,
+                 fsync: bool = False):
+        """
+        Initialiser endringslogg.
+
+        Args:
+            file_path: Sti til basis-øyeblikksbildet (.yaml, .yml, .json eller .csv)
+            compact_every: Komprimer automatisk etter så mange loggposter, eller None
+            fsync: Kall os.fsync etter hver skriving (tregere, men krasjsikkert)
+        """
+        self.file_path = Path(file_path)
+        self._laster = _loader_for(self.file_path)
+        self._lagrer = _saver_for(self.file_path)
+        self.log_path = changelog_path(self.file_path)
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.familie_data: Optional[FamilieData] = None
+        self._fil = None
+        self._antall = 0
+
+    def load(self) -> FamilieData:
+        """Last øyeblikksbildet og spill av endringsloggen."""
+        if self.file_path.exists():
+            familie_data = self._laster(str(self.file_path))
+        else:
+            familie_data = FamilieData()
+
+        self._antall = 0
+        if self.log_path.exists():
+            self._antall = _spill_av(familie_data, self.log_path, avkort=True)
+
+        self.familie_data = familie_data
+        return familie_data
+
+    def attach(self, journal) -> None:
+        """
+        Skriv hver operasjon i en Endringsjournal til loggen automatisk.
+
+        Angre og gjør om logges også, som nye tilstander for de berørte postene.
+        """
+        self.familie_data = journal.slektstre.familie_data
+        journal.add_listener(self._fra_journal)
+
+    def append_person(self, person: Person) -> None:
+        """Logg ny eller endret person."""
+        self._skriv([{'op': 'person', 'data': _person_to_dict(person)}])
+
+    def append_ekteskap(self, ekteskap: Ekteskap) -> None:
+        """Logg nytt eller endret ekteskap."""
+        self._skriv([{'op': 'ekteskap', 'data': _ekteskap_to_dict(ekteskap)}])
+
+    def delete_person(self, person_id: str) -> None:
+        """Logg at en person er fjernet."""
+        self._skriv([{'op': 'slett_person', 'id': person_id}])
+
+    def delete_ekteskap(self, ekteskap_id: str) -> None:
+        """Logg at et ekteskap er fjernet."""
+        self._skriv([{'op': 'slett_ekteskap', 'id': ekteskap_id}])
+
+    def append_changes(self, familie_data: FamilieData) -> int:
+        """
+        Logg endringssettet til familie-data som én skriving.
+
+        Returnerer antall loggposter. Endringssettet nullstilles ikke;
+        det gjør den som lagrer (se family_io.save).
+        """
+        personer, ekteskap, slettede_personer, slettede_ekteskap = familie_data.pending_changes()
+        poster = [{'op': 'person', 'data': _person_to_dict(p)} for p in personer]
+        poster += [{'op': 'ekteskap', 'data': _ekteskap_to_dict(e)} for e in ekteskap]
+        poster += [{'op': 'slett_person', 'id': i} for i in slettede_personer]
+        poster += [{'op': 'slett_ekteskap', 'id': i} for i in slettede_ekteskap]
+        self._skriv(poster)
+        return len(poster)
+
+    def compact(self, familie_data: Optional[FamilieData] = None) -> None:
+        """
+        Skriv et nytt øyeblikksbilde og tøm endringsloggen.
+
+        Args:
+            familie_data: Data å lagre, eller None for sist lastede/tilkoblede data
+        """
+        familie_data = familie_data or self.familie_data
+        if familie_data is None:
+            raise ValueError("Ingen familie-data å komprimere")
+
+        self.close()
+        # Behold alle filendelser (f.eks. .yaml.gz) så samme lagrefunksjon velges
+        tmp_path = self.file_path.parent / f".tmp.{self.file_path.name}"
+        self._lagrer(familie_data, str(tmp_path))
+        if _format_suffix(self.file_path) == '.csv':
+            tmp_ekteskap = _ekteskap_csv_path(tmp_path)
+            ekteskap_file = _ekteskap_csv_path(self.file_path)
+            if tmp_ekteskap.exists():
+                os.replace(tmp_ekteskap, ekteskap_file)
+            else:
+                # Ingen ekteskap igjen; den gamle fila ville gitt dem tilbake
+                ekteskap_file.unlink(missing_ok=True)
+        os.replace(tmp_path, self.file_path)
+
+        # Tøm loggen først når det nye øyeblikksbildet er på plass
+        with open(self.log_path, 'w', encoding='utf-8'):
+            pass
+        self._antall = 0
+        familie_data.mark_saved()
+
+    def close(self) -> None:
+        """Lukk loggfilen."""
+        if self._fil is not None:
+            self._fil.close()
+            self._fil = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        """Antall poster i loggen siden siste komprimering."""
+        return self._antall
+
+    def _fra_journal(self, operasjon, hendelse: str) -> None:
+        """Lytter for Endringsjournal: logg tilstanden postene nå har."""
+        indeks = 1 if hendelse == 'undo' else 2
+        poster = []
+        for post in operasjon.poster.values():
+            obj, tilstand = post[0], post[indeks]
+            er_person = isinstance(obj, Person)
+            if tilstand is None:
+                op = 'slett_person' if er_person else 'slett_ekteskap'
+                poster.append({'op': op, 'id': obj.id})
+            elif er_person:
+                poster.append({'op': 'person', 'data': _person_to_dict(obj)})
+            else:
+                poster.append({'op': 'ekteskap', 'data': _ekteskap_to_dict(obj)})
+        self._skriv(poster)
+
+    def _skriv(self, poster: List[Dict[str, Any]]) -> None:
+        """Legg poster til i loggen og komprimer ved behov."""
+        if not poster:
+            return
+        if self._fil is None:
+            self._fil = open(self.log_path, 'a', encoding='utf-8')
+            if not _slutter_med_linjeskift(self.log_path):
+                # Avkuttet linje fra en krasj; ny post skal ikke limes på den
+                self._fil.write('\n')
+
+        tid = datetime.now().isoformat()
+        linjer = []
+        for post in poster:
+            post['tid'] = tid
+            linjer.append(json.dumps(post, ensure_ascii=False, default=str))
+        self._fil.write('\n'.join(linjer) + '\n')
+        self._fil.flush()
+        if self.fsync:
+            os.fsync(self._fil.fileno())
+
+        self._antall += len(poster)
+        if (self.compact_every is not None and self._antall >= self.compact_every
+                and self.familie_data is not None):
+            self.compact()
+
+
+def _spill_av(familie_data: FamilieData, log_path: Path, avkort: bool = False) -> int:
+    """
+    Spill av endringsloggen på familie-data. Returnerer antall poster.
+
+    Linjer som ikke er gyldig JSON (avkuttet skriving etter en krasj)
+    hoppes over. Med `avkort` kuttes fila etter siste hele post, så neste
+    skriving ikke havner i forlengelsen av en halv linje.
+    """
+    personer = {p.id: p for p in familie_data.personer}
+    ekteskap = {e.id: e for e in familie_data.ekteskap}
+    sist_endret = None
+    antall = 0
+    posisjon = gyldig_til = 0
+
+    with open(log_path, 'rb') as f:
+        for rå in f:
+            posisjon += len(rå)
+            linje = rå.strip()
+            if not linje:
+                continue
+            try:
+                post = json.loads(linje)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+            gyldig_til = posisjon
+
+            op = post.get('op')
+            if op == 'person':
+                person = Person(**post['data'])
+                personer[person.id] = person
+            elif op == 'ekteskap':
+                ekteskap_obj = Ekteskap(**post['data'])
+                ekteskap[ekteskap_obj.id] = ekteskap_obj
+            elif op == 'slett_person':
+                personer.pop(post['id'], None)
+            elif op == 'slett_ekteskap':
+                ekteskap.pop(post['id'], None)
+            sist_endret = post.get('tid', sist_endret)
+            antall += 1
+
+    if avkort and gyldig_til < posisjon:
+        with open(log_path, 'r+b') as f:
+            f.truncate(gyldig_til)
+
+    familie_data.personer = list(personer.values())
+    familie_data.ekteskap = list(ekteskap.values())
+    if sist_endret:
+        familie_data.sist_endret = _parse_datetime(sist_endret) or familie_data.sist_endret
+    return antall
+
+
+def _slutter_med_linjeskift(log_path: Path) -> bool:
+    """Sjekk om loggen er tom eller slutter med et linjeskift."""
+    with open(log_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return True
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b'\n'
@@ -0,0 +1,324 @@
+"""
+Kommandolinje for slektstre-prosjektet
+Import, konvertering, spørringer, validering, tegning og sammenligning fra skallet
+
+Bruk:
+    python src/cli.py stats data/eksempel_familie.yaml
+    echo p13 | python src/cli.py ancestors data/eksempel_familie.yaml --json
+    python src/cli.py render data/eksempel_familie.yaml -o tre.png --kind fan --person p13
+
+Tunge moduler importeres inne i kommandoene, så bare `render` laster
+matplotlib/plotly.
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Kjør kommandolinjen. Returnerer avslutningskoden."""
+    args = _parser().parse_args(argv)
+    try:
+        return args.kommando(args) or 0
+    except (FileNotFoundError, ValueError, ImportError) as e:
+        print(f"slektstre {args.navn}: {e}", file=sys.stderr)
+        return 2
+    except BrokenPipeError:
+        # F.eks. `slektstre ancestors ... | head`
+        return 0
+
+
+def _parser() -> argparse.ArgumentParser:
+    felles = argparse.ArgumentParser(add_help=False)
+    felles.add_argument('--json', action='store_true', help="Skriv resultatet som JSON")
+    felles.add_argument('--no-cache', action='store_true',
+                        help="Ikke bruk hurtigbufferen for innlastede filer")
+
+    parser = argparse.ArgumentParser(prog='slektstre', description="Slektstre på kommandolinjen")
+    under = parser.add_subparsers(dest='navn', required=True, metavar='kommando')
+
+    p = under.add_parser('import', parents=[felles], help="Slå sammen filer til én fil")
+    p.add_argument('inputs', nargs='+', help="Filer i et hvilket som helst støttet format")
+    p.add_argument('-o', '--output', required=True, help="Målfil (format fra filendelsen)")
+    p.add_argument('--workers', type=int, default=None, help="Antall prosesser")
+    p.add_argument('--on-conflict', choices=('error', 'first', 'last'), default='error')
+    p.add_argument('--reject-file', help="Skriv ugyldige poster hit og fortsett")
+    p.set_defaults(kommando=_import)
+
+    p = under.add_parser('convert', parents=[felles], help="Konverter mellom formater")
+    p.add_argument('input')
+    p.add_argument('output', help="Målfil (format fra filendelsen, f.eks. .jsonl.gz)")
+    p.set_defaults(kommando=_convert)
+
+    p = under.add_parser('stats', parents=[felles], help="Statistikk for et tre")
+    p.add_argument('file')
+    p.set_defaults(kommando=_stats)
+
+    p = under.add_parser('ancestors', parents=[felles],
+                         help="Forfedre (eller etterkommere) for personer")
+    p.add_argument('file')
+    p.add_argument('ids', nargs='*', help="Person-IDer (leses fra stdin hvis utelatt eller '-')")
+    p.add_argument('-g', '--generations', type=_positivt_heltall, default=None,
+                   help="Maks antall generasjoner (1 = bare foreldre eller barn)")
+    p.add_argument('--descendants', action='store_true', help="Etterkommere i stedet for forfedre")
+    p.set_defaults(kommando=_ancestors)
+
+    p = under.add_parser('relation', parents=[felles], help="Slektskap mellom to personer")
+    p.add_argument('file')
+    p.add_argument('ids', nargs='*',
+                   help="To person-IDer (par leses fra stdin, ett par per linje, hvis utelatt)")
+    p.add_argument('--max-marriage-hops', type=int, default=None)
+    p.set_defaults(kommando=_relation)
+
+    p = under.add_parser('validate', parents=[felles], help="Valider poster og slektskap")
+    p.add_argument('file')
+    p.add_argument('--reject-file', help="Skriv ugyldige poster hit")
+    p.set_defaults(kommando=_validate)
+
+    p = under.add_parser('render', parents=[felles], help="Tegn treet til fil")
+    p.add_argument('file')
+    p.add_argument('-o', '--output', required=True,
+                   help="Bildefil (.png, .svg, .pdf) eller .html for interaktive figurer")
+    p.add_argument('--kind', default='tree',
+                   choices=('tree', 'fan', 'hourglass', 'interactive', 'statistics'))
+    p.add_argument('--person', help="Fokus-/rotperson for fan og hourglass")
+    p.add_argument('--title')
+    p.add_argument('--lang', default='no')
+    p.set_defaults(kommando=_render)
+
+    p = under.add_parser('diff', parents=[felles], help="Sammenlign to filer")
+    p.add_argument('a')
+    p.add_argument('b')
+    p.set_defaults(kommando=_diff)
+
+    return parser
+
+
+def _positivt_heltall(verdi: str) -> int:
+    try:
+        tall = int(verdi)
+    except ValueError:
+        tall = 0
+    if tall < 1:
+        raise argparse.ArgumentTypeError(f"må være et heltall på minst 1: {verdi!r}")
+    return tall
+
+
+def _import(args) -> int:
+    from family_io import load_many, save
+    from import_report import Importrapport
+
+    rapport = Importrapport(reject_file=args.reject_file) if args.reject_file else None
+    try:
+        familie_data = load_many(args.inputs, workers=args.workers,
+                                 on_conflict=args.on_conflict, report=rapport)
+    finally:
+        if rapport is not None:
+            rapport.close()
+    save(familie_data, args.output)
+
+    resultat = {'output': args.output, 'personer': len(familie_data.personer),
+                'ekteskap': len(familie_data.ekteskap),
+                'avviste': len(rapport) if rapport is not None else 0}
+    _skriv(args, resultat, f"{resultat['personer']} personer og {resultat['ekteskap']} "
+                           f"ekteskap skrevet til {args.output}")
+    if rapport:
+        print(rapport.summary(), file=sys.stderr)
+    return 0
+
+
+def _convert(args) -> int:
+    from family_io import save
+
+    familie_data = _last(args, args.input)
+    save(familie_data, args.output)
+    resultat = {'output': args.output, 'personer': len(familie_data.personer),
+                'ekteskap': len(familie_data.ekteskap)}
+    _skriv(args, resultat, f"{args.input} -> {args.output}")
+    return 0
+
+
+def _stats(args) -> int:
+    tre = _tre(args, args.file)
+    stats = tre.get_statistics()
+    for nøkkel in ('oldest_person', 'youngest_person'):
+        if stats.get(nøkkel) is not None:
+            stats[nøkkel] = _kort(stats[nøkkel])
+
+    tekst = '\n'.join(
+        f"{nøkkel}: {verdi['navn'] if isinstance(verdi, dict) and 'navn' in verdi else verdi}"
+        for nøkkel, verdi in stats.items()
+    )
+    _skriv(args, stats, tekst)
+    return 0
+
+
+def _ancestors(args) -> int:
+    tre = _tre(args, args.file)
+    hent = tre.get_descendants if args.descendants else tre.get_ancestors
+    funnet_alle = True
+
+    for person_id in _ider(args.ids):
+        if tre.get_person(person_id) is None:
+            print(f"slektstre {args.navn}: Person med ID {person_id} ikke funnet", file=sys.stderr)
+            funnet_alle = False
+            continue
+        # Treet teller personen selv som generasjon 0, så N generasjoner er N + 1
+        grense = args.generations + 1 if args.generations else None
+        personer = [_kort(p) for p in hent(person_id, grense)]
+        _skriv(args, {'id': person_id, 'personer': personer},
+               f"{person_id}: " + ', '.join(f"{p['navn']} ({p['id']})" for p in personer))
+    return 0 if funnet_alle else 1
+
+
+def _relation(args) -> int:
+    tre = _tre(args, args.file)
+    if args.ids:
+        if len(args.ids) != 2:
+            raise ValueError("relation trenger nøyaktig to person-IDer")
+        par: Iterable[Tuple[str, str]] = [tuple(args.ids)]
+    else:
+        par = (tuple(linje.split()[:2]) for linje in _stdin_linjer() if len(linje.split()) >= 2)
+
+    funnet_alle = True
+    for id1, id2 in par:
+        sti = tre.find_relation_path(id1, id2, args.max_marriage_hops)
+        funnet_alle &= sti is not None
+        resultat = {
+            'fra': id1, 'til': id2,
+            'relasjon': tre.find_relation(id1, id2),
+            'sti': [{'fra': fra, 'relasjon': relasjon, 'til': til}
+                    for fra, relasjon, til in sti] if sti is not None else None,
+        }
+        tekst = tre.explain_relation(id1, id2, args.max_marriage_hops) if sti else None
+        _skriv(args, resultat, f"{id1} {id2}: {tekst or 'ingen kjent relasjon'}")
+    return 0 if funnet_alle else 1
+
+
+def _validate(args) -> int:
+    from family_io import load
+    from import_report import Importrapport
+    from tree import Slektstre
+
+    with Importrapport(reject_file=args.reject_file) as rapport:
+        familie_data = load(args.file, report=rapport)
+    problemer = Slektstre(familie_data).validate_tree()
+
+    resultat = {
+        'gyldig': not rapport.errors and not problemer,
+        'ugyldige_poster': [str(feil) for feil in rapport.errors],
+        'problemer': problemer,
+    }
+    linjer = resultat['ugyldige_poster'] + problemer
+    _skriv(args, resultat, '\n'.join(linjer) if linjer else f"{args.file}: OK")
+    return 0 if resultat['gyldig'] else 1
+
+
+def _render(args) -> int:
+    import matplotlib
+    matplotlib.use('Agg')
+    import visualization
+
+    tre = _tre(args, args.file)
+    if args.kind in ('fan', 'hourglass') and not args.person:
+        raise ValueError(f"--person er påkrevd for --kind {args.kind}")
+
+    if args.kind == 'tree':
+        figur = visualization.plot_hierarchical_tree(tre, title=args.title, lang=args.lang)
+    elif args.kind == 'fan':
+        figur = visualization.plot_fan_chart(tre, args.person, title=args.title, lang=args.lang)
+    elif args.kind == 'hourglass':
+        figur = visualization.plot_hourglass_view(tre, args.person, title=args.title, lang=args.lang)
+    elif args.kind == 'interactive':
+        figur = visualization.plot_interactive_tree(tre, title=args.title, lang=args.lang)
+    else:
+        figur = visualization.plot_statistics(tre, lang=args.lang)
+
+    if hasattr(figur, 'savefig'):
+        figur.savefig(args.output, bbox_inches='tight')
+    elif args.output.endswith('.html'):
+        figur.write_html(args.output)
+    else:
+        # Statiske bilder fra Plotly krever kaleido
+        figur.write_image(args.output)
+
+    _skriv(args, {'output': args.output, 'kind': args.kind}, f"Skrev {args.output}")
+    return 0
+
+
+def _diff(args) -> int:
+    from family_io import _person_to_dict, _ekteskap_to_dict
+
+    a, b = _last(args, args.a), _last(args, args.b)
+    resultat = {
+        'personer': _diff_poster(a.personer, b.personer, _person_to_dict),
+        'ekteskap': _diff_poster(a.ekteskap, b.ekteskap, _ekteskap_to_dict),
+    }
+
+    linjer = []
+    for type_, endringer in resultat.items():
+        linjer += [f"+ {type_} {i}" for i in endringer['lagt_til']]
+        linjer += [f"- {type_} {i}" for i in endringer['fjernet']]
+        linjer += [f"~ {type_} {i}: {', '.join(felter)}" for i, felter in endringer['endret'].items()]
+    _skriv(args, resultat, '\n'.join(linjer) if linjer else "Ingen forskjeller")
+    return 1 if linjer else 0
+
+
+def _diff_poster(a: list, b: list, til_dict) -> Dict[str, Any]:
+    """Sammenlign poster etter ID: lagt til, fjernet og endrede felter."""
+    gamle = {p.id: p for p in a}
+    nye = {p.id: p for p in b}
+    endret = {}
+    for post_id in gamle.keys() & nye.keys():
+        før, etter = til_dict(gamle[post_id]), til_dict(nye[post_id])
+        felter = [felt for felt in før if før[felt] != etter.get(felt)]
+        if felter:
+            endret[post_id] = felter
+    return {
+        'lagt_til': [i for i in nye if i not in gamle],
+        'fjernet': [i for i in gamle if i not in nye],
+        'endret': dict(sorted(endret.items())),
+    }
+
+
+def _last(args, file_path: str):
+    from family_io import load
+    return load(file_path, cache=not args.no_cache)
+
+
+def _tre(args, file_path: str):
+    from tree import Slektstre
+    return Slektstre(_last(args, file_path))
+
+
+def _kort(person) -> Dict[str, Any]:
+    """Kort personbeskrivelse for utskrift."""
+    return {'id': person.id, 'navn': person.fullt_navn,
+            'fødselsdato': person.fødselsdato.isoformat() if person.fødselsdato else None}
+
+
+def _ider(ider: List[str]) -> Iterable[str]:
+    """Person-IDer fra argumentene, eller én per linje fra stdin."""
+    if ider and ider != ['-']:
+        return ider
+    return (linje.strip() for linje in _stdin_linjer())
+
+
+def _stdin_linjer() -> Iterable[str]:
+    for linje in sys.stdin:
+        if linje.strip():
+            yield linje
+
+
+def _skriv(args, data: Any, tekst: str) -> None:
+    """Skriv én JSON-linje med --json, ellers teksten."""
+    if args.json:
+        print(json.dumps(data, ensure_ascii=False, default=str), flush=True)
+    else:
+        print(tekst, flush=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,25 +1,174 @@
 """
 Import/eksport funksjoner for slektstre-prosjektet
-Støtter YAML, JSON, CSV og GEDCOM formater
+Støtter YAML, JSON, CSV, Parquet, SQLite og GEDCOM formater
+Filer som slutter på .gz, .bz2 eller .xz (de)komprimeres strømmende
 """
 
+import io
 import json
+import lzma
+import re
 import yaml
+import bz2
 import csv
+import gzip
+import hashlib
+import math
+import os
+import pickle
+import shutil
+import sqlite3
+import tempfile
+import unicodedata
+from contextlib import contextmanager
+from enum import Enum
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Callable, Iterable, Tuple, Union, TYPE_CHECKING
 from datetime import datetime, date
-import pandas as pd
+
+# pandas importeres først når CSV faktisk leses
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Bruk LibYAML (C) når tilgjengelig, ellers den rene Python-parseren
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+from pydantic import TypeAdapter, ValidationError
 
 from models import Person, Ekteskap, FamilieData, Gender
+from import_report import Importrapport, Importfeil, _valideringsmelding
 from localization import t
 
-def load_from_yaml(file_path: str) -> FamilieData:
+# Bulk-validering av mange poster i ett kall
+_PERSON_LISTE = TypeAdapter(List[Person])
+_EKTESKAP_LISTE = TypeAdapter(List[Ekteskap])
+
+# Komprimering etter siste filendelse (f.eks. familie.yaml.gz)
+_KOMPRESJON = {'.gz': gzip, '.bz2': bz2, '.xz': lzma}
+
+# Øk når formatet til hurtigbufferen i load() endres
+_CACHE_VERSJON = 1
+
+# Metadatafelter i FamilieData, og markør for at migreringen ikke er avgjort ennå
+_METADATA_FELTER = ('versjon', 'opprettet', 'sist_endret', 'beskrivelse')
+_INGEN_MIGRERING = object()
+
+# Feltrekkefølge i kompakte poster (tupler) som sendes mellom prosesser
+_PERSON_FELTER = tuple(Person.model_fields)
+_EKTESKAP_FELTER = tuple(Ekteskap.model_fields)
+
+# Kolonner i CSV-formatet
+_PERSON_CSV_KOLONNER = [
+    'id', 'fornavn', 'mellomnavn', 'etternavn', 'kjønn', 'fødselsdato', 'dødsdato',
+    'fødested', 'dødssted', 'bilde_sti', 'notater', 'historier', 'foreldre', 'barn', 'partnere'
+]
+_EKTESKAP_CSV_KOLONNER = [
+    'id', 'partner1_id', 'partner2_id', 'ekteskapsdato', 'ekteskapssted',
+    'skilsmisse_dato', 'ekteskapstype', 'notater'
+]
+
+# SQLite-lagring: samme kolonner som CSV, lister og ekstra_data som JSON-tekst
+_SQL_PERSON_KOLONNER = ', '.join(_PERSON_CSV_KOLONNER + ['ekstra_data'])
+_SQL_EKTESKAP_KOLONNER = ', '.join(_EKTESKAP_CSV_KOLONNER)
+_SQLITE_SKJEMA = """
+CREATE TABLE IF NOT EXISTS metadata (
+    nøkkel TEXT PRIMARY KEY,
+    verdi TEXT
+);
+CREATE TABLE IF NOT EXISTS personer (
+    id TEXT PRIMARY KEY,
+    fornavn TEXT NOT NULL,
+    mellomnavn TEXT,
+    etternavn TEXT,
+    kjønn TEXT NOT NULL,
+    fødselsdato TEXT,
+    dødsdato TEXT,
+    fødested TEXT,
+    dødssted TEXT,
+    bilde_sti TEXT,
+    notater TEXT,
+    historier TEXT,
+    foreldre TEXT,
+    barn TEXT,
+    partnere TEXT,
+    ekstra_data TEXT
+);
+CREATE TABLE IF NOT EXISTS ekteskap (
+    id TEXT PRIMARY KEY,
+    partner1_id TEXT NOT NULL,
+    partner2_id TEXT NOT NULL,
+    ekteskapsdato TEXT,
+    ekteskapssted TEXT,
+    skilsmisse_dato TEXT,
+    ekteskapstype TEXT,
+    notater TEXT
+);
+CREATE TABLE IF NOT EXISTS foreldre_barn (
+    forelder_id TEXT NOT NULL,
+    barn_id TEXT NOT NULL,
+    PRIMARY KEY (forelder_id, barn_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_foreldre_barn_barn ON foreldre_barn (barn_id);
+CREATE INDEX IF NOT EXISTS idx_personer_etternavn ON personer (etternavn);
+CREATE INDEX IF NOT EXISTS idx_personer_fodselsdato ON personer (fødselsdato);
+CREATE INDEX IF NOT EXISTS idx_personer_fodested ON personer (fødested);
+CREATE INDEX IF NOT EXISTS idx_ekteskap_partner1 ON ekteskap (partner1_id);
+CREATE INDEX IF NOT EXISTS idx_ekteskap_partner2 ON ekteskap (partner2_id);
+"""
+
+# GEDCOM: månedsnavn, datokvalifikatorer og ANSEL-tegnsett
+_GEDCOM_MÅNEDER = {
+    'JAN': 1, 'FEB': 2, 'MAR': 3, 'APR': 4, 'MAY': 5, 'JUN': 6,
+    'JUL': 7, 'AUG': 8, 'SEP': 9, 'OCT': 10, 'NOV': 11, 'DEC': 12
+}
+_GEDCOM_MÅNEDER_NAVN = list(_GEDCOM_MÅNEDER)
+_GEDCOM_DATO = re.compile(r'^(?:(\d{1,2})\s+)?(?:([A-Z]{3})\s+)?(\d{1,4})(?:/\d{1,2})?$')
+_GEDCOM_KVALIFIKATORER = {'ABT', 'CAL', 'EST', 'BEF', 'AFT', 'BET', 'FROM', 'INT', 'TO', 'AND'}
+_GEDCOM_KALENDRE = {'GREGORIAN', 'JULIAN', 'FRENCH_R', 'HEBREW'}
+_GEDCOM_TEGNSETT = {
+    'UTF-8': 'utf-8-sig', 'UTF8': 'utf-8-sig', 'UNICODE': 'utf-16',
+    'ANSEL': 'ansel', 'ANSI': 'cp1252', 'IBMPC': 'cp437', 'ASCII': 'utf-8-sig'
+}
+# ANSEL (Z39.47): spesialtegn 0xA1-0xCF og kombinerende tegn 0xE0-0xFE
+_ANSEL_TEGN = {
+    0xA1: '\u0141', 0xA2: '\u00D8', 0xA3: '\u0110', 0xA4: '\u00DE', 0xA5: '\u00C6',
+    0xA6: '\u0152', 0xA7: '\u02B9', 0xA8: '\u00B7', 0xA9: '\u266D', 0xAA: '\u00AE',
+    0xAB: '\u00B1', 0xAC: '\u01A0', 0xAD: '\u01AF', 0xAE: '\u02BC', 0xB0: '\u02BB',
+    0xB1: '\u0142', 0xB2: '\u00F8', 0xB3: '\u0111', 0xB4: '\u00FE', 0xB5: '\u00E6',
+    0xB6: '\u0153', 0xB7: '\u02BA', 0xB8: '\u0131', 0xB9: '\u00A3', 0xBA: '\u00F0',
+    0xBC: '\u01A1', 0xBD: '\u01B0', 0xBE: '\u25A1', 0xBF: '\u25A0', 0xC0: '\u00B0',
+    0xC1: '\u2113', 0xC2: '\u2117', 0xC3: '\u00A9', 0xC4: '\u266F', 0xC5: '\u00BF',
+    0xC6: '\u00A1', 0xCF: '\u00DF',
+}
+_ANSEL_KOMBINERENDE = {
+    0xE0: '\u0309', 0xE1: '\u0300', 0xE2: '\u0301', 0xE3: '\u0302', 0xE4: '\u0303',
+    0xE5: '\u0304', 0xE6: '\u0306', 0xE7: '\u0307', 0xE8: '\u0308', 0xE9: '\u030C',
+    0xEA: '\u030A', 0xEB: '\uFE20', 0xEC: '\uFE21', 0xED: '\u0315', 0xEE: '\u030B',
+    0xEF: '\u0310', 0xF0: '\u0327', 0xF1: '\u0328', 0xF2: '\u0323', 0xF3: '\u0324',
+    0xF4: '\u0325', 0xF5: '\u0333', 0xF6: '\u0332', 0xF7: '\u0326', 0xF8: '\u031C',
+    0xF9: '\u032E', 0xFA: '\uFE22', 0xFB: '\uFE23', 0xFE: '\u0313',
+}
+
+def load_from_yaml(file_path: str,
+                   progress: Optional[Callable[[int, int, int], None]] = None,
+                   progress_every: int = 1000,
+                   report: Optional[Importrapport] = None) -> FamilieData:
     """
     Last familie-data fra YAML-fil.
     
+    Filen leses hendelse for hendelse med LibYAML-parseren når den finnes.
+    Hver post i `personer` og `ekteskap` gjøres om til Person/Ekteskap
+    med en gang, så hele dokumentet aldri ligger i minnet som dicts.
+    
     Args:
         file_path: Sti til YAML-fil
+        progress: Kalles som progress(antall_poster, leste_bytes, totalt_bytes)
+        progress_every: Antall poster mellom hvert progress-kall
+        report: Importrapport som samler ugyldige poster (ellers stopper første feil importen)
     
     Returns:
         FamilieData objekt
@@ -28,10 +177,68 @@ def load_from_yaml(file_path: str) -> FamilieData:
     if not file_path.exists():
         raise FileNotFoundError(t('file_not_found'))
     
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = yaml.safe_load(f)
+    totalt = file_path.stat().st_size
+    personer: List[Person] = []
+    ekteskap: List[Ekteskap] = []
+    metadata: Dict[str, Any] = {}
+    migrering = _INGEN_MIGRERING
     
-    return _parse_yaml_data(data)
+    with _open_fil(file_path, 'rb') as f:
+        parser = _YamlLoader(f)
+        try:
+            def rapporter():
+                antall = len(personer) + len(ekteskap)
+                if progress and antall % progress_every == 0:
+                    progress(antall, _lest(f), totalt)
+            
+            parser.get_event()  # StreamStart
+            if parser.check_event(yaml.StreamEndEvent):
+                return _parse_yaml_data({})
+            parser.get_event()  # DocumentStart
+            
+            bygger = _YamlBygger(parser)
+            if not parser.check_event(yaml.MappingStartEvent):
+                return _parse_yaml_data(bygger.verdi())
+            
+            parser.get_event()
+            while not parser.check_event(yaml.MappingEndEvent):
+                nøkkel = bygger.verdi()
+                if nøkkel in ('personer', 'ekteskap') and parser.check_event(yaml.SequenceStartEvent):
+                    if migrering is _INGEN_MIGRERING:
+                        migrering = _migrering_for(metadata)
+                    modell, liste = (Person, personer) if nøkkel == 'personer' else (Ekteskap, ekteskap)
+                    migrer = _post_migrering(migrering, nøkkel)
+                    parser.get_event()
+                    rad = 0
+                    while not parser.check_event(yaml.SequenceEndEvent):
+                        rad += 1
+                        linje = parser.peek_event().start_mark.line + 1
+                        data = bygger.verdi()
+                        if migrer:
+                            data = migrer(data)
+                        post = _valider_post(modell, data, report, file_path, linje, rad)
+                        if post is not None:
+                            liste.append(post)
+                        rapporter()
+                    parser.get_event()
+                elif nøkkel == 'metadata':
+                    metadata = {**metadata, **(bygger.verdi() or {})}
+                elif nøkkel in _METADATA_FELTER:
+                    # Flatt oppsett (FamilieData dumpet direkte) har metadata på toppnivå
+                    metadata.setdefault(nøkkel, bygger.verdi())
+                else:
+                    bygger.verdi()
+        finally:
+            parser.dispose()
+    
+    if progress:
+        progress(len(personer) + len(ekteskap), totalt, totalt)
+    
+    if migrering is _INGEN_MIGRERING:
+        migrering = _migrering_for(metadata)
+    if migrering:
+        metadata = migrering.metadata(metadata)
+    return _familie_data_fra(personer, ekteskap, metadata)
 
 def save_to_yaml(familie_data: FamilieData, file_path: str) -> None:
     """
@@ -54,15 +261,25 @@ def save_to_yaml(familie_data: FamilieData, file_path: str) -> None:
         'ekteskap': [_ekteskap_to_dict(e) for e in familie_data.ekteskap]
     }
     
-    with open(file_path, 'w', encoding='utf-8') as f:
+    with _open_fil(file_path, 'w', encoding='utf-8') as f:
         yaml.dump(data, f, default_flow_style=False, allow_unicode=True, sort_keys=False)
 
-def load_from_json(file_path: str) -> FamilieData:
+def load_from_json(file_path: str,
+                   progress: Optional[Callable[[int, int, int], None]] = None,
+                   progress_every: int = 1000,
+                   report: Optional[Importrapport] = None) -> FamilieData:
     """
     Last familie-data fra JSON-fil.
     
+    Filen leses i biter, og hver post i `personer` og `ekteskap` valideres
+    og gjøres om til Person/Ekteskap så snart den er lest, så minnebruken
+    ikke avhenger av hvor stor filen er.
+    
     Args:
         file_path: Sti til JSON-fil
+        progress: Kalles som progress(antall_poster, leste_bytes, totalt_bytes)
+        progress_every: Antall poster mellom hvert progress-kall
+        report: Importrapport som samler ugyldige poster (ellers stopper første feil importen)
     
     Returns:
         FamilieData objekt
@@ -71,30 +288,97 @@ def load_from_json(file_path: str) -> FamilieData:
     if not file_path.exists():
         raise FileNotFoundError(t('file_not_found'))
     
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    totalt = file_path.stat().st_size
+    lister: Dict[str, list] = {'personer': [], 'ekteskap': []}
+    modeller = {'personer': Person, 'ekteskap': Ekteskap}
+    andre: Dict[str, Any] = {}
+    migrering = _INGEN_MIGRERING
+    
+    with _open_fil(file_path, 'r', encoding='utf-8') as f:
+        strøm = _JsonStrøm(f)
+        strøm.forbruk('{')
+        while strøm.tegn() != '}':
+            nøkkel = strøm.verdi()
+            strøm.forbruk(':')
+            if nøkkel in lister and strøm.tegn() == '[':
+                if migrering is _INGEN_MIGRERING:
+                    migrering = _migrering_for(andre)
+                liste, modell = lister[nøkkel], modeller[nøkkel]
+                migrer = _post_migrering(migrering, nøkkel)
+                strøm.forbruk('[')
+                rad = 0
+                while strøm.tegn() != ']':
+                    rad += 1
+                    linje = strøm.linje() if report is not None else None
+                    data = strøm.verdi()
+                    if migrer:
+                        data = migrer(data)
+                    post = _valider_post(modell, data, report, file_path, linje, rad)
+                    if post is not None:
+                        liste.append(post)
+                    antall = len(lister['personer']) + len(lister['ekteskap'])
+                    if progress and antall % progress_every == 0:
+                        progress(antall, _lest(f), totalt)
+                    if strøm.tegn() == ',':
+                        strøm.forbruk(',')
+                strøm.forbruk(']')
+            else:
+                andre[nøkkel] = strøm.verdi()
+            if strøm.tegn() == ',':
+                strøm.forbruk(',')
+    
+    if progress:
+        progress(len(lister['personer']) + len(lister['ekteskap']), totalt, totalt)
     
-    return FamilieData(**data)
+    if migrering is _INGEN_MIGRERING:
+        migrering = _migrering_for(andre)
+    if migrering:
+        andre = migrering.metadata(andre)
+    return FamilieData(**lister, **andre)
 
 def save_to_json(familie_data: FamilieData, file_path: str) -> None:
     """
     Lagre familie-data til JSON-fil.
     
+    Postene skrives én og én med pydantic sin egen JSON-serialisering,
+    én post per linje, uten å bygge hele datasettet som dict først.
+    
     Args:
         familie_data: FamilieData objekt
         file_path: Sti til JSON-fil
     """
     file_path = Path(file_path)
+    metadata = familie_data.model_dump(mode='json', exclude={'personer', 'ekteskap'})
     
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(familie_data.dict(), f, indent=2, ensure_ascii=False, default=str)
+    with _open_fil(file_path, 'w', encoding='utf-8') as f:
+        # Metadata (med versjon) først, så leseren kan migrere postene strømmende
+        f.write('{\n')
+        for nøkkel, verdi in metadata.items():
+            f.write(f'  {json.dumps(nøkkel)}: {json.dumps(verdi, ensure_ascii=False)},\n')
+        for nøkkel, poster in (('personer', familie_data.personer),
+                               ('ekteskap', familie_data.ekteskap)):
+            f.write(f'  "{nøkkel}": [')
+            skille = '\n    '
+            for post in poster:
+                f.write(skille)
+                f.write(post.model_dump_json())
+                skille = ',\n    '
+            f.write('\n  ]' if poster else ']')
+            f.write(',\n' if nøkkel == 'personer' else '\n')
+        f.write('}\n')
 
-def load_from_csv(file_path: str) -> FamilieData:
+def load_from_jsonl(file_path: str,
+                    progress: Optional[Callable[[int, int, int], None]] = None,
+                    progress_every: int = 1000,
+                    report: Optional[Importrapport] = None) -> FamilieData:
     """
-    Last familie-data fra CSV-fil.
+    Last familie-data fra JSON Lines-fil (én post per linje).
     
     Args:
-        file_path: Sti til CSV-fil
+        file_path: Sti til JSONL-fil
+        progress: Kalles som progress(antall_poster, leste_bytes, totalt_bytes)
+        progress_every: Antall poster mellom hvert progress-kall
+        report: Importrapport som samler ugyldige poster (ellers stopper første feil importen)
     
     Returns:
         FamilieData objekt
@@ -103,147 +387,1077 @@ def load_from_csv(file_path: str) -> FamilieData:
     if not file_path.exists():
         raise FileNotFoundError(t('file_not_found'))
     
-    df = pd.read_csv(file_path, encoding='utf-8')
+    totalt = file_path.stat().st_size
+    personer: List[Person] = []
+    ekteskap: List[Ekteskap] = []
+    metadata: Dict[str, Any] = {}
+    migrering = _INGEN_MIGRERING
+    lest = 0
     
-    personer = []
-    for _, row in df.iterrows():
-        # Hjelpefunksjon for å håndtere NaN verdier
-        def safe_get(key, default=''):
-            value = row.get(key, default)
-            return default if pd.isna(value) else value
-        
-        person = Person(
-            id=safe_get('id', ''),
-            fornavn=safe_get('fornavn', ''),
-            mellomnavn=safe_get('mellomnavn') if safe_get('mellomnavn') else None,
-            etternavn=safe_get('etternavn') if safe_get('etternavn') else None,
-            kjønn=Gender(safe_get('kjønn', 'other')),
-            fødselsdato=_parse_date(safe_get('fødselsdato')),
-            dødsdato=_parse_date(safe_get('dødsdato')),
-            fødested=safe_get('fødested') if safe_get('fødested') else None,
-            dødssted=safe_get('dødssted') if safe_get('dødssted') else None,
-            bilde_sti=safe_get('bilde_sti') if safe_get('bilde_sti') else None,
-            notater=safe_get('notater') if safe_get('notater') else None,
-            historier=_parse_list(safe_get('historier')),
-            foreldre=_parse_list(safe_get('foreldre')),
-            barn=_parse_list(safe_get('barn')),
-            partnere=_parse_list(safe_get('partnere'))
-        )
-        personer.append(person)
-    
-    # Prøv å laste ekteskap fra separat fil
-    ekteskap = []
-    ekteskap_file = file_path.parent / f"{file_path.stem}_ekteskap.csv"
-    if ekteskap_file.exists():
-        ekteskap_df = pd.read_csv(ekteskap_file, encoding='utf-8')
-        for _, row in ekteskap_df.iterrows():
-            def safe_get(key, default=''):
-                value = row.get(key, default)
-                return default if pd.isna(value) else value
+    with _open_fil(file_path, 'rb') as f:
+        for linjenummer, linje in enumerate(f, 1):
+            lest += len(linje)
+            if not linje.strip():
+                continue
             
-            ekteskap_obj = Ekteskap(
-                id=safe_get('id', ''),
-                partner1_id=safe_get('partner1_id', ''),
-                partner2_id=safe_get('partner2_id', ''),
-                ekteskapsdato=_parse_date(safe_get('ekteskapsdato')),
-                ekteskapssted=safe_get('ekteskapssted') if safe_get('ekteskapssted') else None,
-                skilsmisse_dato=_parse_date(safe_get('skilsmisse_dato')),
-                ekteskapstype=safe_get('ekteskapstype', 'ekteskap'),
-                notater=safe_get('notater') if safe_get('notater') else None
-            )
-            ekteskap.append(ekteskap_obj)
+            try:
+                post = json.loads(linje)
+            except json.JSONDecodeError as e:
+                if report is None:
+                    raise
+                report.add(file_path, linjenummer, None, None, str(e), linje.decode('utf-8', 'replace'))
+                continue
+            if migrering is _INGEN_MIGRERING and ('person' in post or 'ekteskap' in post):
+                migrering = _migrering_for(metadata)
+            if 'person' in post:
+                data = migrering.person(post['person']) if migrering else post['person']
+                person = _valider_post(Person, data, report, file_path, linjenummer)
+                if person is not None:
+                    personer.append(person)
+            elif 'ekteskap' in post:
+                data = migrering.ekteskap(post['ekteskap']) if migrering else post['ekteskap']
+                ekteskap_obj = _valider_post(Ekteskap, data, report, file_path, linjenummer)
+                if ekteskap_obj is not None:
+                    ekteskap.append(ekteskap_obj)
+            elif 'metadata' in post:
+                metadata = post['metadata']
+            else:
+                continue
+            
+            antall = len(personer) + len(ekteskap)
+            if progress and antall and antall % progress_every == 0:
+                progress(antall, lest, totalt)
+    
+    if progress:
+        progress(len(personer) + len(ekteskap), totalt, totalt)
+    
+    if migrering is _INGEN_MIGRERING:
+        migrering = _migrering_for(metadata)
+    if migrering:
+        metadata = migrering.metadata(metadata)
+    return FamilieData(personer=personer, ekteskap=ekteskap, **metadata)
+
+def save_to_jsonl(familie_data: FamilieData, file_path: str, index: bool = False) -> None:
+    """
+    Lagre familie-data til JSON Lines-fil.
+    
+    Første linje er {"metadata": {...}}, deretter én {"person": {...}}
+    eller {"ekteskap": {...}} per linje.
+    
+    Args:
+        familie_data: FamilieData objekt
+        file_path: Sti til JSONL-fil
+        index: Skriv også offset-indeksen (`<fil>.idx`) for load_neighborhood;
+               krever ukomprimert fil
+    """
+    file_path = Path(file_path)
+    metadata = familie_data.model_dump(mode='json', exclude={'personer', 'ekteskap'})
+    
+    indeks = None
+    if index:
+        if file_path.suffix != '.jsonl':
+            raise ValueError("Offset-indeks krever en ukomprimert .jsonl-fil")
+        from jsonl_store import _Indeksskriver
+        indeks = _Indeksskriver(file_path)
+    
+    with _open_fil(file_path, 'wb') as f:
+        linje = (json.dumps({'metadata': metadata}, ensure_ascii=False) + '\n').encode('utf-8')
+        f.write(linje)
+        posisjon = len(linje)
+        if indeks:
+            indeks.metadata(0, len(linje))
+        for person in familie_data.personer:
+            linje = b'{"person": ' + person.model_dump_json().encode('utf-8') + b'}\n'
+            f.write(linje)
+            if indeks:
+                indeks.person({'id': person.id, 'foreldre': person.foreldre,
+                               'barn': person.barn, 'partnere': person.partnere},
+                              posisjon, len(linje))
+            posisjon += len(linje)
+        for ekteskap in familie_data.ekteskap:
+            linje = b'{"ekteskap": ' + ekteskap.model_dump_json().encode('utf-8') + b'}\n'
+            f.write(linje)
+            if indeks:
+                indeks.ekteskap({'id': ekteskap.id, 'partner1_id': ekteskap.partner1_id,
+                                 'partner2_id': ekteskap.partner2_id}, posisjon, len(linje))
+            posisjon += len(linje)
+    
+    if indeks:
+        indeks.skriv()
+
+def load_from_csv(file_path: str,
+                  report: Optional[Importrapport] = None) -> FamilieData:
+    """
+    Last familie-data fra CSV-fil.
+    
+    Kolonnene behandles samlet med pandas (datoer, pipe-separerte lister,
+    kjønn og tomme felter), og modellene valideres i én bulk-operasjon
+    i stedet for rad for rad. Filer skrevet med chunk_size (navn-00000.csv,
+    navn-00001.csv, ...) leses samlet når navn.csv eller en av delene gis.
     
+    Args:
+        file_path: Sti til CSV-fil
+        report: Importrapport som samler ugyldige rader (ellers stopper første feil importen)
+    
+    Returns:
+        FamilieData objekt
+    """
+    file_path = _csv_basis(Path(file_path))
+    deler = _csv_deler(file_path)
+    if not deler:
+        raise FileNotFoundError(t('file_not_found'))
+    
+    personer = [p for sti in deler for p in _les_csv_personer(sti, report)]
+    ekteskap = [e for sti in _csv_deler(_ekteskap_csv_path(file_path))
+                for e in _les_csv_ekteskap(sti, report)]
     return FamilieData(personer=personer, ekteskap=ekteskap)
 
-def save_to_csv(familie_data: FamilieData, file_path: str) -> None:
+def _les_csv_personer(file_path: Path, report: Optional[Importrapport]) -> List[Person]:
+    """Les og valider personene i én person-CSV."""
+    df = _read_csv_columns(file_path, _PERSON_CSV_KOLONNER)
+    
+    kjønn = df['kjønn'].mask(df['kjønn'] == '', Gender.OTHER.value)
+    ugyldige = ~kjønn.isin([g.value for g in Gender])
+    if ugyldige.any() and report is None:
+        # Samme feil som Gender(verdi) ville gitt for første ugyldige rad
+        Gender(kjønn[ugyldige].iloc[0])
+    
+    kolonner = {
+        'id': df['id'],
+        'fornavn': df['fornavn'],
+        'kjønn': kjønn,
+        'fødselsdato': _parse_date_column(df['fødselsdato']),
+        'dødsdato': _parse_date_column(df['dødsdato']),
+    }
+    for navn in ('mellomnavn', 'etternavn', 'fødested', 'dødssted', 'bilde_sti', 'notater'):
+        kolonner[navn] = _optional_column(df[navn])
+    for navn in ('historier', 'foreldre', 'barn', 'partnere'):
+        kolonner[navn] = _split_list_column(df[navn])
+    
+    # Linje 1 er overskriften, så datarad nr. i står på linje i + 1
+    return _valider_bulk(_PERSON_LISTE, _columns_to_records(kolonner, len(df)), report,
+                         file_path, linjer=range(2, len(df) + 2))
+
+def _les_csv_ekteskap(file_path: Path, report: Optional[Importrapport]) -> List[Ekteskap]:
+    """Les og valider ekteskapene i én ekteskaps-CSV."""
+    ekteskap_df = _read_csv_columns(file_path, _EKTESKAP_CSV_KOLONNER)
+    kolonner = {
+        'id': ekteskap_df['id'],
+        'partner1_id': ekteskap_df['partner1_id'],
+        'partner2_id': ekteskap_df['partner2_id'],
+        'ekteskapsdato': _parse_date_column(ekteskap_df['ekteskapsdato']),
+        'ekteskapssted': _optional_column(ekteskap_df['ekteskapssted']),
+        'skilsmisse_dato': _parse_date_column(ekteskap_df['skilsmisse_dato']),
+        'ekteskapstype': ekteskap_df['ekteskapstype'].mask(
+            ekteskap_df['ekteskapstype'] == '', 'ekteskap'
+        ),
+        'notater': _optional_column(ekteskap_df['notater']),
+    }
+    return _valider_bulk(_EKTESKAP_LISTE, _columns_to_records(kolonner, len(ekteskap_df)),
+                         report, file_path, linjer=range(2, len(ekteskap_df) + 2))
+
+def save_to_csv(familie_data: FamilieData, file_path: str,
+                chunk_size: Optional[int] = None,
+                compress: Union[bool, str] = False) -> None:
     """
     Lagre familie-data til CSV-fil.
     
+    Radene skrives fortløpende med csv-modulen mens personer og ekteskap
+    gjennomløpes, så minnebruken er konstant uansett størrelse på treet.
+    
     Args:
         familie_data: FamilieData objekt
-        file_path: Sti til CSV-fil
+        file_path: Sti til CSV-fil (.csv, eventuelt med .gz, .bz2 eller .xz)
+        chunk_size: Maks antall rader per fil; gir navn-00000.csv, navn-00001.csv, ...
+                    som load_from_csv og load leser samlet fra navn.csv
+        compress: Komprimer: True eller 'gz' for gzip, 'bz2' eller 'xz' (legges til i filnavnet)
     """
-    file_path = Path(file_path)
+    file_path = _med_kompresjon(Path(file_path), compress)
     
     # Lagre personer
-    rows = []
-    for person in familie_data.personer:
-        row = {
-            'id': person.id,
-            'fornavn': person.fornavn,
-            'mellomnavn': person.mellomnavn,
-            'etternavn': person.etternavn,
-            'kjønn': person.kjønn,
-            'fødselsdato': person.fødselsdato.isoformat() if person.fødselsdato else '',
-            'dødsdato': person.dødsdato.isoformat() if person.dødsdato else '',
-            'fødested': person.fødested,
-            'dødssted': person.dødssted,
-            'bilde_sti': person.bilde_sti,
-            'notater': person.notater,
-            'historier': '|'.join(person.historier) if person.historier else '',
-            'foreldre': '|'.join(person.foreldre) if person.foreldre else '',
-            'barn': '|'.join(person.barn) if person.barn else '',
-            'partnere': '|'.join(person.partnere) if person.partnere else ''
-        }
-        rows.append(row)
-    
-    df = pd.DataFrame(rows)
-    df.to_csv(file_path, index=False, encoding='utf-8')
+    _write_csv_rows(
+        file_path, _PERSON_CSV_KOLONNER,
+        (_person_csv_row(p) for p in familie_data.personer), chunk_size
+    )
     
     # Lagre ekteskap til separat fil
     if familie_data.ekteskap:
-        ekteskap_file = file_path.parent / f"{file_path.stem}_ekteskap.csv"
-        ekteskap_rows = []
-        for ekteskap in familie_data.ekteskap:
-            row = {
-                'id': ekteskap.id,
-                'partner1_id': ekteskap.partner1_id,
-                'partner2_id': ekteskap.partner2_id,
-                'ekteskapsdato': ekteskap.ekteskapsdato.isoformat() if ekteskap.ekteskapsdato else '',
-                'ekteskapssted': ekteskap.ekteskapssted,
-                'skilsmisse_dato': ekteskap.skilsmisse_dato.isoformat() if ekteskap.skilsmisse_dato else '',
-                'ekteskapstype': ekteskap.ekteskapstype,
-                'notater': ekteskap.notater
-            }
-            ekteskap_rows.append(row)
-        
-        ekteskap_df = pd.DataFrame(ekteskap_rows)
-        ekteskap_df.to_csv(ekteskap_file, index=False, encoding='utf-8')
+        _write_csv_rows(
+            _ekteskap_csv_path(file_path), _EKTESKAP_CSV_KOLONNER,
+            (_ekteskap_csv_row(e) for e in familie_data.ekteskap), chunk_size
+        )
+    else:
+        # En gammel ekteskapsfil ville gitt slettede ekteskap tilbake ved lasting
+        for sti in _csv_deler(_ekteskap_csv_path(file_path)):
+            sti.unlink(missing_ok=True)
+
+def save_to_parquet(familie_data: FamilieData, file_path: str) -> None:
+    """
+    Lagre familie-data i kolonneformat (Parquet).
+    
+    `file_path` blir en mappe med tre tabeller: personer.parquet (med
+    listekolonner for ID-er), ekteskap.parquet og relasjoner.parquet
+    (kantliste med fra_id, til_id og relasjon). Metadata lagres i
+    skjemaet til persontabellen. Krever pyarrow.
+    
+    Args:
+        familie_data: FamilieData objekt
+        file_path: Sti til Parquet-mappe
+    """
+    pa, pq = _import_pyarrow()
+    mappe = Path(file_path)
+    mappe.mkdir(parents=True, exist_ok=True)
+    personer = familie_data.personer
+    ekteskap = familie_data.ekteskap
+    
+    _write_parquet_persons(pa, pq, familie_data, mappe / 'personer.parquet')
+    
+    ekteskap_skjema = _ekteskap_arrow_schema(pa)
+    ekteskap_kolonner = {
+        felt.name: [getattr(e, felt.name) for e in ekteskap] for felt in ekteskap_skjema
+    }
+    pq.write_table(pa.table(ekteskap_kolonner, schema=ekteskap_skjema), mappe / 'ekteskap.parquet')
+    
+    # Kantliste: forelder -> barn fra begge sider, og partnere
+    kanter = set()
+    for person in personer:
+        kanter.update((forelder_id, person.id, 'forelder-barn') for forelder_id in person.foreldre)
+        kanter.update((person.id, barn_id, 'forelder-barn') for barn_id in person.barn)
+    for e in ekteskap:
+        kanter.add((e.partner1_id, e.partner2_id, 'partner'))
+    kanter = sorted(kanter)
+    relasjon_skjema = pa.schema([
+        ('fra_id', pa.string()), ('til_id', pa.string()), ('relasjon', pa.string())
+    ])
+    pq.write_table(
+        pa.table({
+            'fra_id': [k[0] for k in kanter],
+            'til_id': [k[1] for k in kanter],
+            'relasjon': [k[2] for k in kanter],
+        }, schema=relasjon_skjema),
+        mappe / 'relasjoner.parquet'
+    )
+
+def _write_parquet_persons(pa, pq, familie_data: FamilieData, sti: Path) -> None:
+    """Skriv persontabellen, med metadata i skjemaet."""
+    person_skjema = _person_arrow_schema(pa).with_metadata({
+        'slektstre': json.dumps(
+            familie_data.model_dump(mode='json', exclude={'personer', 'ekteskap'}),
+            ensure_ascii=False
+        )
+    })
+    person_kolonner = {
+        felt.name: [getattr(p, felt.name) for p in familie_data.personer]
+        for felt in person_skjema if felt.name != 'ekstra_data'
+    }
+    person_kolonner['kjønn'] = [_csv_verdi(k) for k in person_kolonner['kjønn']]
+    person_kolonner['ekstra_data'] = [
+        json.dumps(p.ekstra_data, ensure_ascii=False, default=str) if p.ekstra_data else None
+        for p in familie_data.personer
+    ]
+    pq.write_table(pa.table(person_kolonner, schema=person_skjema), sti)
+
+def load_from_parquet(file_path: str,
+                      columns: Optional[List[str]] = None,
+                      filters: Optional[List[Tuple[str, str, Any]]] = None,
+                      include_ekteskap: bool = True,
+                      report: Optional[Importrapport] = None) -> FamilieData:
+    """
+    Last familie-data fra en Parquet-mappe laget av save_to_parquet.
+    
+    Kun de valgte kolonnene leses fra disk, og filtrene skyves ned til
+    Parquet-leseren slik at radgrupper som ikke matcher hoppes over.
+    
+    Eksempel: personer født før 1900, uten notater:
+        load_from_parquet('familie.parquet',
+                          columns=['fornavn', 'etternavn', 'fødselsdato'],
+                          filters=[('fødselsdato', '<', date(1900, 1, 1))])
+    
+    Args:
+        file_path: Sti til Parquet-mappe
+        columns: Personkolonner som skal leses (id, fornavn og kjønn tas alltid med)
+        filters: Filtre i pyarrow-format, f.eks. [('fødested', '==', 'Bergen')]
+        include_ekteskap: Les også ekteskapstabellen
+        report: Importrapport som samler ugyldige rader (ellers stopper første feil importen)
+    
+    Returns:
+        FamilieData objekt
+    """
+    pa, pq = _import_pyarrow()
+    mappe = Path(file_path)
+    if not (mappe / 'personer.parquet').exists():
+        raise FileNotFoundError(t('file_not_found'))
+    
+    if columns is not None:
+        påkrevd = ['id', 'fornavn', 'kjønn']
+        columns = påkrevd + [k for k in columns if k not in påkrevd]
+    
+    tabell = pq.read_table(mappe / 'personer.parquet', columns=columns, filters=filters)
+    rader = tabell.to_pylist()
+    if 'ekstra_data' in tabell.column_names:
+        for rad in rader:
+            rad['ekstra_data'] = json.loads(rad['ekstra_data']) if rad['ekstra_data'] else {}
+    for liste in ('historier', 'foreldre', 'barn', 'partnere'):
+        if liste in tabell.column_names:
+            for rad in rader:
+                if rad[liste] is None:
+                    rad[liste] = []
+    skjema_metadata = pq.read_schema(mappe / 'personer.parquet').metadata or {}
+    metadata = json.loads(skjema_metadata.get(b'slektstre', b'{}'))
+    migrering = _migrering_for(metadata)
+    if migrering:
+        rader = [migrering.person(rad) for rad in rader]
+    personer = _valider_bulk(_PERSON_LISTE, rader, report, mappe / 'personer.parquet')
+    
+    ekteskap = []
+    if include_ekteskap and (mappe / 'ekteskap.parquet').exists():
+        rader = pq.read_table(mappe / 'ekteskap.parquet').to_pylist()
+        if migrering:
+            rader = [migrering.ekteskap(rad) for rad in rader]
+        ekteskap = _valider_bulk(_EKTESKAP_LISTE, rader, report, mappe / 'ekteskap.parquet')
+    
+    if migrering:
+        metadata = migrering.metadata(metadata)
+    return FamilieData(personer=personer, ekteskap=ekteskap, **metadata)
 
-def export_to_gedcom(familie_data: FamilieData, file_path: str) -> None:
+def _sqlite_upsert(conn: sqlite3.Connection, personer: Iterable[Person],
+                   ekteskap: Iterable[Ekteskap]) -> None:
     """
-    Eksporter familie-data til GEDCOM-format.
+    Skriv (eller oppdater) personer, ekteskap og forelder-barn-kanter.
+    
+    Eksisterende rader oppdateres på stedet (ON CONFLICT ... DO UPDATE), så
+    de beholder rowid og dermed rekkefølgen load_from_sqlite leser dem i.
+    """
+    personer = list(personer)
+    plassholdere = ', '.join('?' * len(_PERSON_CSV_KOLONNER + ['ekstra_data']))
+    conn.executemany(
+        f"INSERT INTO personer ({_SQL_PERSON_KOLONNER}) VALUES ({plassholdere}) "
+        f"ON CONFLICT (id) DO UPDATE SET {_oppdater_kolonner(_PERSON_CSV_KOLONNER + ['ekstra_data'])}",
+        (_person_sql_row(p) for p in personer)
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO foreldre_barn (forelder_id, barn_id) VALUES (?, ?)",
+        ((forelder_id, p.id) for p in personer for forelder_id in p.foreldre)
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO foreldre_barn (forelder_id, barn_id) VALUES (?, ?)",
+        ((p.id, barn_id) for p in personer for barn_id in p.barn)
+    )
+    plassholdere = ', '.join('?' * len(_EKTESKAP_CSV_KOLONNER))
+    conn.executemany(
+        f"INSERT INTO ekteskap ({_SQL_EKTESKAP_KOLONNER}) VALUES ({plassholdere}) "
+        f"ON CONFLICT (id) DO UPDATE SET {_oppdater_kolonner(_EKTESKAP_CSV_KOLONNER)}",
+        (_ekteskap_sql_row(e) for e in ekteskap)
+    )
+
+def _oppdater_kolonner(kolonner: List[str]) -> str:
+    """SET-ledd som kopierer alle kolonner unntatt id fra den nye raden."""
+    return ', '.join(f"{k} = excluded.{k}" for k in kolonner if k != 'id')
+
+def _sqlite_metadata(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """Les metadata-tabellen."""
+    return {k: json.loads(v) for k, v in conn.execute("SELECT nøkkel, verdi FROM metadata")}
+
+def _person_sql_row(person: Person) -> Tuple[Any, ...]:
+    """Konverter Person til databaserad (lister og ekstra_data som JSON)."""
+    rad = []
+    for kolonne in _PERSON_CSV_KOLONNER:
+        verdi = getattr(person, kolonne)
+        if isinstance(verdi, list):
+            rad.append(json.dumps(verdi, ensure_ascii=False) if verdi else None)
+        else:
+            rad.append(_csv_verdi(verdi) if verdi is not None else None)
+    rad.append(json.dumps(person.ekstra_data, ensure_ascii=False, default=str)
+               if person.ekstra_data else None)
+    return tuple(rad)
+
+def _person_from_sql_row(rad: Tuple[Any, ...]) -> Dict[str, Any]:
+    """Konverter databaserad til dict for Person-validering."""
+    data = dict(zip(_PERSON_CSV_KOLONNER + ['ekstra_data'], rad))
+    for kolonne in ('historier', 'foreldre', 'barn', 'partnere'):
+        data[kolonne] = json.loads(data[kolonne]) if data[kolonne] else []
+    data['ekstra_data'] = json.loads(data['ekstra_data']) if data['ekstra_data'] else {}
+    return data
+
+def _ekteskap_sql_row(ekteskap: Ekteskap) -> Tuple[Any, ...]:
+    """Konverter Ekteskap til databaserad."""
+    return tuple(
+        _csv_verdi(getattr(ekteskap, k)) if getattr(ekteskap, k) is not None else None
+        for k in _EKTESKAP_CSV_KOLONNER
+    )
+
+def _ekteskap_from_sql_row(rad: Tuple[Any, ...]) -> Dict[str, Any]:
+    """Konverter databaserad til dict for Ekteskap-validering."""
+    return dict(zip(_EKTESKAP_CSV_KOLONNER, rad))
+
+def _import_pyarrow():
+    """Importer pyarrow ved behov (valgfri avhengighet for Parquet)."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet-støtte krever pyarrow: pip install pyarrow") from e
+    return pa, pq
+
+def _person_arrow_schema(pa):
+    """Arrow-skjema for persontabellen."""
+    tekst_liste = pa.list_(pa.string())
+    return pa.schema([
+        ('id', pa.string()),
+        ('fornavn', pa.string()),
+        ('mellomnavn', pa.string()),
+        ('etternavn', pa.string()),
+        ('kjønn', pa.string()),
+        ('fødselsdato', pa.date32()),
+        ('dødsdato', pa.date32()),
+        ('fødested', pa.string()),
+        ('dødssted', pa.string()),
+        ('bilde_sti', pa.string()),
+        ('notater', pa.string()),
+        ('historier', tekst_liste),
+        ('foreldre', tekst_liste),
+        ('barn', tekst_liste),
+        ('partnere', tekst_liste),
+        ('ekstra_data', pa.string()),
+    ])
+
+def _ekteskap_arrow_schema(pa):
+    """Arrow-skjema for ekteskapstabellen."""
+    return pa.schema([
+        ('id', pa.string()),
+        ('partner1_id', pa.string()),
+        ('partner2_id', pa.string()),
+        ('ekteskapsdato', pa.date32()),
+        ('skilsmisse_dato', pa.date32()),
+        ('ekteskapssted', pa.string()),
+        ('ekteskapstype', pa.string()),
+        ('notater', pa.string()),
+    ])
+
+def save_to_sqlite(familie_data: FamilieData, file_path: str) -> None:
+    """
+    Lagre familie-data til SQLite-database.
+    
+    Databasen får tabeller for personer, ekteskap og forelder-barn-kanter,
+    med indekser på ID, etternavn, fødselsdato og fødested. Eksisterende
+    innhold i tabellene erstattes. Bruk SqliteSlektstre for å lese store
+    trær uten å laste alle personer.
     
     Args:
         familie_data: FamilieData objekt
+        file_path: Sti til SQLite-fil
+    """
+    with _komprimert_mål(file_path) as sti:
+        _save_to_sqlite(familie_data, sti)
+
+def _save_to_sqlite(familie_data: FamilieData, file_path: Path) -> None:
+    """Skriv til en ukomprimert SQLite-fil."""
+    conn = sqlite3.connect(str(file_path))
+    try:
+        with conn:
+            conn.executescript(_SQLITE_SKJEMA)
+            conn.execute("DELETE FROM personer")
+            conn.execute("DELETE FROM ekteskap")
+            conn.execute("DELETE FROM foreldre_barn")
+            conn.execute("DELETE FROM metadata")
+            _sqlite_upsert(conn, familie_data.personer, familie_data.ekteskap)
+            metadata = familie_data.model_dump(mode='json', exclude={'personer', 'ekteskap'})
+            conn.executemany(
+                "INSERT INTO metadata (nøkkel, verdi) VALUES (?, ?)",
+                [(k, json.dumps(v, ensure_ascii=False)) for k, v in metadata.items()]
+            )
+    finally:
+        conn.close()
+
+def _save_sqlite_delta(conn: sqlite3.Connection, familie_data: FamilieData) -> None:
+    """
+    Skriv bare endringssettet til en eksisterende database.
+    
+    Endrede poster erstattes og slettede fjernes. En forelder-barn-kant
+    finnes så lenge én av de to personene oppgir den, så en eksisterende
+    kant til en endret person fjernes bare når verken den endrede personen
+    eller den andre siden (fra endringssettet eller databasen) har den lenger.
+    """
+    personer, ekteskap, slettede_personer, slettede_ekteskap = familie_data.pending_changes()
+    endrede = {p.id: p for p in personer}
+    
+    def lister(person_id: str) -> Optional[Tuple[List[str], List[str]]]:
+        """(foreldre, barn) for en person, fra endringssettet eller databasen."""
+        if person_id in endrede:
+            return endrede[person_id].foreldre, endrede[person_id].barn
+        rad = conn.execute("SELECT foreldre, barn FROM personer WHERE id = ?",
+                           (person_id,)).fetchone()
+        if rad is None:
+            return None
+        return tuple(json.loads(verdi) if verdi else [] for verdi in rad)
+    
+    conn.executescript(_SQLITE_SKJEMA)
+    foreldede = []
+    for person_id in endrede:
+        for forelder_id, barn_id in conn.execute(
+            "SELECT forelder_id, barn_id FROM foreldre_barn WHERE forelder_id = ? OR barn_id = ?",
+            (person_id, person_id)
+        ).fetchall():
+            forelder, barn = lister(forelder_id), lister(barn_id)
+            if not ((forelder and barn_id in forelder[1]) or (barn and forelder_id in barn[0])):
+                foreldede.append((forelder_id, barn_id))
+    
+    with conn:
+        conn.executemany("DELETE FROM foreldre_barn WHERE forelder_id = ? AND barn_id = ?", foreldede)
+        slettede = [(i,) for i in slettede_personer]
+        conn.executemany("DELETE FROM foreldre_barn WHERE forelder_id = ?", slettede)
+        conn.executemany("DELETE FROM foreldre_barn WHERE barn_id = ?", slettede)
+        conn.executemany("DELETE FROM personer WHERE id = ?", slettede)
+        conn.executemany("DELETE FROM ekteskap WHERE id = ?", [(i,) for i in slettede_ekteskap])
+        _sqlite_upsert(conn, personer, ekteskap)
+        metadata = familie_data.model_dump(mode='json', exclude={'personer', 'ekteskap'})
+        conn.executemany(
+            "INSERT OR REPLACE INTO metadata (nøkkel, verdi) VALUES (?, ?)",
+            [(k, json.dumps(v, ensure_ascii=False)) for k, v in metadata.items()]
+        )
+
+def load_from_sqlite(file_path: str,
+                     report: Optional[Importrapport] = None) -> FamilieData:
+    """
+    Last hele familie-dataene fra SQLite-database.
+    
+    Args:
+        file_path: Sti til SQLite-fil
+        report: Importrapport som samler ugyldige rader (ellers stopper første feil importen)
+    
+    Returns:
+        FamilieData objekt
+    """
+    file_path = Path(file_path)
+    if not file_path.exists():
+        raise FileNotFoundError(t('file_not_found'))
+    
+    with _ukomprimert(file_path) as sti:
+        conn = sqlite3.connect(str(sti))
+        try:
+            metadata = _sqlite_metadata(conn)
+            migrering = _migrering_for(metadata)
+            migrer_person = _post_migrering(migrering, 'personer') or (lambda post: post)
+            migrer_ekteskap = _post_migrering(migrering, 'ekteskap') or (lambda post: post)
+            personer = _valider_bulk(_PERSON_LISTE, [
+                migrer_person(_person_from_sql_row(rad))
+                for rad in conn.execute(f"SELECT {_SQL_PERSON_KOLONNER} FROM personer ORDER BY rowid")
+            ], report, file_path)
+            ekteskap = _valider_bulk(_EKTESKAP_LISTE, [
+                migrer_ekteskap(_ekteskap_from_sql_row(rad))
+                for rad in conn.execute(f"SELECT {_SQL_EKTESKAP_KOLONNER} FROM ekteskap ORDER BY rowid")
+            ], report, file_path)
+        finally:
+            conn.close()
+    
+    if migrering:
+        metadata = migrering.metadata(metadata)
+    return FamilieData(personer=personer, ekteskap=ekteskap, **metadata)
+
+def load_from_gedcom(file_path: str,
+                     progress: Optional[Callable[[int, int, int], None]] = None,
+                     progress_every: int = 1000,
+                     report: Optional[Importrapport] = None) -> FamilieData:
+    """
+    Last familie-data fra GEDCOM-fil (5.5.1 eller 7.0).
+    
+    Filen leses linje for linje i ett pass, og bare den gjeldende posten
+    holdes i minnet. INDI blir Person, FAM med to partnere blir Ekteskap,
+    og FAMC/FAMS/CHIL kobles til foreldre, barn og partnere til slutt.
+    Tegnsettet hentes fra HEAD.CHAR (UTF-8, UNICODE, ANSEL, ANSI).
+    Upresise datoer (ABT, BEF, BET ... AND ..., bare år osv.) gir første
+    mulige dato, og originalteksten lagres i ekstra_data.
+    
+    Args:
         file_path: Sti til GEDCOM-fil
+        progress: Kalles som progress(antall_poster, leste_bytes, totalt_bytes)
+        progress_every: Antall poster mellom hvert progress-kall
+        report: Importrapport som samler ugyldige poster (ellers stopper første feil importen)
+    
+    Returns:
+        FamilieData objekt
     """
     file_path = Path(file_path)
+    if not file_path.exists():
+        raise FileNotFoundError(t('file_not_found'))
     
-    gedcom_lines = [
-        "0 HEAD",
-        "1 SOUR SLEKTSTRE",
-        "1 VERS 1.0",
-        "1 DATE " + datetime.now().strftime("%d %b %Y"),
-        "1 CHAR UTF8",
-        "0 @FAM@ FAM",
-        ""
-    ]
+    totalt = file_path.stat().st_size
+    personer: Dict[str, Dict[str, Any]] = {}
+    familier: Dict[str, Dict[str, Any]] = {}
+    lenker: List[Tuple[str, str, str]] = []
+    post: Optional[Dict[str, Any]] = None
+    sti: List[str] = []
+    antall = 0
     
-    # Legg til personer
-    for person in familie_data.personer:
-        gedcom_lines.extend(_person_to_gedcom(person))
-        gedcom_lines.append("")
+    with _open_fil(file_path, 'rb') as rå:
+        tegnsett = _gedcom_tegnsett(rå)
+        tekst = io.TextIOWrapper(rå, encoding='latin-1' if tegnsett == 'ansel' else tegnsett,
+                                 errors='replace', newline=None)
+        for linjenummer, linje in enumerate(tekst, 1):
+            if tegnsett == 'ansel':
+                linje = _ansel_til_unicode(linje)
+            deler = linje.lstrip().rstrip('\r\n').split(' ', 2)
+            if len(deler) < 2 or not deler[0].isdigit():
+                continue
+            
+            nivå = int(deler[0])
+            if nivå == 0:
+                if post is not None:
+                    antall += 1
+                    if progress and antall % progress_every == 0:
+                        progress(antall, _lest(rå), totalt)
+                
+                post = None
+                if deler[1].startswith('@') and len(deler) == 3:
+                    xref, tag = deler[1].strip('@'), deler[2].strip()
+                    if tag == 'INDI':
+                        post = personer.setdefault(xref, {'id': xref, 'ekstra_data': {}})
+                    elif tag == 'FAM':
+                        post = familier.setdefault(xref, {'id': xref, 'barn': []})
+                    if post is not None:
+                        post['_type'] = tag
+                        post['_linje'] = linjenummer
+                sti = []
+                continue
+            
+            if post is None:
+                continue
+            tag = deler[1]
+            verdi = deler[2] if len(deler) == 3 else ''
+            del sti[nivå - 1:]
+            sti.append(tag)
+            
+            if tag in ('CONT', 'CONC') and 'notater' in post and sti[0] == 'NOTE' and len(sti) == 2:
+                post['notater'] += ('\n' if tag == 'CONT' else '') + verdi
+            elif post['_type'] == 'INDI':
+                _gedcom_indi_felt(post, tuple(sti), verdi, lenker)
+            else:
+                _gedcom_fam_felt(post, tuple(sti), verdi)
+        
+        if post is not None:
+            antall += 1
     
-    # Legg til familier
-    for ekteskap in familie_data.ekteskap:
-        gedcom_lines.extend(_ekteskap_to_gedcom(ekteskap))
-        gedcom_lines.append("")
+    # Løs opp FAMC/FAMS-lenker fra INDI inn i familiene
+    for person_id, tag, familie_id in lenker:
+        familie = familier.setdefault(familie_id, {'id': familie_id, 'barn': []})
+        if tag == 'FAMC':
+            if person_id not in familie['barn']:
+                familie['barn'].append(person_id)
+        elif person_id not in (familie.get('husb'), familie.get('wife')):
+            rolle = 'husb' if personer.get(person_id, {}).get('kjønn') == Gender.MALE.value else 'wife'
+            familie.setdefault(rolle, person_id)
+    
+    ekteskap, ekteskap_linjer = [], []
+    for familie in familier.values():
+        foreldre = [p for p in (familie.get('husb'), familie.get('wife')) if p in personer]
+        for barn_id in familie['barn']:
+            barn = personer.get(barn_id)
+            if barn is None:
+                continue
+            barn.setdefault('foreldre', []).extend(foreldre)
+            for forelder_id in foreldre:
+                personer[forelder_id].setdefault('barn', []).append(barn_id)
+        
+        if len(foreldre) == 2:
+            personer[foreldre[0]].setdefault('partnere', []).append(foreldre[1])
+            personer[foreldre[1]].setdefault('partnere', []).append(foreldre[0])
+            ekteskap.append(_gedcom_ekteskap(familie))
+            ekteskap_linjer.append(familie.get('_linje'))
+    
+    personer_liste = _valider_bulk(
+        _PERSON_LISTE, [_gedcom_person(p) for p in personer.values()], report, file_path,
+        linjer=[p.get('_linje') for p in personer.values()]
+    )
+    ekteskap_liste = _valider_bulk(_EKTESKAP_LISTE, ekteskap, report, file_path,
+                                   linjer=ekteskap_linjer)
+    
+    if progress:
+        progress(antall, totalt, totalt)
+    
+    return FamilieData(personer=personer_liste, ekteskap=ekteskap_liste)
+
+def export_to_gedcom(familie_data: FamilieData, file_path: str,
+                     compress: Union[bool, str] = False) -> None:
+    """
+    Eksporter familie-data til GEDCOM 5.5.1-format.
+    
+    Postene skrives fortløpende til en bufret strøm. Hvert ekteskap blir en
+    FAM-post, og barn uten ekteskap mellom foreldrene får en egen FAM-post
+    per foreldrepar. Personene får FAMC/FAMS og familiene CHIL, slik at
+    forelder-barn-koblingene bevares i andre slektsprogrammer. Bortsett
+    fra familieindeksen brukes konstant ekstra minne.
+    
+    Args:
+        familie_data: FamilieData objekt
+        file_path: Sti til GEDCOM-fil (.ged, eventuelt med .gz, .bz2 eller .xz)
+        compress: Komprimer: True eller 'gz' for gzip, 'bz2' eller 'xz' (legges til i filnavnet)
+    """
+    file_path = _med_kompresjon(Path(file_path), compress)
+    
+    familier, famc, fams = _gedcom_familier(familie_data)
+    
+    with _open_fil(file_path, 'w', encoding='utf-8', newline='\n', buffering=1 << 16) as f:
+        f.write(
+            "0 HEAD\n"
+            "1 SOUR SLEKTSTRE\n"
+            "2 VERS 1.0\n"
+            f"1 DATE {_gedcom_dato(date.today())}\n"
+            "1 GEDC\n"
+            "2 VERS 5.5.1\n"
+            "2 FORM LINEAGE-LINKED\n"
+            "1 CHAR UTF-8\n"
+        )
+        
+        for person in familie_data.personer:
+            f.writelines(_person_to_gedcom(person, famc.get(person.id, ()), fams.get(person.id, ())))
+        
+        for familie_id, (husb, wife, barn, ekteskap) in familier.items():
+            f.writelines(_familie_to_gedcom(familie_id, husb, wife, barn, ekteskap))
+        
+        f.write("0 TRLR\n")
+
+def load_many(paths: Iterable[str], workers: Optional[int] = None,
+              on_conflict: str = 'error',
+              report: Optional[Importrapport] = None) -> FamilieData:
+    """
+    Last mange familie-filer parallelt og slå dem sammen til én FamilieData.
+    
+    Hver fil parses og valideres i en egen prosess, som sender tilbake
+    kompakte poster (tupler av feltverdier) i stedet for picklede
+    pydantic-objekter. Postene slås sammen i filrekkefølge. En ID som
+    finnes i flere filer med identisk innhold tas med én gang; ulikt
+    innhold er en konflikt.
+    
+    Args:
+        paths: Stier til filer i et hvilket som helst støttet format
+        workers: Antall prosesser (None gir antall kjerner, 1 laster i denne prosessen)
+        on_conflict: 'error' (ValueError med alle konflikter), 'first' eller 'last'
+        report: Importrapport som samler ugyldige poster fra alle filene
+    
+    Returns:
+        Sammenslått FamilieData objekt
+    """
+    if on_conflict not in ('error', 'first', 'last'):
+        raise ValueError(f"Ugyldig on_conflict: {on_conflict}")
+    
+    paths = [str(p) for p in paths]
+    for path in paths:
+        _loader_for(path)
+        if not Path(path).exists():
+            raise FileNotFoundError(f"{t('file_not_found')}: {path}")
+    
+    workers = min(workers or os.cpu_count() or 1, len(paths) or 1)
+    samle = [report is not None] * len(paths)
+    if workers == 1:
+        resultater = map(_last_kompakt, paths, samle)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        resultater = pool.map(_last_kompakt, paths, samle)
+    
+    personer: Dict[str, Tuple[Any, ...]] = {}
+    ekteskap: Dict[str, Tuple[Any, ...]] = {}
+    kilder: Dict[Tuple[str, str], str] = {}
+    konflikter: List[str] = []
+    metadata: Dict[str, Any] = {}
+    
+    try:
+        for path, (person_rader, ekteskap_rader, fil_metadata, feil) in zip(paths, resultater):
+            if report is not None:
+                report.extend(feil)
+            for rader, poster, art in ((person_rader, personer, 'person'),
+                                       (ekteskap_rader, ekteskap, 'ekteskap')):
+                for rad in rader:
+                    post_id = rad[0]
+                    eksisterende = poster.get(post_id)
+                    if eksisterende is None or on_conflict == 'last':
+                        poster[post_id] = rad
+                        kilder[(art, post_id)] = path
+                    elif eksisterende != rad and on_conflict == 'error':
+                        konflikter.append(
+                            f"{art} {post_id}: {kilder[(art, post_id)]} og {path}"
+                        )
+            
+            if not metadata:
+                metadata = dict(fil_metadata)
+            else:
+                metadata['opprettet'] = min(metadata['opprettet'], fil_metadata['opprettet'])
+                metadata['sist_endret'] = max(metadata['sist_endret'], fil_metadata['sist_endret'])
+    finally:
+        if workers > 1:
+            pool.shutdown()
+    
+    if konflikter:
+        raise ValueError(
+            f"ID-konflikter mellom filer ({len(konflikter)}):\n" + '\n'.join(konflikter[:50])
+        )
+    
+    # Postene ble validert i arbeidsprosessene
+    return FamilieData(
+        personer=[Person.model_construct(**dict(zip(_PERSON_FELTER, r))) for r in personer.values()],
+        ekteskap=[Ekteskap.model_construct(**dict(zip(_EKTESKAP_FELTER, r))) for r in ekteskap.values()],
+        **metadata
+    )
+
+def _last_kompakt(path: str, samle_feil: bool = False) -> Tuple[
+        List[tuple], List[tuple], Dict[str, Any], List[Importfeil]]:
+    """Last én fil og returner kompakte poster og eventuelle feil (kjøres i en arbeidsprosess)."""
+    if samle_feil:
+        rapport = Importrapport()
+        familie_data = _loader_for(path)(path, report=rapport)
+    else:
+        rapport = None
+        familie_data = _loader_for(path)(path)
+    return (
+        [tuple(getattr(p, f) for f in _PERSON_FELTER) for p in familie_data.personer],
+        [tuple(getattr(e, f) for f in _EKTESKAP_FELTER) for e in familie_data.ekteskap],
+        familie_data.model_dump(exclude={'personer', 'ekteskap'}),
+        rapport.errors if rapport is not None else []
+    )
+
+def detect_format(file_path: str) -> str:
+    """
+    Finn filformatet til en familie-fil.
+    
+    Kjente filendelser brukes direkte. Ellers gjenkjennes formatet fra
+    innholdet: SQLite-header, binært øyeblikksbilde, Parquet-katalog,
+    GEDCOM (0 HEAD), JSON Lines, JSON, CSV (person- eller ekteskapsfil)
+    og til slutt YAML.
+    
+    Args:
+        file_path: Sti til fil eller katalog
+    
+    Returns:
+        Filendelse som identifiserer formatet, f.eks. '.yaml' eller '.csv'
+    """
+    file_path = Path(file_path)
+    endelse = _format_suffix(file_path)
+    if not file_path.exists():
+        # CSV lagret med chunk_size finnes bare som navn-00000.csv, ...
+        if endelse == '.csv' and _csv_deler(file_path):
+            return endelse
+        raise FileNotFoundError(t('file_not_found'))
+    
+    if endelse in _LASTERE:
+        return endelse
+    
+    if file_path.is_dir():
+        if (file_path / 'personer.parquet').exists():
+            return '.parquet'
+        raise ValueError(t('invalid_file_format'))
+    
+    with _open_fil(file_path, 'rb') as f:
+        start = f.read(4096)
+    if start.startswith(b'SQLite format 3\0'):
+        return '.sqlite'
+    if start.startswith(b'SLKTSNAP'):
+        return '.slkt'
+    
+    tekst = start.decode('utf-8', errors='ignore').lstrip('\ufeff').lstrip()
+    if re.match(r'0\s+HEAD\b', tekst):
+        return '.ged'
+    if tekst.startswith('{'):
+        første = tekst.split('\n', 1)[0].strip()
+        try:
+            post = json.loads(første)
+        except json.JSONDecodeError:
+            return '.json'
+        return '.jsonl' if set(post) & {'metadata', 'person', 'ekteskap'} else '.json'
+    if re.match(r'id,(fornavn|partner1_id)\b', tekst):
+        return '.csv'
+    return '.yaml'
+
+def load(file_path: str, cache: bool = True,
+         cache_dir: Optional[str] = None,
+         report: Optional[Importrapport] = None) -> FamilieData:
+    """
+    Last familie-data fra fil med automatisk formatgjenkjenning.
+    
+    Resultatet bufres på disk med nøkkel fra sti, størrelse, mtime og
+    inode for fila (og ekteskapsfila for CSV), så nye kall på en uendret
+    fil slipper parsing og validering uten å lese fila. Gis ekteskapsfila
+    til en CSV eller én av delene fra chunk_size, lastes hele person-fila
+    den hører til. En endringsfil fra save(..., delta=True) spilles av på
+    toppen av øyeblikksbildet.
+    
+    Args:
+        file_path: Sti til fil i et hvilket som helst støttet format
+        cache: Bruk hurtigbufferen på disk
+        cache_dir: Katalog for hurtigbufferen (standard: ~/.cache/slektstre)
+        report: Importrapport som samler ugyldige poster; hurtigbufferen brukes
+                da ikke, slik at feilene rapporteres ved hver lasting
+    
+    Returns:
+        FamilieData objekt
+    """
+    file_path = Path(file_path)
+    format_ = detect_format(str(file_path))
+    
+    if format_ == '.csv':
+        file_path = _csv_basis(file_path)
+    
+    laster = _LASTERE[format_]
+    if report is not None:
+        return _med_patch(laster(str(file_path), report=report), file_path)
+    if not cache:
+        return _med_patch(laster(str(file_path)), file_path)
+    
+    kilder = [file_path]
+    if format_ == '.csv':
+        kilder = _csv_deler(file_path) + _csv_deler(_ekteskap_csv_path(file_path))
+    elif file_path.is_dir():
+        kilder = sorted(p for p in file_path.rglob('*') if p.is_file())
+    if _patch_path(file_path).exists():
+        kilder.append(_patch_path(file_path))
+    
+    katalog = Path(cache_dir) if cache_dir else _cache_dir()
+    sti_nøkkel = hashlib.blake2b(str(file_path.resolve()).encode('utf-8'), digest_size=8).hexdigest()
+    cache_fil = katalog / f"{sti_nøkkel}-{_fingerprint(kilder)}.pickle"
+    
+    if cache_fil.exists():
+        try:
+            with open(cache_fil, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            # Ødelagt eller utdatert hurtigbuffer; parse fila på nytt
+            pass
+    
+    familie_data = _med_patch(laster(str(file_path)), file_path)
+    try:
+        katalog.mkdir(parents=True, exist_ok=True)
+        for gammel in katalog.glob(f"{sti_nøkkel}-*.pickle"):
+            gammel.unlink(missing_ok=True)
+        tmp_fil = cache_fil.with_suffix(f'.tmp{os.getpid()}')
+        with open(tmp_fil, 'wb') as f:
+            pickle.dump(familie_data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_fil, cache_fil)
+    except OSError:
+        # Skrivebeskyttet hurtigbuffer er ikke en feil ved lasting
+        pass
+    return familie_data
+
+def save(familie_data: FamilieData, file_path: str, delta: bool = False) -> None:
+    """
+    Lagre familie-data med format fra filendelsen, eventuelt bare endringene.
+    
+    FamilieData holder et endringssett over personer og ekteskap som er
+    lagt til, endret (via Slektstre eller mark_changed) eller fjernet
+    siden sist lagring. Med `delta=True` skrives bare dette:
+    
+    - SQLite: endrede rader erstattes og slettede fjernes i databasen
+    - Øvrige formater (også Parquet): endringene legges til i endringsfila
+      `<filnavn>.endringer.jsonl` (f.eks. `tre.yaml.endringer.jsonl`), som
+      load() spiller av. Når endringsfila blir større enn øyeblikksbildet,
+      skrives alt på nytt og fila tømmes.
+    
+    Finnes ikke fila fra før, lagres alt. Full lagring fjerner en gammel
+    endringsfil.
     
-    gedcom_lines.append("0 TRLR")
+    Args:
+        familie_data: FamilieData objekt
+        file_path: Sti til fil i et hvilket som helst støttet format
+        delta: Skriv bare endringene siden sist lagring
+    """
+    file_path = Path(file_path)
+    lagrer = _saver_for(str(file_path))
+    format_ = _format_suffix(file_path)
+    
+    if delta and file_path.exists():
+        if not familie_data.has_changes:
+            return
+        if format_ in ('.sqlite', '.db') and file_path.suffix == format_:
+            conn = sqlite3.connect(str(file_path))
+            try:
+                _save_sqlite_delta(conn, familie_data)
+            finally:
+                conn.close()
+            familie_data.mark_saved()
+            return
+        
+        # Endringslogg importerer denne modulen, så den hentes først her
+        from changelog import Endringslogg
+        with Endringslogg(file_path, compact_every=None) as logg:
+            logg.append_changes(familie_data)
+        if _patch_path(file_path).stat().st_size <= _størrelse(file_path):
+            familie_data.mark_saved()
+            return
+    
+    lagrer(familie_data, str(file_path))
+    _patch_path(file_path).unlink(missing_ok=True)
+    familie_data.mark_saved()
+
+def _patch_path(file_path: Path) -> Path:
+    """
+    Endringsfila som hører til et øyeblikksbilde (se changelog.changelog_path).
     
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(gedcom_lines))
+    Hele filnavnet er med, så `tre.yaml` og `tre.json` i samme mappe får
+    hver sin endringsfil.
+    """
+    return file_path.parent / f"{file_path.name}.endringer.jsonl"
+
+def _med_patch(familie_data: FamilieData, file_path: Path) -> FamilieData:
+    """Spill av endringsfila fra save(..., delta=True), hvis den finnes."""
+    if _patch_path(file_path).exists():
+        from changelog import _spill_av
+        _spill_av(familie_data, _patch_path(file_path))
+    return familie_data
+
+def _størrelse(file_path: Path) -> int:
+    """Størrelse i byte for en fil, eller summen for en mappe (og CSV-ekteskapsfil)."""
+    if file_path.is_dir():
+        return sum(p.stat().st_size for p in file_path.rglob('*') if p.is_file())
+    størrelse = file_path.stat().st_size
+    if _format_suffix(file_path) == '.csv' and _ekteskap_csv_path(file_path).exists():
+        størrelse += _ekteskap_csv_path(file_path).stat().st_size
+    return størrelse
+
+def _cache_dir() -> Path:
+    """Standard katalog for hurtigbufferen til load()."""
+    if os.environ.get('SLEKTSTRE_CACHE_DIR'):
+        return Path(os.environ['SLEKTSTRE_CACHE_DIR'])
+    return Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')) / 'slektstre'
+
+def _fingerprint(kilder: List[Path]) -> str:
+    """
+    Hash av sti, størrelse, mtime og inode for alle kildefiler.
+    
+    Bare metadata fra stat() brukes, så oppslaget koster det samme uansett
+    filstørrelse. Lagrefunksjonene skriver nye filer (ny mtime, og ny inode
+    ved atomisk erstatning), så endringer gir alltid ny nøkkel.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    from migrations import SCHEMA_VERSION
+    h.update(f"{_CACHE_VERSJON}\0{SCHEMA_VERSION}".encode('ascii'))
+    for kilde in kilder:
+        stat = kilde.stat()
+        h.update(f"{kilde.resolve()}\0{stat.st_size}\0{stat.st_mtime_ns}\0"
+                 f"{stat.st_dev}\0{stat.st_ino}\0".encode('utf-8'))
+    return h.hexdigest()
+
+def _load_from_binary(file_path: str, report: Optional[Importrapport] = None) -> FamilieData:
+    """Last binært øyeblikksbilde (postene ble validert da det ble skrevet)."""
+    from mmap_store import load_from_binary
+    with _ukomprimert(file_path) as sti:
+        return load_from_binary(str(sti))
+
+def _save_to_binary(familie_data: FamilieData, file_path: str) -> None:
+    """Lagre binært øyeblikksbilde (mmap_store importeres først ved bruk)."""
+    from mmap_store import save_to_binary
+    with _komprimert_mål(file_path) as sti:
+        save_to_binary(familie_data, str(sti))
+
+def _loader_for(file_path: str):
+    """Finn lastefunksjon basert på filendelse."""
+    laster = _LASTERE.get(_format_suffix(file_path))
+    if laster is None:
+        raise ValueError(t('invalid_file_format'))
+    return laster
+
+def _saver_for(file_path: str):
+    """Finn lagrefunksjon basert på filendelse."""
+    lagrer = _LAGRERE.get(_format_suffix(file_path))
+    if lagrer is None:
+        raise ValueError(t('invalid_file_format'))
+    return lagrer
 
 def _parse_yaml_data(data: Dict[str, Any]) -> FamilieData:
     """Parse YAML data til FamilieData objekt."""
@@ -260,9 +1474,11 @@ def _parse_yaml_data(data: Dict[str, Any]) -> FamilieData:
         ekteskap_obj = Ekteskap(**ekteskap_data)
         ekteskap.append(ekteskap_obj)
     
-    # Parse metadata
-    metadata = data.get('metadata', {})
-    
+    return _familie_data_fra(personer, ekteskap, data.get('metadata', {}))
+
+def _familie_data_fra(personer: List[Person], ekteskap: List[Ekteskap],
+                      metadata: Dict[str, Any]) -> FamilieData:
+    """Sett sammen FamilieData fra ferdige poster og metadata."""
     return FamilieData(
         personer=personer,
         ekteskap=ekteskap,
@@ -272,6 +1488,183 @@ def _parse_yaml_data(data: Dict[str, Any]) -> FamilieData:
         sist_endret=_parse_datetime(metadata.get('sist_endret'))
     )
 
+class _YamlBygger:
+    """Bygg Python-verdier direkte fra YAML-hendelser, én verdi om gangen."""
+    
+    # Merge-nøkkelen `<<` (tag:yaml.org,2002:merge) har ingen konstruktør
+    _MERGE = object()
+    
+    def __init__(self, parser):
+        self.parser = parser
+        self.resolver = yaml.resolver.Resolver()
+        self.konstruktør = yaml.constructor.SafeConstructor()
+        self.ankere: Dict[str, Any] = {}
+    
+    def verdi(self) -> Any:
+        """Les neste node fra parseren og returner den som Python-verdi."""
+        event = self.parser.get_event()
+        
+        if isinstance(event, yaml.AliasEvent):
+            return self.ankere[event.anchor]
+        
+        if isinstance(event, yaml.ScalarEvent):
+            tag = event.tag
+            if tag is None or tag == '!':
+                tag = self.resolver.resolve(yaml.ScalarNode, event.value, event.implicit)
+            if tag == 'tag:yaml.org,2002:merge':
+                return self._MERGE
+            node = yaml.ScalarNode(tag, event.value, style=event.style)
+            konstruer = self.konstruktør.yaml_constructors.get(
+                tag, yaml.constructor.SafeConstructor.construct_undefined
+            )
+            resultat = konstruer(self.konstruktør, node)
+        
+        elif isinstance(event, yaml.SequenceStartEvent):
+            resultat = []
+            if event.anchor:
+                self.ankere[event.anchor] = resultat
+            while not self.parser.check_event(yaml.SequenceEndEvent):
+                resultat.append(self.verdi())
+            self.parser.get_event()
+        
+        elif isinstance(event, yaml.MappingStartEvent):
+            resultat = {}
+            if event.anchor:
+                self.ankere[event.anchor] = resultat
+            while not self.parser.check_event(yaml.MappingEndEvent):
+                nøkkel = self.verdi()
+                verdi = self.verdi()
+                if nøkkel is self._MERGE:
+                    # Merge-nøkkel: eksplisitte nøkler vinner over sammenslåtte
+                    for kilde in (verdi if isinstance(verdi, list) else [verdi]):
+                        for k, v in kilde.items():
+                            resultat.setdefault(k, v)
+                else:
+                    resultat[nøkkel] = verdi
+            self.parser.get_event()
+        
+        else:
+            raise yaml.YAMLError(f"Uventet YAML-hendelse: {event}")
+        
+        if event.anchor:
+            self.ankere[event.anchor] = resultat
+        return resultat
+
+class _JsonStrøm:
+    """Les JSON-verdier én og én fra en fil som leses i biter."""
+    
+    _DECODER = json.JSONDecoder()
+    _WHITESPACE = ' \t\n\r'
+    
+    def __init__(self, f, chunk_size: int = 1 << 16):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.linjer_før = 0
+    
+    def _fyll(self) -> bool:
+        """Les neste bit av filen inn i bufferet. Returnerer False ved filslutt."""
+        data = self.f.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+        self.linjer_før += self.buf.count('\n', 0, self.pos)
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+    
+    def tegn(self) -> str:
+        """Hopp over mellomrom og returner neste tegn uten å forbruke det ('' ved slutt)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in self._WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fyll():
+                return ''
+    
+    def linje(self) -> int:
+        """Linjenummer (fra 1) for gjeldende posisjon."""
+        return self.linjer_før + self.buf.count('\n', 0, self.pos) + 1
+    
+    def forbruk(self, forventet: str) -> None:
+        """Forbruk ett bestemt skilletegn."""
+        funnet = self.tegn()
+        if funnet != forventet:
+            raise ValueError(f"{t('invalid_file_format')}: forventet '{forventet}', fant '{funnet}'")
+        self.pos += 1
+    
+    def verdi(self) -> Any:
+        """Dekod neste komplette JSON-verdi, og les mer av filen ved behov."""
+        self.tegn()
+        while True:
+            try:
+                verdi, slutt = self._DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fyll():
+                    raise
+                continue
+            # Et tall helt på slutten av bufferet kan fortsette i neste bit
+            if slutt == len(self.buf) and not self.eof and self._fyll():
+                continue
+            self.pos = slutt
+            return verdi
+
+def _migrering_for(metadata: Dict[str, Any]):
+    """
+    Migrering fra filens formatversjon til gjeldende, eller None.
+    
+    Lagrefunksjonene skriver versjonen før postene; en fil der postene
+    kommer før noen versjon, er skrevet før formatet ble versjonert.
+    """
+    from migrations import migrator_for
+    return migrator_for(metadata.get('versjon'))
+
+def _post_migrering(migrering, nøkkel: str) -> Optional[Callable[[dict], dict]]:
+    """Transformen for 'personer' eller 'ekteskap', eller None uten migrering."""
+    if not migrering:
+        return None
+    return migrering.person if nøkkel == 'personer' else migrering.ekteskap
+
+def _valider_post(modell, data: Any, rapport: Optional[Importrapport],
+                  fil: Path, linje: Optional[int] = None, rad: Optional[int] = None):
+    """Valider én post; med rapport registreres feil og None returneres."""
+    if rapport is None:
+        return modell.model_validate(data)
+    try:
+        return modell.model_validate(data)
+    except ValidationError as e:
+        post_id = data.get('id') if isinstance(data, dict) else None
+        rapport.add(fil, linje, rad, post_id, _valideringsmelding(e), data)
+        return None
+
+def _valider_bulk(adapter: TypeAdapter, poster: List[Dict[str, Any]],
+                  rapport: Optional[Importrapport], fil: Path,
+                  linjer: Optional[Iterable[Optional[int]]] = None) -> List[Any]:
+    """
+    Valider mange poster i én bulk-operasjon.
+    
+    Med rapport registreres hver ugyldig post med linje og rad (fra 1),
+    og de gyldige postene valideres på nytt og returneres.
+    """
+    if rapport is None:
+        return adapter.validate_python(poster)
+    try:
+        return adapter.validate_python(poster)
+    except ValidationError as e:
+        per_post: Dict[int, List[dict]] = {}
+        for feil in e.errors():
+            per_post.setdefault(feil['loc'][0], []).append(feil)
+    
+    linjer = list(linjer) if linjer is not None else None
+    for i in sorted(per_post):
+        post = poster[i]
+        rapport.add(fil, linjer[i] if linjer else None, i + 1, post.get('id'),
+                    _valideringsmelding(per_post[i]), post)
+    return adapter.validate_python([p for i, p in enumerate(poster) if i not in per_post])
+
 def _person_to_dict(person: Person) -> Dict[str, Any]:
     """Konverter Person til dictionary."""
     return {
@@ -308,7 +1701,7 @@ def _ekteskap_to_dict(ekteskap: Ekteskap) -> Dict[str, Any]:
 
 def _parse_date(date_str: Optional[str]) -> Optional[date]:
     """Parse dato-streng til date objekt."""
-    if not date_str or pd.isna(date_str):
+    if not date_str or _er_nan(date_str):
         return None
     
     try:
@@ -319,6 +1712,236 @@ def _parse_date(date_str: Optional[str]) -> Optional[date]:
         except ValueError:
             return None
 
+def _csv_name_parts(file_path: Path) -> Tuple[str, str]:
+    """Del 'navn.csv.gz' i ('navn', '.csv.gz') og 'navn.csv' i ('navn', '.csv')."""
+    navn = file_path.name
+    for endelse in ('.csv.gz', '.csv.bz2', '.csv.xz', '.csv'):
+        if navn.lower().endswith(endelse):
+            return navn[:-len(endelse)], navn[-len(endelse):]
+    return file_path.stem, file_path.suffix
+
+def _ekteskap_csv_path(file_path: Path) -> Path:
+    """Sti til ekteskapsfilen som hører til en person-CSV."""
+    stamme, endelse = _csv_name_parts(Path(file_path))
+    return Path(file_path).parent / f"{stamme}_ekteskap{endelse}"
+
+def _csv_del_sti(file_path: Path, nr: int) -> Path:
+    """Sti til del nr. `nr` av en CSV skrevet med chunk_size (navn-00000.csv, ...)."""
+    stamme, endelse = _csv_name_parts(file_path)
+    return file_path.parent / f"{stamme}-{nr:05d}{endelse}"
+
+def _csv_deler(file_path: Path) -> List[Path]:
+    """Filene en CSV består av: fila selv, ellers delene fra chunk_size i rekkefølge."""
+    if file_path.exists():
+        return [file_path]
+    deler = []
+    while _csv_del_sti(file_path, len(deler)).exists():
+        deler.append(_csv_del_sti(file_path, len(deler)))
+    return deler
+
+def _csv_basis(file_path: Path) -> Path:
+    """Person-CSV-en en gitt CSV hører til (fra en del eller en ekteskapsfil)."""
+    stamme, endelse = _csv_name_parts(file_path)
+    treff = re.fullmatch(r'(.+)-\d{5}', stamme)
+    if treff:
+        basis = file_path.parent / f"{treff.group(1)}{endelse}"
+        if not basis.exists() and _csv_deler(basis):
+            file_path, stamme = basis, treff.group(1)
+    if stamme.endswith('_ekteskap'):
+        personfil = file_path.parent / f"{stamme[:-len('_ekteskap')]}{endelse}"
+        if _csv_deler(personfil):
+            file_path = personfil
+    return file_path
+
+def _open_csv(file_path: Path, modus: str):
+    """Åpne CSV-fil som tekst, komprimert etter filendelsen."""
+    return _open_fil(file_path, modus, encoding='utf-8', newline='')
+
+def _open_fil(file_path: Union[str, Path], modus: str = 'r', **kwargs):
+    """
+    Åpne fil for strømmende lesing/skriving.
+    
+    Filer som slutter på .gz, .bz2 eller .xz går gjennom gzip/bz2/lzma,
+    så innholdet (de)komprimeres fortløpende og aldri ligger helt i minnet.
+    """
+    modul = _KOMPRESJON.get(Path(file_path).suffix.lower())
+    if modul is None:
+        return open(file_path, modus, **kwargs)
+    kwargs.pop('buffering', None)
+    if 'b' not in modus and 't' not in modus:
+        modus += 't'
+    return modul.open(file_path, modus, **kwargs)
+
+def _lest(f) -> int:
+    """Antall bytes lest fra disk (komprimert posisjon for komprimerte filer)."""
+    f = getattr(f, 'buffer', f)
+    rå = getattr(f, 'fileobj', None) or getattr(f, '_fp', None) or f
+    return rå.tell()
+
+def _format_suffix(file_path: Union[str, Path]) -> str:
+    """Formatets filendelse uten komprimering: 'familie.yaml.gz' gir '.yaml'."""
+    file_path = Path(file_path)
+    if file_path.suffix.lower() in _KOMPRESJON:
+        return Path(file_path.stem).suffix.lower()
+    return file_path.suffix.lower()
+
+def _med_kompresjon(file_path: Path, compress: Union[bool, str]) -> Path:
+    """Legg til .gz/.bz2/.xz i filnavnet hvis det ikke allerede er komprimert."""
+    if not compress or file_path.suffix.lower() in _KOMPRESJON:
+        return file_path
+    endelse = '.gz' if compress is True else '.' + str(compress).lstrip('.').lower()
+    if endelse not in _KOMPRESJON:
+        raise ValueError(f"Ukjent komprimering: {compress}")
+    return file_path.with_name(file_path.name + endelse)
+
+@contextmanager
+def _ukomprimert(file_path: Union[str, Path]):
+    """
+    Gi en ukomprimert sti for formater som trenger tilfeldig tilgang (SQLite, mmap).
+    
+    Komprimerte filer pakkes strømmende ut til en midlertidig fil.
+    """
+    file_path = Path(file_path)
+    if file_path.suffix.lower() not in _KOMPRESJON:
+        yield file_path
+        return
+    
+    fd, tmp = tempfile.mkstemp(suffix=_format_suffix(file_path))
+    try:
+        with os.fdopen(fd, 'wb') as ut, _open_fil(file_path, 'rb') as inn:
+            shutil.copyfileobj(inn, ut, 1 << 20)
+        yield Path(tmp)
+    finally:
+        os.unlink(tmp)
+
+@contextmanager
+def _komprimert_mål(file_path: Union[str, Path]):
+    """Gi en ukomprimert midlertidig sti som komprimeres til file_path etterpå."""
+    file_path = Path(file_path)
+    if file_path.suffix.lower() not in _KOMPRESJON:
+        yield file_path
+        return
+    
+    fd, tmp = tempfile.mkstemp(suffix=_format_suffix(file_path), dir=file_path.parent)
+    os.close(fd)
+    try:
+        yield Path(tmp)
+        with open(tmp, 'rb') as inn, _open_fil(file_path, 'wb') as ut:
+            shutil.copyfileobj(inn, ut, 1 << 20)
+    finally:
+        os.unlink(tmp)
+
+def _write_csv_rows(file_path: Path, kolonner: List[str], rader: Iterable[List[Any]],
+                    chunk_size: Optional[int] = None) -> None:
+    """
+    Skriv rader fortløpende, eventuelt fordelt på flere filer à chunk_size rader.
+    
+    Filer fra en tidligere lagring med annen oppdeling fjernes, så de ikke
+    blir lest sammen med de nye.
+    """
+    f = None
+    del_nr = 0
+    i_del = 0
+    try:
+        for rad in rader:
+            if f is None or (chunk_size and i_del >= chunk_size):
+                if f is not None:
+                    f.close()
+                sti = _csv_del_sti(file_path, del_nr) if chunk_size else file_path
+                f = _open_csv(sti, 'w')
+                writer = csv.writer(f, lineterminator='\n')
+                writer.writerow(kolonner)
+                del_nr += 1
+                i_del = 0
+            writer.writerow(rad)
+            i_del += 1
+        
+        if f is None:
+            sti = _csv_del_sti(file_path, 0) if chunk_size else file_path
+            f = _open_csv(sti, 'w')
+            csv.writer(f, lineterminator='\n').writerow(kolonner)
+            del_nr = 1
+    finally:
+        if f is not None:
+            f.close()
+    
+    if chunk_size:
+        file_path.unlink(missing_ok=True)
+    else:
+        del_nr = 0
+    while _csv_del_sti(file_path, del_nr).exists():
+        _csv_del_sti(file_path, del_nr).unlink()
+        del_nr += 1
+
+def _csv_verdi(verdi: Any) -> Any:
+    """Gjør en feltverdi om til CSV-celle."""
+    if verdi is None:
+        return ''
+    if isinstance(verdi, Enum):
+        return verdi.value
+    if isinstance(verdi, date):
+        return verdi.isoformat()
+    if isinstance(verdi, list):
+        return '|'.join(verdi)
+    return verdi
+
+def _person_csv_row(person: Person) -> List[Any]:
+    """Konverter Person til CSV-rad."""
+    return [_csv_verdi(getattr(person, kolonne)) for kolonne in _PERSON_CSV_KOLONNER]
+
+def _ekteskap_csv_row(ekteskap: Ekteskap) -> List[Any]:
+    """Konverter Ekteskap til CSV-rad."""
+    return [_csv_verdi(getattr(ekteskap, kolonne)) for kolonne in _EKTESKAP_CSV_KOLONNER]
+
+def _read_csv_columns(file_path: Path, kolonner: List[str]) -> 'pd.DataFrame':
+    """Les CSV som tekstkolonner der tomme celler er '' og manglende kolonner legges til."""
+    import pandas as pd
+    
+    df = pd.read_csv(file_path, encoding='utf-8', dtype=str, keep_default_na=False)
+    for kolonne in kolonner:
+        if kolonne not in df.columns:
+            df[kolonne] = ''
+    return df
+
+def _parse_date_column(series: 'pd.Series') -> List[Optional[date]]:
+    """Parse en kolonne med datoer (YYYY-MM-DD eller DD.MM.YYYY) samlet."""
+    iso = series.str.extract(r'^(\d{1,4})-(\d{1,2})-(\d{1,2})$')
+    norsk = series.str.extract(r'^(\d{1,2})\.(\d{1,2})\.(\d{1,4})$')
+    år = iso[0].fillna(norsk[2])
+    måned = iso[1].fillna(norsk[1])
+    dag = iso[2].fillna(norsk[0])
+    
+    resultat: List[Optional[date]] = [None] * len(series)
+    funnet = år.notna().to_numpy().nonzero()[0]
+    for i, y, m, d in zip(funnet,
+                          år.iloc[funnet].astype(int),
+                          måned.iloc[funnet].astype(int),
+                          dag.iloc[funnet].astype(int)):
+        try:
+            resultat[i] = date(y, m, d)
+        except ValueError:
+            pass
+    return resultat
+
+def _optional_column(series: 'pd.Series') -> List[Optional[str]]:
+    """Gjør tomme tekstceller om til None."""
+    return series.astype(object).mask(series == '', None).tolist()
+
+def _split_list_column(series: 'pd.Series') -> List[List[str]]:
+    """Del en kolonne med pipe-separerte lister samlet."""
+    renset = series.str.replace(r'\s*\|[\s|]*', '|', regex=True).str.strip(' \t|')
+    return [verdi.split('|') if verdi else [] for verdi in renset]
+
+def _columns_to_records(kolonner: Dict[str, Any], antall: int) -> List[Dict[str, Any]]:
+    """Gjør kolonner om til en liste med dicts for bulk-validering."""
+    navn = list(kolonner)
+    verdier = [list(kolonner[n]) for n in navn]
+    return [dict(zip(navn, rad)) for rad in zip(*verdier)] if antall else []
+
+def _er_nan(verdi: Any) -> bool:
+    """Sjekk om en verdi er NaN (tom celle fra pandas)."""
+    return isinstance(verdi, float) and math.isnan(verdi)
+
 def _parse_datetime(datetime_str: Optional[str]) -> Optional[datetime]:
     """Parse datetime-streng til datetime objekt."""
     if not datetime_str:
@@ -331,52 +1954,345 @@ def _parse_datetime(datetime_str: Optional[str]) -> Optional[datetime]:
 
 def _parse_list(list_str: Optional[str]) -> List[str]:
     """Parse pipe-separated liste."""
-    if not list_str or pd.isna(list_str):
+    if not list_str or _er_nan(list_str):
         return []
     
     return [item.strip() for item in str(list_str).split('|') if item.strip()]
 
-def _person_to_gedcom(person: Person) -> List[str]:
-    """Konverter Person til GEDCOM format."""
-    lines = [f"0 @{person.id}@ INDI"]
-    lines.append(f"1 NAME {person.fornavn} /{person.etternavn or ''}/")
+def _gedcom_tegnsett(f) -> str:
+    """Finn tegnsett fra BOM eller HEAD.CHAR, og spol tilbake til starten."""
+    start = f.read(65536)
+    f.seek(0)
+    if start.startswith((b'\xff\xfe', b'\xfe\xff')):
+        return 'utf-16'
+    if start.startswith(b'\xef\xbb\xbf'):
+        return 'utf-8-sig'
+    treff = re.search(rb'^\s*1\s+CHAR\s+(\S+)', start, re.MULTILINE)
+    if treff:
+        return _GEDCOM_TEGNSETT.get(treff.group(1).decode('ascii', 'replace').upper(), 'utf-8-sig')
+    return 'utf-8-sig'
+
+def _ansel_til_unicode(linje: str) -> str:
+    """Dekod ANSEL (lest som latin-1); kombinerende tegn står foran grunntegnet."""
+    if linje.isascii():
+        return linje
     
-    if person.kjønn == Gender.MALE:
-        lines.append("1 SEX M")
-    elif person.kjønn == Gender.FEMALE:
-        lines.append("1 SEX F")
+    resultat = []
+    kombinerende = []
+    for tegn in linje:
+        kode = ord(tegn)
+        if kode in _ANSEL_KOMBINERENDE:
+            kombinerende.append(_ANSEL_KOMBINERENDE[kode])
+            continue
+        resultat.append(_ANSEL_TEGN.get(kode, tegn))
+        if kombinerende:
+            resultat.extend(kombinerende)
+            kombinerende = []
+    return unicodedata.normalize('NFC', ''.join(resultat))
+
+def _parse_gedcom_date(verdi: str) -> Tuple[Optional[date], bool]:
+    """
+    Parse GEDCOM-dato eller datofrase.
     
-    if person.fødselsdato:
-        lines.append(f"1 BIRT")
-        lines.append(f"2 DATE {person.fødselsdato.strftime('%d %b %Y')}")
-        if person.fødested:
-            lines.append(f"2 PLAC {person.fødested}")
+    Returnerer (første mulige dato, eksakt). Kalendere som JULIAN
+    konverteres ikke; datoen tolkes som den står.
+    """
+    tekst = re.sub(r'\([^)]*\)|@#D[^@]*@', ' ', verdi.upper()).split()
+    eksakt = True
+    deler = []
+    for ord_ in tekst:
+        if ord_ in _GEDCOM_KALENDRE:
+            continue
+        if ord_ in _GEDCOM_KVALIFIKATORER:
+            eksakt = False
+            if ord_ in ('AND', 'TO') and deler:
+                break
+            continue
+        deler.append(ord_)
     
-    if person.dødsdato:
-        lines.append(f"1 DEAT")
-        lines.append(f"2 DATE {person.dødsdato.strftime('%d %b %Y')}")
-        if person.dødssted:
-            lines.append(f"2 PLAC {person.dødssted}")
+    treff = _GEDCOM_DATO.match(' '.join(deler))
+    if not treff or 'BC' in deler or 'B.C.' in deler:
+        return None, False
+    dag, måned, år = treff.groups()
+    if måned and måned not in _GEDCOM_MÅNEDER:
+        return None, False
+    if not dag or not måned:
+        eksakt = False
+    try:
+        return date(int(år), _GEDCOM_MÅNEDER.get(måned, 1), int(dag or 1)), eksakt
+    except ValueError:
+        return None, False
+
+def _gedcom_dato_felt(post: Dict[str, Any], felt: str, verdi: str) -> None:
+    """Sett datofelt, og ta vare på originalteksten når datoen er upresis."""
+    dato, eksakt = _parse_gedcom_date(verdi)
+    post.setdefault(felt, dato)
+    if not eksakt and verdi.strip():
+        post.setdefault('ekstra_data', {}).setdefault(f'{felt}_gedcom', verdi.strip())
+
+def _gedcom_indi_felt(post: Dict[str, Any], sti: Tuple[str, ...], verdi: str,
+                      lenker: List[Tuple[str, str, str]]) -> None:
+    """Legg én GEDCOM-linje til en INDI-post under bygging."""
+    if sti == ('NAME',):
+        if '_navn' not in post:
+            post['_navn'] = verdi
+    elif sti in (('NAME', 'GIVN'), ('NAME', 'SURN')):
+        post.setdefault('_' + sti[1].lower(), verdi)
+    elif sti == ('SEX',):
+        post['kjønn'] = {'M': Gender.MALE.value, 'F': Gender.FEMALE.value}.get(
+            verdi.strip().upper()[:1], Gender.OTHER.value
+        )
+    elif sti == ('BIRT', 'DATE'):
+        _gedcom_dato_felt(post, 'fødselsdato', verdi)
+    elif sti == ('BIRT', 'PLAC'):
+        post.setdefault('fødested', verdi.strip() or None)
+    elif sti == ('DEAT', 'DATE'):
+        _gedcom_dato_felt(post, 'dødsdato', verdi)
+    elif sti == ('DEAT', 'PLAC'):
+        post.setdefault('dødssted', verdi.strip() or None)
+    elif sti == ('NOTE',) and not verdi.startswith('@'):
+        post['notater'] = f"{post['notater']}\n{verdi}" if 'notater' in post else verdi
+    elif sti == ('OBJE', 'FILE'):
+        post.setdefault('bilde_sti', verdi.strip() or None)
+    elif sti in (('FAMC',), ('FAMS',)) and verdi.startswith('@'):
+        lenker.append((post['id'], sti[0], verdi.strip().strip('@')))
+
+def _gedcom_fam_felt(post: Dict[str, Any], sti: Tuple[str, ...], verdi: str) -> None:
+    """Legg én GEDCOM-linje til en FAM-post under bygging."""
+    if sti in (('HUSB',), ('WIFE',)) and verdi.startswith('@'):
+        post.setdefault(sti[0].lower(), verdi.strip().strip('@'))
+    elif sti == ('CHIL',) and verdi.startswith('@'):
+        barn_id = verdi.strip().strip('@')
+        if barn_id not in post['barn']:
+            post['barn'].append(barn_id)
+    elif sti == ('MARR', 'DATE'):
+        _gedcom_dato_felt(post, 'ekteskapsdato', verdi)
+    elif sti == ('MARR', 'PLAC'):
+        post.setdefault('ekteskapssted', verdi.strip() or None)
+    elif sti == ('MARR', 'TYPE'):
+        post.setdefault('ekteskapstype', verdi.strip() or 'ekteskap')
+    elif sti == ('DIV', 'DATE'):
+        _gedcom_dato_felt(post, 'skilsmisse_dato', verdi)
+    elif sti == ('NOTE',) and not verdi.startswith('@'):
+        post['notater'] = f"{post['notater']}\n{verdi}" if 'notater' in post else verdi
+
+def _gedcom_person(post: Dict[str, Any]) -> Dict[str, Any]:
+    """Gjør en ferdig INDI-post om til Person-data."""
+    navn = post.pop('_navn', '')
+    given, _, rest = navn.partition('/')
+    etternavn = post.pop('_surn', None) or rest.partition('/')[0].strip() or None
+    fornavn = (post.pop('_givn', None) or given).split()
     
-    if person.notater:
-        lines.append(f"1 NOTE {person.notater}")
+    fødselsdato, dødsdato = post.get('fødselsdato'), post.get('dødsdato')
+    if fødselsdato and dødsdato and dødsdato <= fødselsdato:
+        # Upresise datoer kan gi dødsdato før fødselsdato; behold kun originalteksten
+        post['ekstra_data'].setdefault('dødsdato_gedcom', dødsdato.isoformat())
+        post['dødsdato'] = None
     
-    return lines
+    return {
+        'id': post['id'],
+        'fornavn': fornavn[0] if fornavn else 'Ukjent',
+        'mellomnavn': ' '.join(fornavn[1:]) or None,
+        'etternavn': etternavn,
+        'kjønn': post.get('kjønn', Gender.OTHER.value),
+        'fødselsdato': fødselsdato,
+        'dødsdato': post.get('dødsdato'),
+        'fødested': post.get('fødested'),
+        'dødssted': post.get('dødssted'),
+        'bilde_sti': post.get('bilde_sti'),
+        'notater': post.get('notater'),
+        'foreldre': list(dict.fromkeys(post.get('foreldre', []))),
+        'barn': list(dict.fromkeys(post.get('barn', []))),
+        'partnere': list(dict.fromkeys(post.get('partnere', []))),
+        'ekstra_data': post['ekstra_data'],
+    }
+
+def _gedcom_ekteskap(familie: Dict[str, Any]) -> Dict[str, Any]:
+    """Gjør en ferdig FAM-post med to partnere om til Ekteskap-data."""
+    ekteskapsdato, skilsmisse_dato = familie.get('ekteskapsdato'), familie.get('skilsmisse_dato')
+    if ekteskapsdato and skilsmisse_dato and skilsmisse_dato <= ekteskapsdato:
+        skilsmisse_dato = None
+    return {
+        'id': familie['id'],
+        'partner1_id': familie['husb'],
+        'partner2_id': familie['wife'],
+        'ekteskapsdato': ekteskapsdato,
+        'skilsmisse_dato': skilsmisse_dato,
+        'ekteskapssted': familie.get('ekteskapssted'),
+        'ekteskapstype': familie.get('ekteskapstype', 'ekteskap'),
+        'notater': familie.get('notater'),
+    }
 
-def _ekteskap_to_gedcom(ekteskap: Ekteskap) -> List[str]:
-    """Konverter Ekteskap til GEDCOM format."""
-    lines = [f"0 @{ekteskap.id}@ FAM"]
-    lines.append(f"1 HUSB @{ekteskap.partner1_id}@")
-    lines.append(f"1 WIFE @{ekteskap.partner2_id}@")
+def _gedcom_xref(id_: str) -> str:
+    """Lag GEDCOM-peker (@...@) av en ID."""
+    return '@' + re.sub(r'[\s@]', '_', id_) + '@'
+
+def _gedcom_dato(verdi: date) -> str:
+    """Formater dato som GEDCOM-dato (uavhengig av locale), f.eks. 7 MAR 1850."""
+    return f"{verdi.day} {_GEDCOM_MÅNEDER_NAVN[verdi.month - 1]} {verdi.year}"
+
+def _gedcom_tekst(nivå: int, tag: str, tekst: str) -> Iterable[str]:
+    """Skriv tekst over flere linjer med CONT (linjeskift) og CONC (lange linjer)."""
+    for i, linje in enumerate(tekst.split('\n')):
+        deler = [linje[j:j + 200] for j in range(0, len(linje), 200)] or ['']
+        for k, del_ in enumerate(deler):
+            if i == 0 and k == 0:
+                yield f"{nivå} {tag} {del_}".rstrip(' ') + "\n"
+            else:
+                yield f"{nivå + 1} {'CONC' if k else 'CONT'} {del_}".rstrip(' ') + "\n"
+
+def _gedcom_hendelse(tag: str, dato: Optional[date], frase: Optional[str],
+                     sted: Optional[str]) -> Iterable[str]:
+    """Skriv hendelse (BIRT, DEAT, MARR, DIV) med dato og sted."""
+    if not (dato or frase or sted):
+        return
+    yield f"1 {tag}\n"
+    if frase:
+        yield f"2 DATE {frase}\n"
+    elif dato:
+        yield f"2 DATE {_gedcom_dato(dato)}\n"
+    if sted:
+        yield f"2 PLAC {sted}\n"
+
+def _gedcom_familier(familie_data: FamilieData) -> Tuple[
+        Dict[str, list], Dict[str, List[str]], Dict[str, List[str]]]:
+    """
+    Grupper personer i GEDCOM-familier.
+    
+    Returnerer (familier, famc, fams), der familier er
+    {familie_id: [husb, wife, barn, ekteskap]}, og famc/fams gir
+    familie-IDene der en person er barn/partner.
+    """
+    kjønn = {p.id: p.kjønn for p in familie_data.personer}
+    
+    # Foreldre til hvert barn, fra både barnets foreldre og foreldrenes barn
+    foreldre: Dict[str, Dict[str, None]] = {}
+    for person in familie_data.personer:
+        for forelder_id in person.foreldre:
+            if forelder_id in kjønn:
+                foreldre.setdefault(person.id, {})[forelder_id] = None
+        for barn_id in person.barn:
+            if barn_id in kjønn:
+                foreldre.setdefault(barn_id, {})[person.id] = None
+    
+    familier: Dict[str, list] = {}
+    par: Dict[frozenset, str] = {}
+    
+    def _rekkefølge(a: Optional[str], b: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        if kjønn.get(a) == Gender.FEMALE.value or kjønn.get(b) == Gender.MALE.value:
+            if kjønn.get(a) != Gender.MALE.value and kjønn.get(b) != Gender.FEMALE.value:
+                return b, a
+        return a, b
+    
+    for ekteskap in familie_data.ekteskap:
+        husb, wife = _rekkefølge(
+            ekteskap.partner1_id if ekteskap.partner1_id in kjønn else None,
+            ekteskap.partner2_id if ekteskap.partner2_id in kjønn else None
+        )
+        familier[ekteskap.id] = [husb, wife, [], ekteskap]
+        par.setdefault(frozenset(filter(None, (husb, wife))), ekteskap.id)
+    
+    brukte = set(familier) | set(kjønn)
+    nummer = 0
+    for barn_id, foreldre_ider in foreldre.items():
+        nøkkel = frozenset(list(foreldre_ider)[:2])
+        familie_id = par.get(nøkkel)
+        if familie_id is None:
+            nummer += 1
+            while f"F{nummer}" in brukte:
+                nummer += 1
+            familie_id = f"F{nummer}"
+            brukte.add(familie_id)
+            husb, wife = _rekkefølge(*(list(nøkkel) + [None, None])[:2])
+            familier[familie_id] = [husb, wife, [], None]
+            par[nøkkel] = familie_id
+        familier[familie_id][2].append(barn_id)
+    
+    famc: Dict[str, List[str]] = {}
+    fams: Dict[str, List[str]] = {}
+    for familie_id, (husb, wife, barn, _) in familier.items():
+        for partner_id in (husb, wife):
+            if partner_id:
+                fams.setdefault(partner_id, []).append(familie_id)
+        for barn_id in barn:
+            famc.setdefault(barn_id, []).append(familie_id)
+    
+    return familier, famc, fams
+
+def _person_to_gedcom(person: Person, famc: Iterable[str] = (),
+                      fams: Iterable[str] = ()) -> Iterable[str]:
+    """Konverter Person til GEDCOM-linjer."""
+    yield f"0 {_gedcom_xref(person.id)} INDI\n"
+    fornavn = ' '.join(filter(None, (person.fornavn, person.mellomnavn)))
+    yield f"1 NAME {fornavn} /{person.etternavn or ''}/\n"
+    yield f"2 GIVN {fornavn}\n"
+    if person.etternavn:
+        yield f"2 SURN {person.etternavn}\n"
     
-    if ekteskap.ekteskapsdato:
-        lines.append(f"1 MARR")
-        lines.append(f"2 DATE {ekteskap.ekteskapsdato.strftime('%d %b %Y')}")
-        if ekteskap.ekteskapssted:
-            lines.append(f"2 PLAC {ekteskap.ekteskapssted}")
+    yield {Gender.MALE.value: "1 SEX M\n", Gender.FEMALE.value: "1 SEX F\n"}.get(person.kjønn, "1 SEX U\n")
     
-    if ekteskap.skilsmisse_dato:
-        lines.append(f"1 DIV")
-        lines.append(f"2 DATE {ekteskap.skilsmisse_dato.strftime('%d %b %Y')}")
+    ekstra = person.ekstra_data or {}
+    yield from _gedcom_hendelse('BIRT', person.fødselsdato,
+                                ekstra.get('fødselsdato_gedcom'), person.fødested)
+    yield from _gedcom_hendelse('DEAT', person.dødsdato,
+                                ekstra.get('dødsdato_gedcom') if person.dødsdato else None,
+                                person.dødssted)
     
-    return lines
+    if person.bilde_sti:
+        yield "1 OBJE\n"
+        yield f"2 FILE {person.bilde_sti}\n"
+    if person.notater:
+        yield from _gedcom_tekst(1, 'NOTE', person.notater)
+    
+    for familie_id in famc:
+        yield f"1 FAMC {_gedcom_xref(familie_id)}\n"
+    for familie_id in fams:
+        yield f"1 FAMS {_gedcom_xref(familie_id)}\n"
+
+def _familie_to_gedcom(familie_id: str, husb: Optional[str], wife: Optional[str],
+                       barn: List[str], ekteskap: Optional[Ekteskap]) -> Iterable[str]:
+    """Konverter familie (ekteskap og/eller foreldrepar med barn) til GEDCOM-linjer."""
+    yield f"0 {_gedcom_xref(familie_id)} FAM\n"
+    if husb:
+        yield f"1 HUSB {_gedcom_xref(husb)}\n"
+    if wife:
+        yield f"1 WIFE {_gedcom_xref(wife)}\n"
+    for barn_id in barn:
+        yield f"1 CHIL {_gedcom_xref(barn_id)}\n"
+    
+    if ekteskap is not None:
+        yield from _gedcom_hendelse('MARR', ekteskap.ekteskapsdato, None, ekteskap.ekteskapssted)
+        if ekteskap.ekteskapstype != 'ekteskap':
+            if not ekteskap.ekteskapsdato and not ekteskap.ekteskapssted:
+                yield "1 MARR\n"
+            yield f"2 TYPE {ekteskap.ekteskapstype}\n"
+        yield from _gedcom_hendelse('DIV', ekteskap.skilsmisse_dato, None, None)
+        if ekteskap.notater:
+            yield from _gedcom_tekst(1, 'NOTE', ekteskap.notater)
+
+# Laste- og lagrefunksjoner etter filendelse
+_LASTERE = {
+    '.yaml': load_from_yaml,
+    '.yml': load_from_yaml,
+    '.json': load_from_json,
+    '.jsonl': load_from_jsonl,
+    '.csv': load_from_csv,
+    '.parquet': load_from_parquet,
+    '.sqlite': load_from_sqlite,
+    '.db': load_from_sqlite,
+    '.ged': load_from_gedcom,
+    '.slkt': _load_from_binary,
+}
+
+_LAGRERE = {
+    '.yaml': save_to_yaml,
+    '.yml': save_to_yaml,
+    '.json': save_to_json,
+    '.jsonl': save_to_jsonl,
+    '.csv': save_to_csv,
+    '.parquet': save_to_parquet,
+    '.sqlite': save_to_sqlite,
+    '.db': save_to_sqlite,
+    '.ged': export_to_gedcom,
+    '.slkt': _save_to_binary,
+}
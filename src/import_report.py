@@ -0,0 +1,117 @@
+"""
+Feilrapport for import i slektstre-prosjektet
+Samler alle ugyldige poster med fil-, linje- og radkontekst i stedet for å stoppe på første feil
+"""
+
+import json
+from pathlib import Path
+from typing import List, Any, Optional, NamedTuple, Union
+
+
+class Importfeil(NamedTuple):
+    """Én ugyldig post fra en import."""
+    fil: str
+    linje: Optional[int]
+    rad: Optional[int]
+    post_id: Optional[str]
+    melding: str
+    data: Any = None
+
+    def __str__(self) -> str:
+        plassering = [self.fil]
+        if self.linje is not None:
+            plassering.append(f"linje {self.linje}")
+        if self.rad is not None:
+            plassering.append(f"rad {self.rad}")
+        post = f" ({self.post_id})" if self.post_id else ""
+        return f"{', '.join(plassering)}{post}: {self.melding}"
+
+
+class Importrapport:
+    """
+    Samler importfeil mens lasterne fortsetter med de gyldige postene.
+
+    Gis en rapport til en laster (report=...), blir ugyldige poster lagt
+    her i stedet for at hele importen avbrytes. Med `reject_file` skrives
+    hver avvist post straks som én JSON-linje med feilkonteksten, slik at
+    postene kan rettes og importeres på nytt.
+
+    Eksempel:
+        with Importrapport(reject_file='avvist.jsonl') as rapport:
+            familie_data = load_from_csv('familie.csv', report=rapport)
+        print(rapport.summary())
+    """
+
+    def __init__(self, reject_file: Optional[Union[str, Path]] = None,
+                 max_errors: Optional[int] = None):
+        """
+        Initialiser rapport.
+
+        Args:
+            reject_file: JSON Lines-fil for avviste poster, eller None
+            max_errors: Avbryt importen med ValueError etter så mange feil, eller None
+        """
+        self.reject_file = Path(reject_file) if reject_file else None
+        self.max_errors = max_errors
+        self.errors: List[Importfeil] = []
+        self._fil = None
+
+    def add(self, fil: Union[str, Path], linje: Optional[int], rad: Optional[int],
+            post_id: Optional[str], melding: str, data: Any = None) -> None:
+        """Registrer én ugyldig post."""
+        feil = Importfeil(str(fil), linje, rad, post_id, melding, data)
+        self.errors.append(feil)
+
+        if self.reject_file is not None:
+            if self._fil is None:
+                self._fil = open(self.reject_file, 'a', encoding='utf-8')
+            self._fil.write(json.dumps(feil._asdict(), ensure_ascii=False, default=str) + '\n')
+            self._fil.flush()
+
+        if self.max_errors is not None and len(self.errors) >= self.max_errors:
+            self.close()
+            raise ValueError(f"For mange importfeil ({len(self.errors)}):\n{self.summary()}")
+
+    def extend(self, feil: List[Importfeil]) -> None:
+        """Legg til feil samlet et annet sted (f.eks. i en arbeidsprosess)."""
+        for f in feil:
+            self.add(*f)
+
+    def summary(self, max_lines: int = 20) -> str:
+        """Kort tekstlig oppsummering av feilene."""
+        if not self.errors:
+            return "Ingen importfeil"
+        linjer = [f"{len(self.errors)} ugyldige poster:"]
+        linjer += [f"  {feil}" for feil in self.errors[:max_lines]]
+        if len(self.errors) > max_lines:
+            linjer.append(f"  ... og {len(self.errors) - max_lines} til")
+        return '\n'.join(linjer)
+
+    def close(self) -> None:
+        """Lukk fila for avviste poster."""
+        if self._fil is not None:
+            self._fil.close()
+            self._fil = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        """Antall registrerte feil."""
+        return len(self.errors)
+
+
+def _valideringsmelding(feil: Union[Exception, List[dict]]) -> str:
+    """Lesbar melding fra en pydantic ValidationError (eller dens errors())."""
+    if isinstance(feil, Exception):
+        if not hasattr(feil, 'errors'):
+            return str(feil)
+        feil = feil.errors()
+    deler = []
+    for f in feil:
+        felt = '.'.join(str(d) for d in f.get('loc', ()) if not isinstance(d, int))
+        deler.append(f"{felt}: {f['msg']}" if felt else f['msg'])
+    return '; '.join(deler)
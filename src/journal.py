@@ -0,0 +1,211 @@
+"""
+Endringsjournal med angre/gjør om for slektstre-prosjektet
+Lagrer kun tilstanden til postene som faktisk endres (copy-on-write)
+"""
+
+from contextlib import contextmanager
+from typing import List, Dict, Optional, Any, Callable, Iterator
+
+from models import Person
+
+
+def _kopier_verdi(verdi: Any) -> Any:
+    """Kopier muterbare feltverdier (lister/dicts); uforanderlige verdier deles."""
+    if isinstance(verdi, list):
+        return list(verdi)
+    if isinstance(verdi, dict):
+        return dict(verdi)
+    return verdi
+
+
+def _tilstand(obj: Any) -> Dict[str, Any]:
+    """Ta et grunt øyeblikksbilde av feltene til en Person eller et Ekteskap."""
+    return {navn: _kopier_verdi(getattr(obj, navn)) for navn in type(obj).model_fields}
+
+
+class Operasjon:
+    """En angrebar operasjon: før- og etter-tilstand for de postene som ble berørt."""
+
+    def __init__(self, beskrivelse: str):
+        self.beskrivelse = beskrivelse
+        # id(obj) -> (obj, tilstand før, tilstand etter); None betyr "ikke i treet"
+        self.poster: Dict[int, List[Any]] = {}
+        self.sist_endret_før = None
+        self.sist_endret_etter = None
+
+    @property
+    def antall_poster(self) -> int:
+        """Antall personer/ekteskap som operasjonen endret."""
+        return len(self.poster)
+
+    def __repr__(self) -> str:
+        return f"Operasjon({self.beskrivelse!r}, poster={self.antall_poster})"
+
+
+class Endringsjournal:
+    """
+    Operasjonsjournal med ubegrenset angre/gjør om for et Slektstre.
+
+    Hver operasjon lagrer før- og etter-tilstand kun for personene og
+    ekteskapene den berører. Uendrede poster og uforanderlige feltverdier
+    (strenger, datoer) deles med det levende treet, slik at minnebruken
+    vokser med antall endrede poster og ikke med størrelsen på treet.
+    """
+
+    def __init__(self, slektstre, max_steg: Optional[int] = None):
+        """
+        Initialiser journal og koble den til et slektstre.
+
+        Args:
+            slektstre: Slektstre som skal journalføres
+            max_steg: Maks antall operasjoner å huske, eller None for ubegrenset
+        """
+        self.slektstre = slektstre
+        self.max_steg = max_steg
+        self._angre: List[Operasjon] = []
+        self._gjenta: List[Operasjon] = []
+        self._aktiv: Optional[Operasjon] = None
+        self._dybde = 0
+        self._lyttere: List[Callable[[Operasjon, str], None]] = []
+        slektstre.journal = self
+
+    @contextmanager
+    def operasjon(self, beskrivelse: str) -> Iterator[Operasjon]:
+        """
+        Grupper alle endringer i blokken til ett angresteg.
+
+        Operasjoner kan nøstes; kun den ytterste blir et eget steg. Hvis
+        blokken feiler, rulles endringene tilbake før unntaket sendes videre.
+        """
+        if self._aktiv is None:
+            self._aktiv = Operasjon(beskrivelse)
+            self._aktiv.sist_endret_før = self.slektstre.familie_data.sist_endret
+        operasjon = self._aktiv
+        self._dybde += 1
+        try:
+            yield operasjon
+        except BaseException:
+            self._dybde -= 1
+            if self._dybde == 0:
+                self._aktiv = None
+                self._gjenopprett(operasjon, indeks=1)
+            raise
+        self._dybde -= 1
+        if self._dybde == 0:
+            self._aktiv = None
+            self._fullfør(operasjon)
+
+    def registrer(self, obj: Any) -> None:
+        """
+        Registrer at en Person eller et Ekteskap er i ferd med å endres.
+
+        Må kalles før mutasjonen slik at før-tilstanden kan lagres.
+        Gjør ingenting utenfor en aktiv operasjon.
+        """
+        if self._aktiv is None or id(obj) in self._aktiv.poster:
+            return
+        før = _tilstand(obj) if self._i_treet(obj) else None
+        self._aktiv.poster[id(obj)] = [obj, før, None]
+
+    def undo(self) -> Optional[Operasjon]:
+        """Angre siste operasjon. Returnerer operasjonen, eller None."""
+        if not self._angre:
+            return None
+        operasjon = self._angre.pop()
+        self._gjenopprett(operasjon, indeks=1)
+        self._gjenta.append(operasjon)
+        self._varsle(operasjon, 'undo')
+        return operasjon
+
+    def redo(self) -> Optional[Operasjon]:
+        """Gjør om siste angrede operasjon. Returnerer operasjonen, eller None."""
+        if not self._gjenta:
+            return None
+        operasjon = self._gjenta.pop()
+        self._gjenopprett(operasjon, indeks=2)
+        self._angre.append(operasjon)
+        self._varsle(operasjon, 'redo')
+        return operasjon
+
+    @property
+    def can_undo(self) -> bool:
+        """Sjekk om det finnes operasjoner å angre."""
+        return bool(self._angre)
+
+    @property
+    def can_redo(self) -> bool:
+        """Sjekk om det finnes operasjoner å gjøre om."""
+        return bool(self._gjenta)
+
+    def history(self) -> List[str]:
+        """Returner beskrivelser av angrebare operasjoner, eldste først."""
+        return [op.beskrivelse for op in self._angre]
+
+    def clear(self) -> None:
+        """Tøm journalen."""
+        self._angre.clear()
+        self._gjenta.clear()
+
+    def add_listener(self, lytter: Callable[[Operasjon, str], None]) -> None:
+        """
+        Registrer en funksjon som kalles etter hver operasjon.
+
+        Lytteren får operasjonen og hendelsen ('do', 'undo' eller 'redo').
+        """
+        self._lyttere.append(lytter)
+
+    def _i_treet(self, obj: Any) -> bool:
+        """Sjekk om objektet (samme instans) finnes i familie-dataene."""
+        return any(o is obj for o in self._liste_for(obj))
+
+    def _liste_for(self, obj: Any) -> list:
+        """Hent listen i FamilieData som objektet hører hjemme i."""
+        familie_data = self.slektstre.familie_data
+        return familie_data.personer if isinstance(obj, Person) else familie_data.ekteskap
+
+    def _fullfør(self, operasjon: Operasjon) -> None:
+        """Lagre etter-tilstand og legg operasjonen på angrestakken."""
+        if not operasjon.poster:
+            return
+        for post in operasjon.poster.values():
+            obj = post[0]
+            post[2] = _tilstand(obj) if self._i_treet(obj) else None
+        operasjon.sist_endret_etter = self.slektstre.familie_data.sist_endret
+
+        self._angre.append(operasjon)
+        self._gjenta.clear()
+        if self.max_steg is not None and len(self._angre) > self.max_steg:
+            del self._angre[:len(self._angre) - self.max_steg]
+        self._varsle(operasjon, 'do')
+
+    def _gjenopprett(self, operasjon: Operasjon, indeks: int) -> None:
+        """Sett postene tilbake til før- (indeks=1) eller etter-tilstand (indeks=2)."""
+        poster = list(operasjon.poster.values())
+        if indeks == 1:
+            poster.reverse()
+
+        for post in poster:
+            obj, tilstand = post[0], post[indeks]
+            liste = self._liste_for(obj)
+            if tilstand is None:
+                for i in range(len(liste) - 1, -1, -1):
+                    if liste[i] is obj:
+                        del liste[i]
+                        break
+                self.slektstre.familie_data.mark_deleted(obj)
+                continue
+            for navn, verdi in tilstand.items():
+                setattr(obj, navn, _kopier_verdi(verdi))
+            if not any(o is obj for o in liste):
+                liste.append(obj)
+            self.slektstre.familie_data.mark_changed(obj)
+
+        sist_endret = operasjon.sist_endret_før if indeks == 1 else operasjon.sist_endret_etter
+        if sist_endret is not None:
+            self.slektstre.familie_data.sist_endret = sist_endret
+        self.slektstre._build_graph()
+
+    def _varsle(self, operasjon: Operasjon, hendelse: str) -> None:
+        """Kall alle registrerte lyttere."""
+        for lytter in self._lyttere:
+            lytter(operasjon, hendelse)
@@ -0,0 +1,307 @@
+"""
+Offset-indeks for JSON Lines-filer i slektstre-prosjektet
+Laster bare nabolaget rundt en fokusperson ved å hoppe rett til postene i fila
+"""
+
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+from models import FamilieData
+from tree import Slektstre
+from family_io import (
+    _PERSON_LISTE, _EKTESKAP_LISTE, _migrering_for, _format_suffix
+)
+from localization import t
+
+_INDEKS_VERSJON = 1
+
+_INDEKS_SKJEMA = """
+CREATE TABLE IF NOT EXISTS metadata (
+    nøkkel TEXT PRIMARY KEY,
+    verdi TEXT
+);
+CREATE TABLE IF NOT EXISTS poster (
+    type TEXT NOT NULL,
+    id TEXT NOT NULL,
+    posisjon INTEGER NOT NULL,
+    lengde INTEGER NOT NULL,
+    PRIMARY KEY (type, id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS foreldre_barn (
+    forelder_id TEXT NOT NULL,
+    barn_id TEXT NOT NULL,
+    PRIMARY KEY (forelder_id, barn_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_foreldre_barn_barn ON foreldre_barn (barn_id);
+CREATE TABLE IF NOT EXISTS partnere (
+    person_id TEXT NOT NULL,
+    partner_id TEXT NOT NULL,
+    ekteskap_id TEXT NOT NULL,
+    PRIMARY KEY (person_id, partner_id, ekteskap_id)
+) WITHOUT ROWID;
+"""
+
+
+def index_path(file_path: Union[str, Path]) -> Path:
+    """Returner stien til indeksen som hører til en JSONL-fil."""
+    file_path = Path(file_path)
+    return file_path.with_name(file_path.name + '.idx')
+
+
+class _Indeksskriver:
+    """Samler posisjoner og kanter mens en JSONL-fil skrives eller leses."""
+
+    def __init__(self, file_path: Path):
+        self.file_path = file_path
+        self.poster: List[Tuple[str, str, int, int]] = []
+        self.foreldre_barn: List[Tuple[str, str]] = []
+        self.partnere: List[Tuple[str, str, str]] = []
+
+    def metadata(self, posisjon: int, lengde: int) -> None:
+        self.poster.append(('metadata', '', posisjon, lengde))
+
+    def person(self, person: Dict[str, Any], posisjon: int, lengde: int) -> None:
+        person_id = person['id']
+        self.poster.append(('person', person_id, posisjon, lengde))
+        self.foreldre_barn.extend((f, person_id) for f in person.get('foreldre') or ())
+        self.foreldre_barn.extend((person_id, b) for b in person.get('barn') or ())
+        for partner_id in person.get('partnere') or ():
+            self.partnere.append((person_id, partner_id, ''))
+            self.partnere.append((partner_id, person_id, ''))
+
+    def ekteskap(self, ekteskap: Dict[str, Any], posisjon: int, lengde: int) -> None:
+        ekteskap_id = ekteskap['id']
+        self.poster.append(('ekteskap', ekteskap_id, posisjon, lengde))
+        p1, p2 = ekteskap['partner1_id'], ekteskap['partner2_id']
+        self.partnere.append((p1, p2, ekteskap_id))
+        self.partnere.append((p2, p1, ekteskap_id))
+
+    def skriv(self) -> Path:
+        """Skriv indeksen ved siden av JSONL-fila (erstatter en gammel)."""
+        sti = index_path(self.file_path)
+        tmp = sti.with_name(f".tmp.{sti.name}")
+        tmp.unlink(missing_ok=True)
+        stat = self.file_path.stat()
+        conn = sqlite3.connect(str(tmp))
+        try:
+            with conn:
+                conn.executescript(_INDEKS_SKJEMA)
+                conn.executemany("INSERT OR REPLACE INTO poster VALUES (?, ?, ?, ?)", self.poster)
+                conn.executemany("INSERT OR IGNORE INTO foreldre_barn VALUES (?, ?)", self.foreldre_barn)
+                conn.executemany("INSERT OR IGNORE INTO partnere VALUES (?, ?, ?)", self.partnere)
+                conn.executemany("INSERT INTO metadata VALUES (?, ?)", [
+                    ('versjon', json.dumps(_INDEKS_VERSJON)),
+                    ('størrelse', json.dumps(stat.st_size)),
+                    ('mtime_ns', json.dumps(stat.st_mtime_ns)),
+                ])
+        finally:
+            conn.close()
+        os.replace(tmp, sti)
+        return sti
+
+
+def build_jsonl_index(file_path: Union[str, Path]) -> Path:
+    """
+    Bygg offset- og naboindeks for en JSONL-fil laget av save_to_jsonl.
+
+    Indeksen (`<fil>.idx`, en SQLite-fil) har byte-posisjon og lengde for
+    hver post, samt forelder-barn- og partnerkanter. Fila leses én gang.
+    save_to_jsonl(..., index=True) bygger den samtidig som fila skrives.
+
+    Args:
+        file_path: Sti til ukomprimert JSONL-fil
+
+    Returns:
+        Sti til indeksen
+    """
+    file_path = Path(file_path)
+    if not file_path.exists():
+        raise FileNotFoundError(t('file_not_found'))
+    if file_path.suffix != '.jsonl':
+        raise ValueError("Offset-indeks krever en ukomprimert .jsonl-fil")
+
+    skriver = _Indeksskriver(file_path)
+    posisjon = 0
+    with open(file_path, 'rb') as f:
+        for linje in f:
+            lengde = len(linje)
+            if linje.strip():
+                post = json.loads(linje)
+                if 'person' in post:
+                    skriver.person(post['person'], posisjon, lengde)
+                elif 'ekteskap' in post:
+                    skriver.ekteskap(post['ekteskap'], posisjon, lengde)
+                elif 'metadata' in post:
+                    skriver.metadata(posisjon, lengde)
+            posisjon += lengde
+    return skriver.skriv()
+
+
+class JsonlIndeks:
+    """
+    Oppslag i en JSONL-fil via offset-indeksen, uten å lese hele fila.
+
+    Nabolagsspørringer går mot kantene i indeksen (rekursive CTE-er), og
+    bare de valgte postene leses fra JSONL-fila med seek. Tiden avhenger
+    av størrelsen på nabolaget, ikke av hvor mange personer fila har.
+    """
+
+    def __init__(self, file_path: Union[str, Path]):
+        """
+        Åpne indeksen til en JSONL-fil, og bygg den på nytt hvis den mangler
+        eller fila er endret siden indeksen ble skrevet.
+
+        Args:
+            file_path: Sti til ukomprimert JSONL-fil
+        """
+        self.file_path = Path(file_path)
+        if not self.file_path.exists():
+            raise FileNotFoundError(t('file_not_found'))
+        if not self._er_gyldig():
+            build_jsonl_index(self.file_path)
+        self._conn = sqlite3.connect(str(index_path(self.file_path)))
+        self._conn.execute("CREATE TEMP TABLE valgt (id TEXT PRIMARY KEY) WITHOUT ROWID")
+
+    def close(self) -> None:
+        """Lukk indeksen."""
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def neighborhood_ids(self, person_id: str, generations_up: int = 2,
+                         generations_down: int = 2,
+                         include_spouses: bool = True) -> List[str]:
+        """
+        Finn ID-ene i nabolaget til en person.
+
+        Nabolaget er personen, forfedre opptil `generations_up` ledd,
+        etterkommere ned `generations_down` ledd og (valgfritt) partnerne
+        til alle disse.
+        """
+        ider = [person_id]
+        for fra, til, grense in (('forelder_id', 'barn_id', generations_up),
+                                 ('barn_id', 'forelder_id', generations_down)):
+            if grense <= 0:
+                continue
+            ider.extend(r[0] for r in self._conn.execute(f"""
+                WITH RECURSIVE slekt(id, gen) AS (
+                    SELECT {fra}, 1 FROM foreldre_barn WHERE {til} = ?
+                    UNION
+                    SELECT fb.{fra}, slekt.gen + 1
+                    FROM foreldre_barn fb JOIN slekt ON fb.{til} = slekt.id
+                    WHERE slekt.gen < ?
+                )
+                SELECT id FROM slekt GROUP BY id ORDER BY MIN(gen)
+            """, (person_id, grense)))
+        ider = list(dict.fromkeys(ider))
+
+        if include_spouses:
+            self._velg(ider)
+            ider.extend(r[0] for r in self._conn.execute(
+                "SELECT DISTINCT partner_id FROM partnere JOIN valgt ON person_id = valgt.id"
+            ))
+            ider = list(dict.fromkeys(ider))
+        return ider
+
+    def load_records(self, ider: Iterable[str]) -> FamilieData:
+        """Les personene (og ekteskapene mellom dem) med seek i JSONL-fila."""
+        ider = list(dict.fromkeys(ider))
+        self._velg(ider)
+        person_pos = self._conn.execute(
+            "SELECT posisjon, lengde FROM poster JOIN valgt USING (id) "
+            "WHERE type = 'person' ORDER BY posisjon"
+        ).fetchall()
+        ekteskap_pos = self._conn.execute("""
+            SELECT posisjon, lengde FROM poster WHERE type = 'ekteskap' AND id IN (
+                SELECT p.ekteskap_id FROM partnere p
+                JOIN valgt a ON p.person_id = a.id
+                JOIN valgt b ON p.partner_id = b.id
+                WHERE p.ekteskap_id != ''
+            ) ORDER BY posisjon
+        """).fetchall()
+        metadata_pos = self._conn.execute(
+            "SELECT posisjon, lengde FROM poster WHERE type = 'metadata'"
+        ).fetchone()
+
+        with open(self.file_path, 'rb') as f:
+            metadata = self._les(f, *metadata_pos)['metadata'] if metadata_pos else {}
+            personer = [self._les(f, *pos)['person'] for pos in person_pos]
+            ekteskap = [self._les(f, *pos)['ekteskap'] for pos in ekteskap_pos]
+
+        migrering = _migrering_for(metadata)
+        if migrering:
+            personer = [migrering.person(p) for p in personer]
+            ekteskap = [migrering.ekteskap(e) for e in ekteskap]
+            metadata = migrering.metadata(metadata)
+        return FamilieData(
+            personer=_PERSON_LISTE.validate_python(personer),
+            ekteskap=_EKTESKAP_LISTE.validate_python(ekteskap),
+            **metadata
+        )
+
+    def _velg(self, ider: List[str]) -> None:
+        """Fyll den midlertidige tabellen med ID-ene det skal slås opp på."""
+        self._conn.execute("DELETE FROM valgt")
+        self._conn.executemany("INSERT OR IGNORE INTO valgt VALUES (?)", ((i,) for i in ider))
+
+    @staticmethod
+    def _les(f, posisjon: int, lengde: int) -> Dict[str, Any]:
+        f.seek(posisjon)
+        return json.loads(f.read(lengde))
+
+    def _er_gyldig(self) -> bool:
+        """Sjekk at indeksen finnes og hører til fila slik den er nå."""
+        sti = index_path(self.file_path)
+        if not sti.exists():
+            return False
+        try:
+            conn = sqlite3.connect(str(sti))
+            try:
+                meta = {k: json.loads(v) for k, v in conn.execute("SELECT nøkkel, verdi FROM metadata")}
+            finally:
+                conn.close()
+        except sqlite3.DatabaseError:
+            return False
+        stat = self.file_path.stat()
+        return (meta.get('versjon') == _INDEKS_VERSJON
+                and meta.get('størrelse') == stat.st_size
+                and meta.get('mtime_ns') == stat.st_mtime_ns)
+
+
+def load_neighborhood(file_path: Union[str, Path], person_id: str,
+                      generations_up: int = 2, generations_down: int = 2,
+                      include_spouses: bool = True) -> Slektstre:
+    """
+    Last bare nabolaget rundt en fokusperson fra en stor JSONL-fil.
+
+    Bruker offset-indeksen (bygges ved første kall, eller når fila er
+    endret) og leser kun de aktuelle linjene. Relasjoner til personer
+    utenfor nabolaget beholdes i postene, men har ingen node i grafen.
+    Endringsfiler fra save(..., delta=True) spilles ikke av.
+
+    Args:
+        file_path: Sti til ukomprimert JSONL-fil
+        person_id: ID til fokuspersonen
+        generations_up: Antall generasjoner forfedre
+        generations_down: Antall generasjoner etterkommere
+        include_spouses: Ta med partnerne til alle personene i nabolaget
+
+    Returns:
+        Slektstre med nabolaget
+    """
+    if _format_suffix(file_path) != '.jsonl':
+        raise ValueError(t('invalid_file_format'))
+    with JsonlIndeks(file_path) as indeks:
+        ider = indeks.neighborhood_ids(person_id, generations_up, generations_down,
+                                       include_spouses)
+        familie_data = indeks.load_records(ider)
+    if not any(p.id == person_id for p in familie_data.personer):
+        raise ValueError(f"Person med ID {person_id} ikke funnet")
+    return Slektstre(familie_data)
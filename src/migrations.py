@@ -0,0 +1,268 @@
+"""
+Versjonerte filformater for slektstre-prosjektet
+Oppgraderer eldre filer post for post mens de lastes, og hele kataloger i parallell
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Versjonen lagrefunksjonene skriver (FamilieData.versjon)
+SCHEMA_VERSION = "1.0"
+
+# Filer uten versjon er skrevet før formatet ble versjonert
+_UVERSJONERT = "1.0"
+
+Posttransform = Callable[[dict], dict]
+
+
+class Migrasjon(NamedTuple):
+    """Ett steg fra én formatversjon til den neste."""
+    fra: str
+    til: str
+    person: Optional[Posttransform] = None
+    ekteskap: Optional[Posttransform] = None
+    metadata: Optional[Posttransform] = None
+
+
+# Fra-versjon -> migrasjon
+_MIGRASJONER: Dict[str, Migrasjon] = {}
+
+
+def register_migration(fra: str, til: str,
+                       person: Optional[Posttransform] = None,
+                       ekteskap: Optional[Posttransform] = None,
+                       metadata: Optional[Posttransform] = None) -> None:
+    """
+    Registrer en migrasjon mellom to formatversjoner.
+
+    Transformene får én rå post (dict slik den står i fila) og returnerer
+    posten i det nye formatet. De kalles mens fila leses, før validering,
+    så migrering koster én funksjonskall per post og ingen ekstra passering.
+    Øk SCHEMA_VERSION til `til` i samme endring.
+
+    Eksempel:
+        def _v1_1_person(post):
+            post.setdefault('kallenavn', None)
+            return post
+
+        register_migration('1.0', '1.1', person=_v1_1_person)
+    """
+    if fra in _MIGRASJONER:
+        raise ValueError(f"Migrasjon fra versjon {fra} er allerede registrert")
+    _MIGRASJONER[fra] = Migrasjon(fra, til, person, ekteskap, metadata)
+
+
+class Migrering:
+    """Sammensatt kjede av migrasjoner fra en filversjon til SCHEMA_VERSION."""
+
+    def __init__(self, steg: List[Migrasjon]):
+        self.steg = steg
+        self._person = [m.person for m in steg if m.person]
+        self._ekteskap = [m.ekteskap for m in steg if m.ekteskap]
+        self._metadata = [m.metadata for m in steg if m.metadata]
+
+    @property
+    def fra(self) -> str:
+        return self.steg[0].fra
+
+    def person(self, post: dict) -> dict:
+        """Migrer én rå personpost."""
+        for transform in self._person:
+            post = transform(post)
+        return post
+
+    def ekteskap(self, post: dict) -> dict:
+        """Migrer én rå ekteskapspost."""
+        for transform in self._ekteskap:
+            post = transform(post)
+        return post
+
+    def metadata(self, metadata: dict) -> dict:
+        """Migrer metadata og sett versjon til SCHEMA_VERSION."""
+        for transform in self._metadata:
+            metadata = transform(metadata)
+        return {**metadata, 'versjon': SCHEMA_VERSION}
+
+
+def migrator_for(versjon: Optional[str]) -> Optional[Migrering]:
+    """
+    Finn migreringen fra en filversjon til SCHEMA_VERSION.
+
+    Returnerer None når fila allerede har gjeldende versjon.
+
+    Raises:
+        ValueError: Hvis fila er nyere enn denne koden, eller ingen kjede finnes
+    """
+    versjon = str(versjon) if versjon is not None else _UVERSJONERT
+    if versjon == SCHEMA_VERSION:
+        return None
+    if _versjonsnøkkel(versjon) > _versjonsnøkkel(SCHEMA_VERSION):
+        raise ValueError(
+            f"Fila har formatversjon {versjon}, men denne versjonen av slektstre "
+            f"støtter bare opp til {SCHEMA_VERSION}"
+        )
+
+    steg = []
+    while versjon != SCHEMA_VERSION:
+        migrasjon = _MIGRASJONER.get(versjon)
+        if migrasjon is None:
+            raise ValueError(f"Ingen migrasjon fra formatversjon {versjon} til {SCHEMA_VERSION}")
+        steg.append(migrasjon)
+        versjon = migrasjon.til
+    return Migrering(steg)
+
+
+def detect_version(file_path: str) -> str:
+    """
+    Finn formatversjonen til en fil uten å laste postene.
+
+    Leser metadata-tabellen (SQLite), skjemaet (Parquet) eller starten av
+    fila (YAML/JSON/JSONL, og slutten av ukomprimert JSON). Filer uten
+    versjon regnes som uversjonerte (1.0). CSV og GEDCOM har ingen
+    metadata og leses alltid med gjeldende kolonner.
+    """
+    from family_io import detect_format, _open_fil, _import_pyarrow, _ukomprimert
+
+    file_path = Path(file_path)
+    format_ = detect_format(str(file_path))
+
+    if format_ in ('.sqlite', '.db'):
+        with _ukomprimert(file_path) as sti:
+            conn = sqlite3.connect(str(sti))
+            try:
+                rad = conn.execute("SELECT verdi FROM metadata WHERE nøkkel = 'versjon'").fetchone()
+            except sqlite3.DatabaseError:
+                rad = None
+            finally:
+                conn.close()
+        return str(json.loads(rad[0])) if rad else _UVERSJONERT
+
+    if format_ == '.parquet':
+        _, pq = _import_pyarrow()
+        skjema_metadata = pq.read_schema(file_path / 'personer.parquet').metadata or {}
+        return str(json.loads(skjema_metadata.get(b'slektstre', b'{}')).get('versjon', _UVERSJONERT))
+
+    if format_ not in ('.yaml', '.yml', '.json', '.jsonl'):
+        return SCHEMA_VERSION
+
+    with _open_fil(file_path, 'rb') as f:
+        start = f.read(1 << 16)
+    versjon = _finn_versjon(start.decode('utf-8', 'replace'))
+    if versjon is None and format_ == '.json' and file_path.suffix == '.json':
+        # save_to_json skrev tidligere metadata til slutt
+        with open(file_path, 'rb') as f:
+            f.seek(max(0, file_path.stat().st_size - (1 << 16)))
+            versjon = _finn_versjon(f.read().decode('utf-8', 'replace'))
+    return versjon or _UVERSJONERT
+
+
+def migrate(paths: Iterable[str], workers: Optional[int] = None,
+            dry_run: bool = False) -> Dict[str, Tuple[str, str]]:
+    """
+    Oppgrader filer og hele kataloger til SCHEMA_VERSION, i parallell.
+
+    Kataloger gjennomsøkes rekursivt etter støttede filer. Filer som
+    allerede har gjeldende versjon hoppes over uten å lastes. Hver fil
+    lastes med migreringene (i en egen prosess) og skrives til en
+    midlertidig fil som så erstatter originalen, så en avbrutt migrering
+    aldri etterlater en halvskrevet fil.
+
+    Args:
+        paths: Filer og/eller kataloger
+        workers: Antall prosesser (standard: antall CPU-er)
+        dry_run: Bare finn filene som trenger migrering
+
+    Returns:
+        Dict fra sti til (gammel versjon, ny versjon) for hver migrerte fil
+    """
+    kandidater = []
+    for sti in _finn_filer(paths):
+        versjon = detect_version(str(sti))
+        if migrator_for(versjon) is not None:
+            kandidater.append((str(sti), versjon))
+
+    if dry_run or not kandidater:
+        return {sti: (versjon, SCHEMA_VERSION) for sti, versjon in kandidater}
+
+    stier = [sti for sti, _ in kandidater]
+    if workers == 1 or len(stier) == 1:
+        list(map(_migrer_fil, stier))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_migrer_fil, stier))
+    return {sti: (versjon, SCHEMA_VERSION) for sti, versjon in kandidater}
+
+
+def _migrer_fil(file_path: str) -> None:
+    """Last én fil med migrering og erstatt den atomisk (kjøres i arbeidsprosess)."""
+    from family_io import (_loader_for, _saver_for, _format_suffix,
+                           _ekteskap_csv_path)
+
+    sti = Path(file_path)
+    familie_data = _loader_for(file_path)(file_path)
+    tmp_sti = sti.parent / f".tmp.{sti.name}"
+    _saver_for(file_path)(familie_data, str(tmp_sti))
+    if _format_suffix(sti) == '.csv' and _ekteskap_csv_path(tmp_sti).exists():
+        os.replace(_ekteskap_csv_path(tmp_sti), _ekteskap_csv_path(sti))
+    if tmp_sti.is_dir():
+        # Parquet-mapper kan ikke erstattes atomisk; bytt tabell for tabell
+        for tabell in tmp_sti.iterdir():
+            os.replace(tabell, sti / tabell.name)
+        tmp_sti.rmdir()
+    else:
+        os.replace(tmp_sti, sti)
+
+
+def _finn_filer(paths: Iterable[str]) -> List[Path]:
+    """Utvid kataloger til støttede, versjonerte filer."""
+    from family_io import _format_suffix
+
+    versjonerte = ('.yaml', '.yml', '.json', '.jsonl', '.sqlite', '.db', '.parquet')
+    filer = []
+    for sti in map(Path, paths):
+        if sti.is_dir() and not (sti / 'personer.parquet').exists():
+            kandidater = sorted(p for p in sti.rglob('*')
+                                if p.is_file() or (p / 'personer.parquet').exists())
+        else:
+            kandidater = [sti]
+        for kandidat in kandidater:
+            if kandidat.parent.suffix == '.parquet' or kandidat.name.endswith('.endringer.jsonl'):
+                continue
+            if _format_suffix(kandidat) in versjonerte:
+                filer.append(kandidat)
+    return filer
+
+
+def _finn_versjon(tekst: str) -> Optional[str]:
+    """Finn første `versjon`-nøkkel i YAML- eller JSON-tekst."""
+    treff = re.search(r'''["']?versjon["']?\s*:\s*["']?([0-9][0-9.]*)''', tekst)
+    return treff.group(1) if treff else None
+
+
+def _versjonsnøkkel(versjon: str) -> Tuple[int, ...]:
+    """Sammenlignbar nøkkel for en versjon som '1.10'."""
+    try:
+        return tuple(int(del_) for del_ in versjon.split('.'))
+    except ValueError:
+        raise ValueError(f"Ugyldig formatversjon: {versjon!r}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description=f"Oppgrader slektstre-filer til formatversjon {SCHEMA_VERSION}"
+    )
+    parser.add_argument('paths', nargs='+', help="Filer og/eller kataloger")
+    parser.add_argument('--workers', type=int, default=None, help="Antall prosesser")
+    parser.add_argument('--dry-run', action='store_true', help="Vis bare hva som ville blitt migrert")
+    args = parser.parse_args()
+
+    resultat = migrate(args.paths, workers=args.workers, dry_run=args.dry_run)
+    for sti, (fra, til) in resultat.items():
+        print(f"{sti}: {fra} -> {til}")
+    print(f"{len(resultat)} filer {'trenger migrering' if args.dry_run else 'migrert'}")
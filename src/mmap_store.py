@@ -0,0 +1,390 @@
+"""
+Binært øyeblikksbilde med minnekartlegging (mmap) for slektstre-prosjektet
+Filen åpnes uten parsing, og mange prosesser kan dele de samme sidene
+"""
+
+import json
+import mmap
+import struct
+from array import array
+from datetime import date
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+import networkx as nx
+
+from models import Person, Ekteskap, FamilieData, Gender
+from tree import Slektstre
+from localization import t
+
+# Filformat:
+#   Header:  MAGIC, versjon (u32), antall personer (u32), antall ekteskap (u32), antall seksjoner (u32)
+#   Seksjonstabell: (navn 24 byte, offset u64, lengde u64) per seksjon
+#   Seksjoner: 8-byte-justerte rådata (faste arrays, strengtabeller, CSR-naboskap)
+_MAGIC = b'SLKTSNAP'
+_VERSJON = 1
+_HEADER = struct.Struct('<8sIIII')
+_SEKSJON = struct.Struct('<24sQQ')
+
+# Kjønn som én byte per person
+_KJØNN_KODER = {Gender.MALE.value: 0, Gender.FEMALE.value: 1, Gender.OTHER.value: 2}
+_KJØNN_VERDIER = [Gender.MALE.value, Gender.FEMALE.value, Gender.OTHER.value]
+
+_PERSON_TEKSTFELTER = ['id', 'fornavn', 'mellomnavn', 'etternavn',
+                       'fødested', 'dødssted', 'bilde_sti', 'notater']
+_EKTESKAP_TEKSTFELTER = ['id', 'partner1_id', 'partner2_id',
+                         'ekteskapssted', 'ekteskapstype', 'notater']
+_RELASJONER = ['foreldre', 'barn', 'partnere']
+
+
+def _seksjonsnavn(navn: str) -> bytes:
+    """Seksjonsnavn som ASCII (æøå byttes ut), maks 24 byte."""
+    ascii_navn = navn.replace('ø', 'o').replace('æ', 'ae').replace('å', 'a').encode('ascii')
+    if len(ascii_navn) > 24:
+        raise ValueError(f"For langt seksjonsnavn: {navn}")
+    return ascii_navn
+
+
+def _dato_til_int(verdi: Optional[date]) -> int:
+    """Dato som ordinal (0 betyr ingen dato)."""
+    return verdi.toordinal() if verdi else 0
+
+
+def _strengtabell(verdier: List[Optional[str]]) -> Tuple[bytes, bytes]:
+    """Bygg (offsets, data) for en strengtabell; None lagres som tom streng."""
+    offsets = array('Q', [0])
+    data = bytearray()
+    for verdi in verdier:
+        if verdi:
+            data += verdi.encode('utf-8')
+        offsets.append(len(data))
+    return offsets.tobytes(), bytes(data)
+
+
+def _csr(lister: List[List[str]], indeks: Dict[str, int]) -> Tuple[bytes, bytes]:
+    """Bygg CSR-naboskap (indptr, indices); ukjente ID-er utelates."""
+    indptr = array('I', [0])
+    indices = array('I')
+    for liste in lister:
+        indices.extend(indeks[i] for i in liste if i in indeks)
+        indptr.append(len(indices))
+    return indptr.tobytes(), indices.tobytes()
+
+
+def save_to_binary(familie_data: FamilieData, file_path: str) -> None:
+    """
+    Lagre familie-data som binært øyeblikksbilde for MmapSlektstre.
+
+    Datoer og kjønn lagres som faste arrays, tekst i offset-indekserte
+    strengtabeller, og foreldre/barn/partnere som CSR-naboskap med
+    personindekser. En sortert ID-indeks gir binærsøk uten å bygge dict.
+
+    Args:
+        familie_data: FamilieData objekt
+        file_path: Sti til binærfil
+    """
+    personer = familie_data.personer
+    ekteskap = familie_data.ekteskap
+    indeks = {p.id: i for i, p in enumerate(personer)}
+    seksjoner: List[Tuple[str, bytes]] = []
+
+    metadata = familie_data.model_dump(mode='json', exclude={'personer', 'ekteskap'})
+    seksjoner.append(('meta', json.dumps(metadata, ensure_ascii=False).encode('utf-8')))
+
+    for felt in _PERSON_TEKSTFELTER:
+        offsets, data = _strengtabell([getattr(p, felt) for p in personer])
+        seksjoner += [(f'p.{felt}.o', offsets), (f'p.{felt}.d', data)]
+    for felt, verdier in (
+        ('historier', [json.dumps(p.historier, ensure_ascii=False) if p.historier else None
+                       for p in personer]),
+        ('ekstra', [json.dumps(p.ekstra_data, ensure_ascii=False, default=str) if p.ekstra_data else None
+                    for p in personer]),
+    ):
+        offsets, data = _strengtabell(verdier)
+        seksjoner += [(f'p.{felt}.o', offsets), (f'p.{felt}.d', data)]
+
+    seksjoner.append(('p.kjønn', array('B', [_KJØNN_KODER.get(getattr(p.kjønn, 'value', p.kjønn), 2)
+                                               for p in personer]).tobytes()))
+    seksjoner.append(('p.fdato', array('i', [_dato_til_int(p.fødselsdato) for p in personer]).tobytes()))
+    seksjoner.append(('p.ddato', array('i', [_dato_til_int(p.dødsdato) for p in personer]).tobytes()))
+
+    for relasjon in _RELASJONER:
+        indptr, indices = _csr([getattr(p, relasjon) for p in personer], indeks)
+        seksjoner += [(f'p.{relasjon}.p', indptr), (f'p.{relasjon}.i', indices)]
+
+    sortert = sorted(range(len(personer)), key=lambda i: personer[i].id.encode('utf-8'))
+    seksjoner.append(('p.sortert', array('I', sortert).tobytes()))
+
+    for felt in _EKTESKAP_TEKSTFELTER:
+        offsets, data = _strengtabell([getattr(e, felt) for e in ekteskap])
+        seksjoner += [(f'e.{felt}.o', offsets), (f'e.{felt}.d', data)]
+    seksjoner.append(('e.edato', array('i', [_dato_til_int(e.ekteskapsdato) for e in ekteskap]).tobytes()))
+    seksjoner.append(('e.sdato', array('i', [_dato_til_int(e.skilsmisse_dato) for e in ekteskap]).tobytes()))
+
+    # Skriv header, seksjonstabell og 8-byte-justerte seksjoner
+    tabell_slutt = _HEADER.size + _SEKSJON.size * len(seksjoner)
+    offset = (tabell_slutt + 7) & ~7
+    tabell = []
+    for navn, data in seksjoner:
+        tabell.append(_SEKSJON.pack(_seksjonsnavn(navn), offset, len(data)))
+        offset = (offset + len(data) + 7) & ~7
+
+    with open(file_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSJON, len(personer), len(ekteskap), len(seksjoner)))
+        f.write(b''.join(tabell))
+        for _, data in seksjoner:
+            f.write(b'\0' * (-f.tell() % 8))
+            f.write(data)
+
+
+def load_from_binary(file_path: str) -> FamilieData:
+    """
+    Last hele familie-dataene fra et binært øyeblikksbilde.
+
+    Args:
+        file_path: Sti til binærfil
+
+    Returns:
+        FamilieData objekt
+    """
+    with MmapSlektstre(file_path) as tre:
+        return tre.familie_data.model_copy()
+
+
+class MmapSlektstre(Slektstre):
+    """
+    Skrivebeskyttet slektstre direkte over et minnekartlagt binært øyeblikksbilde.
+
+    Åpning leser bare header og seksjonstabell. Personer materialiseres
+    som Person-objekter først når de slås opp, og forfedre, etterkommere
+    og generasjoner beregnes rett på CSR-arrayene. `graph` og
+    `familie_data` bygges først ved første bruk. Sidene deles mellom alle
+    prosesser som åpner samme fil.
+    """
+
+    def __init__(self, file_path: str):
+        """
+        Åpne binært øyeblikksbilde.
+
+        Args:
+            file_path: Sti til binærfil laget av save_to_binary
+        """
+        file_path = Path(file_path)
+        if not file_path.exists():
+            raise FileNotFoundError(t('file_not_found'))
+
+        self.file_path = str(file_path)
+        self.journal = None
+        self._fil = open(file_path, 'rb')
+        self._mm = mmap.mmap(self._fil.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buf = memoryview(self._mm)
+        self._s: Dict[bytes, memoryview] = {}
+        self._visninger: Dict[str, memoryview] = {}
+
+        magic, versjon, self._n, self._n_ekteskap, antall = _HEADER.unpack_from(self._buf, 0)
+        if magic != _MAGIC or versjon != _VERSJON:
+            self.close()
+            raise ValueError(t('invalid_file_format'))
+
+        for i in range(antall):
+            navn, offset, lengde = _SEKSJON.unpack_from(self._buf, _HEADER.size + i * _SEKSJON.size)
+            self._s[navn.rstrip(b'\0')] = self._buf[offset:offset + lengde]
+
+        self._kjønn = self._seksjon('p.kjønn')
+        self._fdato = self._seksjon('p.fdato', 'i')
+        self._ddato = self._seksjon('p.ddato', 'i')
+        self._sortert = self._seksjon('p.sortert', 'I')
+        self._nabo = {
+            r: (self._seksjon(f'p.{r}.p', 'I'), self._seksjon(f'p.{r}.i', 'I')) for r in _RELASJONER
+        }
+        self._cache: Dict[int, Person] = {}
+        self._graph: Optional[nx.DiGraph] = None
+        self._familie_data: Optional[FamilieData] = None
+
+    def close(self) -> None:
+        """Frigi minnekartleggingen."""
+        for visning in self._visninger.values():
+            visning.release()
+        for visning in self._s.values():
+            visning.release()
+        self._visninger, self._s, self._nabo = {}, {}, {}
+        self._buf.release()
+        self._mm.close()
+        self._fil.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        """Antall personer i øyeblikksbildet."""
+        return self._n
+
+    @property
+    def graph(self) -> nx.DiGraph:
+        """NetworkX-graf, bygget ved første bruk."""
+        if self._graph is None:
+            self._build_graph()
+        return self._graph
+
+    @graph.setter
+    def graph(self, verdi: nx.DiGraph) -> None:
+        self._graph = verdi
+
+    @property
+    def familie_data(self) -> FamilieData:
+        """Alle data materialisert som FamilieData, bygget ved første bruk."""
+        if self._familie_data is None:
+            metadata = json.loads(bytes(self._seksjon('meta')).decode('utf-8'))
+            self._familie_data = FamilieData.model_construct(
+                personer=[self._person(i) for i in range(self._n)],
+                ekteskap=[self._ekteskap(i) for i in range(self._n_ekteskap)],
+                **FamilieData(**metadata).model_dump(exclude={'personer', 'ekteskap'})
+            )
+        return self._familie_data
+
+    def get_person(self, person_id: str) -> Optional[Person]:
+        """Hent person basert på ID (binærsøk i sortert ID-indeks)."""
+        i = self._indeks(person_id)
+        return None if i is None else self._person(i)
+
+    def get_all_persons(self) -> List[Person]:
+        """Hent alle personer."""
+        return [self._person(i) for i in range(self._n)]
+
+    def get_ancestors(self, person_id: str, max_generations: Optional[int] = None) -> List[Person]:
+        """Hent alle forfedre til en person (samme rekkefølge som Slektstre)."""
+        return self._dfs(person_id, 'foreldre', max_generations)
+
+    def get_descendants(self, person_id: str, max_generations: Optional[int] = None) -> List[Person]:
+        """Hent alle etterkommere til en person (samme rekkefølge som Slektstre)."""
+        return self._dfs(person_id, 'barn', max_generations)
+
+    def get_generation(self, person_id: str) -> int:
+        """Korteste antall forelder-steg opp til en forfar uten registrerte foreldre."""
+        start = self._indeks(person_id)
+        if start is None:
+            return 0
+        indptr, indices = self._nabo['foreldre']
+        sett = {start}
+        front = [start]
+        generasjon = 0
+        while front:
+            neste = []
+            for i in front:
+                if indptr[i] == indptr[i + 1]:
+                    return generasjon
+                for j in indices[indptr[i]:indptr[i + 1]]:
+                    if j not in sett:
+                        sett.add(j)
+                        neste.append(j)
+            front = neste
+            generasjon += 1
+        return 0
+
+    def _skrivebeskyttet(self, *args, **kwargs):
+        raise TypeError("Binært øyeblikksbilde er skrivebeskyttet")
+
+    add_person = _skrivebeskyttet
+    add_ekteskap = _skrivebeskyttet
+    add_child = _skrivebeskyttet
+    add_marriage = _skrivebeskyttet
+    update_person = _skrivebeskyttet
+
+    def _build_graph(self) -> None:
+        """Bygg NetworkX-graf fra de materialiserte dataene."""
+        Slektstre._build_graph(self)
+
+    def _dfs(self, person_id: str, relasjon: str, max_generations: Optional[int]) -> List[Person]:
+        """Dybde-først i preorden over CSR, som de rekursive metodene i Slektstre."""
+        start = self._indeks(person_id)
+        if start is None:
+            return []
+        indptr, indices = self._nabo[relasjon]
+        besøkt = set()
+        resultat = []
+        stakk = [(start, 0)]
+        while stakk:
+            i, generasjon = stakk.pop()
+            if max_generations and generasjon >= max_generations:
+                continue
+            if i in besøkt:
+                continue
+            besøkt.add(i)
+            resultat.append(i)
+            naboer = indices[indptr[i]:indptr[i + 1]]
+            stakk.extend((j, generasjon + 1) for j in reversed(naboer.tolist()))
+        return [self._person(i) for i in resultat[1:]]
+
+    def _seksjon(self, navn: str, format: Optional[str] = None) -> memoryview:
+        """Hent (og buffer) en seksjon, eventuelt som typet array."""
+        visning = self._visninger.get(navn)
+        if visning is None:
+            visning = self._s[_seksjonsnavn(navn)]
+            if format is not None:
+                visning = visning.cast(format)
+            self._visninger[navn] = visning
+        return visning
+
+    def _tekst(self, prefiks: str, felt: str, i: int) -> Optional[str]:
+        """Les tekstfelt nr. i fra en strengtabell (tom streng gir None)."""
+        offsets = self._seksjon(f'{prefiks}.{felt}.o', 'Q')
+        start, slutt = offsets[i], offsets[i + 1]
+        if start == slutt:
+            return None
+        return str(self._seksjon(f'{prefiks}.{felt}.d')[start:slutt], 'utf-8')
+
+    def _indeks(self, person_id: str) -> Optional[int]:
+        """Binærsøk etter personindeks for en ID."""
+        mål = person_id.encode('utf-8')
+        offsets = self._seksjon('p.id.o', 'Q')
+        data = self._seksjon('p.id.d')
+        sortert = self._sortert
+
+        lav, høy = 0, self._n
+        while lav < høy:
+            midt = (lav + høy) // 2
+            i = sortert[midt]
+            if data[offsets[i]:offsets[i + 1]].tobytes() < mål:
+                lav = midt + 1
+            else:
+                høy = midt
+        if lav < self._n:
+            i = sortert[lav]
+            if data[offsets[i]:offsets[i + 1]].tobytes() == mål:
+                return i
+        return None
+
+    def _person(self, i: int) -> Person:
+        """Materialiser person nr. i (bufres)."""
+        person = self._cache.get(i)
+        if person is not None:
+            return person
+
+        data = {felt: self._tekst('p', felt, i) for felt in _PERSON_TEKSTFELTER}
+        data['kjønn'] = _KJØNN_VERDIER[self._kjønn[i]]
+        data['fødselsdato'] = date.fromordinal(self._fdato[i]) if self._fdato[i] else None
+        data['dødsdato'] = date.fromordinal(self._ddato[i]) if self._ddato[i] else None
+        historier = self._tekst('p', 'historier', i)
+        data['historier'] = json.loads(historier) if historier else []
+        ekstra = self._tekst('p', 'ekstra', i)
+        data['ekstra_data'] = json.loads(ekstra) if ekstra else {}
+        for relasjon in _RELASJONER:
+            indptr, indices = self._nabo[relasjon]
+            data[relasjon] = [self._tekst('p', 'id', j) for j in indices[indptr[i]:indptr[i + 1]]]
+
+        # Dataene ble validert da øyeblikksbildet ble skrevet
+        person = Person.model_construct(**data)
+        self._cache[i] = person
+        return person
+
+    def _ekteskap(self, i: int) -> Ekteskap:
+        """Materialiser ekteskap nr. i."""
+        data = {felt: self._tekst('e', felt, i) for felt in _EKTESKAP_TEKSTFELTER}
+        edato, sdato = self._seksjon('e.edato', 'i'), self._seksjon('e.sdato', 'i')
+        data['ekteskapsdato'] = date.fromordinal(edato[i]) if edato[i] else None
+        data['skilsmisse_dato'] = date.fromordinal(sdato[i]) if sdato[i] else None
+        data['ekteskapstype'] = data['ekteskapstype'] or 'ekteskap'
+        return Ekteskap.model_construct(**data)
@@ -3,11 +3,13 @@ Pydantic-modeller for slektstre-prosjektet
 """
 
 from datetime import date, datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from enum import Enum
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, PrivateAttr, validator
 import uuid
 
+from migrations import SCHEMA_VERSION
+
 class Gender(str, Enum):
     """Kjønn enum."""
     MALE = "male"
@@ -139,9 +141,12 @@ class FamilieData(BaseModel):
     # Metadata
     opprettet: datetime = Field(default_factory=datetime.now, description="Når dataene ble opprettet")
     sist_endret: datetime = Field(default_factory=datetime.now, description="Når dataene sist ble endret")
-    versjon: str = Field(default="1.0", description="Versjon av dataformatet")
+    versjon: str = Field(default=SCHEMA_VERSION, description="Versjon av dataformatet")
     beskrivelse: Optional[str] = Field(None, description="Beskrivelse av familien")
     
+    # Poster endret siden sist lagring: (type, id) -> post, eller None hvis slettet
+    _endringer: Dict[Tuple[str, str], Any] = PrivateAttr(default_factory=dict)
+    
     def get_person_by_id(self, person_id: str) -> Optional[Person]:
         """Hent person basert på ID."""
         for person in self.personer:
@@ -161,12 +166,53 @@ class FamilieData(BaseModel):
         if not any(p.id == person.id for p in self.personer):
             self.personer.append(person)
             self.sist_endret = datetime.now()
+            self.mark_changed(person)
     
     def add_ekteskap(self, ekteskap: Ekteskap) -> None:
         """Legg til ekteskap."""
         if not any(e.id == ekteskap.id for e in self.ekteskap):
             self.ekteskap.append(ekteskap)
             self.sist_endret = datetime.now()
+            self.mark_changed(ekteskap)
+    
+    def mark_changed(self, *poster: Any) -> None:
+        """
+        Merk personer/ekteskap som endret siden sist lagring.
+        
+        Slektstre og Endringsjournal gjør dette selv; kall det ved direkte
+        endring av felter, f.eks. `person.notater = ...`.
+        """
+        for post in poster:
+            self._endringer[(_post_type(post), post.id)] = post
+    
+    def mark_deleted(self, *poster: Any) -> None:
+        """Merk personer/ekteskap som fjernet siden sist lagring."""
+        for post in poster:
+            self._endringer[(_post_type(post), post.id)] = None
+    
+    @property
+    def has_changes(self) -> bool:
+        """Om noe er endret siden sist lagring."""
+        return bool(self._endringer)
+    
+    def pending_changes(self) -> Tuple[List[Person], List['Ekteskap'], List[str], List[str]]:
+        """
+        Hent endringer siden sist lagring.
+        
+        Returns:
+            (endrede personer, endrede ekteskap, slettede person-IDer, slettede ekteskap-IDer)
+        """
+        personer, ekteskap, slettede_personer, slettede_ekteskap = [], [], [], []
+        for (type_, post_id), post in self._endringer.items():
+            if type_ == 'person':
+                (personer.append(post) if post is not None else slettede_personer.append(post_id))
+            else:
+                (ekteskap.append(post) if post is not None else slettede_ekteskap.append(post_id))
+        return personer, ekteskap, slettede_personer, slettede_ekteskap
+    
+    def mark_saved(self) -> None:
+        """Nullstill endringssettet (kalles av lagrefunksjonene)."""
+        self._endringer.clear()
     
     class Config:
         """Pydantic konfigurasjon."""
@@ -174,3 +220,11 @@ class FamilieData(BaseModel):
             date: lambda v: v.isoformat(),
             datetime: lambda v: v.isoformat()
         }
+
+def _post_type(post: Any) -> str:
+    """Nøkkel for posttypen i endringssettet."""
+    if isinstance(post, Person):
+        return 'person'
+    if isinstance(post, Ekteskap):
+        return 'ekteskap'
+    raise TypeError(f"Ukjent posttype: {type(post).__name__}")
@@ -0,0 +1,293 @@
+"""
+Lokal HTTP/JSON-spørretjeneste for slektstre-prosjektet
+Laster treet én gang og svarer på oppslag med hurtigbuffer per treversjon
+Kun standardbiblioteket brukes (asyncio), så tjenesten kan kjøres lokalt eller i en container
+"""
+
+import argparse
+import asyncio
+import json
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Tuple, Union
+from urllib.parse import urlsplit, parse_qsl, unquote
+
+from models import Person
+from tree import Slektstre
+from snapshot import Publiserer, FrossetSlektstre
+from family_io import _loader_for, _person_to_dict
+from localization import t
+
+# HTTP-statuskoder tjenesten bruker
+_STATUS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    500: 'Internal Server Error',
+}
+
+
+class HttpFeil(Exception):
+    """Feil som skal returneres til klienten med gitt statuskode."""
+
+    def __init__(self, status: int, melding: str):
+        super().__init__(melding)
+        self.status = status
+        self.melding = melding
+
+
+class SlektstreService:
+    """
+    Asyncio HTTP/JSON-tjeneste over et Slektstre.
+
+    Endepunkter (alle GET):
+        /health                               Status og treversjon
+        /person/{id}                          Én person
+        /person/{id}/ancestors?max_generations=N
+        /person/{id}/descendants?max_generations=N
+        /relation?a={id}&b={id}               Slektskap mellom to personer
+        /path?a={id}&b={id}&max_marriage_hops=N
+                                              Korteste slektskapssti med etiketter
+        /search?q=tekst&limit=N               Søk i fullt navn
+        /statistics                           Statistikk for treet
+
+    Spørringene kjøres i en trådpool mot sist publiserte øyeblikksbilde,
+    så tunge oppslag ikke blokkerer hendelsesløkken. Svar bufres med
+    treversjonen som del av nøkkelen, slik at endringer i treet automatisk
+    gjør gamle svar ugyldige.
+    """
+
+    def __init__(self, kilde: Union[Slektstre, Publiserer],
+                 workers: int = 4, cache_size: int = 1024):
+        """
+        Initialiser tjenesten.
+
+        Args:
+            kilde: Slektstre eller en eksisterende Publiserer (ved samtidig redigering)
+            workers: Antall tråder for spørringer
+            cache_size: Maks antall bufrede svar
+        """
+        self.publiserer = kilde if isinstance(kilde, Publiserer) else Publiserer(kilde)
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[Tuple, bytes]' = OrderedDict()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='slektstre')
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8080) -> asyncio.AbstractServer:
+        """Start tjenesten og returner asyncio-serveren."""
+        self._server = await asyncio.start_server(self._håndter_tilkobling, host, port)
+        return self._server
+
+    async def serve_forever(self, host: str = '127.0.0.1', port: int = 8080) -> None:
+        """Start tjenesten og kjør til den avbrytes."""
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+    def close(self) -> None:
+        """Stopp tjenesten og trådpoolen."""
+        if self._server is not None:
+            self._server.close()
+        self._pool.shutdown(wait=False)
+
+    async def handle(self, metode: str, mål: str) -> Tuple[int, bytes]:
+        """Behandle én forespørsel og returner (status, JSON-kropp)."""
+        if metode != 'GET':
+            return 405, _json({'error': _STATUS[405]})
+
+        deler = urlsplit(mål)
+        sti = tuple(unquote(d) for d in deler.path.strip('/').split('/') if d)
+        parametre = tuple(sorted(parse_qsl(deler.query)))
+
+        tre = self.publiserer.current()
+        nøkkel = (tre.versjon, sti, parametre)
+        kropp = self._cache.get(nøkkel)
+        if kropp is not None:
+            self._cache.move_to_end(nøkkel)
+            return 200, kropp
+
+        loop = asyncio.get_running_loop()
+        try:
+            resultat = await loop.run_in_executor(
+                self._pool, _utfør, tre, sti, dict(parametre)
+            )
+        except HttpFeil as e:
+            return e.status, _json({'error': e.melding})
+        except Exception as e:
+            return 500, _json({'error': str(e)})
+
+        kropp = _json(resultat)
+        self._cache[nøkkel] = kropp
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return 200, kropp
+
+    async def _håndter_tilkobling(self, reader: asyncio.StreamReader,
+                                  writer: asyncio.StreamWriter) -> None:
+        """Les HTTP/1.1-forespørsler fra en tilkobling (med keep-alive)."""
+        try:
+            while True:
+                forespørselslinje = await reader.readline()
+                if not forespørselslinje:
+                    break
+
+                headere: Dict[str, str] = {}
+                while True:
+                    linje = await reader.readline()
+                    if linje in (b'\r\n', b'\n', b''):
+                        break
+                    navn, _, verdi = linje.decode('latin-1').partition(':')
+                    headere[navn.strip().lower()] = verdi.strip()
+
+                lengde = _innholdslengde(headere.get('content-length'))
+                try:
+                    if lengde is None:
+                        # Uten gyldig lengde vet vi ikke hvor neste forespørsel starter
+                        raise ValueError("Ugyldig Content-Length")
+                    if lengde:
+                        await reader.readexactly(lengde)
+                    metode, mål, versjon = forespørselslinje.decode('latin-1').split()
+                except ValueError:
+                    status, kropp, versjon = 400, _json({'error': _STATUS[400]}), 'HTTP/1.0'
+                else:
+                    status, kropp = await self.handle(metode, mål)
+
+                lukk = (headere.get('connection', '').lower() == 'close'
+                        or versjon == 'HTTP/1.0')
+                writer.write(
+                    f"HTTP/1.1 {status} {_STATUS[status]}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(kropp)}\r\n"
+                    f"Connection: {'close' if lukk else 'keep-alive'}\r\n"
+                    f"\r\n".encode('latin-1') + kropp
+                )
+                await writer.drain()
+                if lukk:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def _utfør(tre: FrossetSlektstre, sti: Tuple[str, ...], parametre: Dict[str, str]) -> Any:
+    """Utfør en spørring mot et øyeblikksbilde (kjøres i trådpoolen)."""
+    if sti == ('health',):
+        return {'status': 'ok', 'versjon': tre.versjon}
+
+    if sti and sti[0] == 'person' and len(sti) in (2, 3):
+        person = tre.get_person(sti[1])
+        if not person:
+            raise HttpFeil(404, t('person_not_found'))
+        if len(sti) == 2:
+            return _person_to_dict(person)
+
+        max_generations = _int_param(parametre, 'max_generations')
+        if sti[2] == 'ancestors':
+            return [_person_to_dict(p) for p in tre.get_ancestors(person.id, max_generations)]
+        if sti[2] == 'descendants':
+            return [_person_to_dict(p) for p in tre.get_descendants(person.id, max_generations)]
+
+    if sti == ('relation',):
+        a, b = parametre.get('a'), parametre.get('b')
+        if not a or not b:
+            raise HttpFeil(400, "Parametrene 'a' og 'b' er påkrevd")
+        if not tre.get_person(a) or not tre.get_person(b):
+            raise HttpFeil(404, t('person_not_found'))
+        return {'a': a, 'b': b, 'relation': tre.find_relation(a, b)}
+
+    if sti == ('path',):
+        a, b = parametre.get('a'), parametre.get('b')
+        if not a or not b:
+            raise HttpFeil(400, "Parametrene 'a' og 'b' er påkrevd")
+        if not tre.get_person(a) or not tre.get_person(b):
+            raise HttpFeil(404, t('person_not_found'))
+        steg = tre.find_relation_path(a, b, _int_param(parametre, 'max_marriage_hops'))
+        return {
+            'a': a,
+            'b': b,
+            'path': None if steg is None else [
+                {'fra': fra, 'relasjon': relasjon, 'til': til} for fra, relasjon, til in steg
+            ]
+        }
+
+    if sti == ('search',):
+        søk = parametre.get('q', '').strip().lower()
+        if not søk:
+            raise HttpFeil(400, "Parameteren 'q' er påkrevd")
+        limit = _int_param(parametre, 'limit') or 50
+        treff = []
+        for person in tre.familie_data.personer:
+            if søk in person.fullt_navn.lower():
+                treff.append(_person_to_dict(person))
+                if len(treff) >= limit:
+                    break
+        return treff
+
+    if sti == ('statistics',):
+        statistikk = tre.get_statistics()
+        for nøkkel in ('oldest_person', 'youngest_person'):
+            if isinstance(statistikk.get(nøkkel), Person):
+                statistikk[nøkkel] = _person_to_dict(statistikk[nøkkel])
+        return statistikk
+
+    raise HttpFeil(404, _STATUS[404])
+
+
+def _int_param(parametre: Dict[str, str], navn: str) -> Optional[int]:
+    """Hent et valgfritt heltallsparameter."""
+    verdi = parametre.get(navn)
+    if verdi in (None, ''):
+        return None
+    try:
+        return int(verdi)
+    except ValueError:
+        raise HttpFeil(400, f"Parameteren '{navn}' må være et heltall")
+
+
+def _innholdslengde(verdi: Optional[str]) -> Optional[int]:
+    """Content-Length som ikke-negativt heltall, eller None hvis verdien er ugyldig."""
+    if not verdi:
+        return 0
+    if not (verdi.isascii() and verdi.isdigit()):
+        return None
+    return int(verdi)
+
+
+def _json(data: Any) -> bytes:
+    """Serialiser svar til UTF-8 JSON."""
+    return json.dumps(data, ensure_ascii=False, default=str).encode('utf-8')
+
+
+def serve(file_path: str, host: str = '127.0.0.1', port: int = 8080,
+          workers: int = 4, cache_size: int = 1024) -> None:
+    """
+    Last en familie-fil og kjør tjenesten til den avbrytes.
+
+    Args:
+        file_path: Sti til YAML-, JSON- eller CSV-fil
+        host: Adresse å lytte på
+        port: Port å lytte på
+        workers: Antall tråder for spørringer
+        cache_size: Maks antall bufrede svar
+    """
+    familie_data = _loader_for(file_path)(file_path)
+    service = SlektstreService(Slektstre(familie_data), workers=workers, cache_size=cache_size)
+    try:
+        asyncio.run(service.serve_forever(host, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="HTTP/JSON-tjeneste for slektstre")
+    parser.add_argument('file', help="Familie-fil (.yaml, .json eller .csv)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--cache-size', type=int, default=1024)
+    args = parser.parse_args()
+    serve(args.file, args.host, args.port, args.workers, args.cache_size)
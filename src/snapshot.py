@@ -0,0 +1,162 @@
+"""
+Uforanderlige øyeblikksbilder for trådsikre lesinger i slektstre-prosjektet
+Én skrivetråd publiserer nye bilder, mens lesetråder bruker dem uten låsing
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Any, Iterator, Iterable, Tuple
+
+import networkx as nx
+
+from models import Person, FamilieData
+from tree import Slektstre
+from journal import _tilstand
+
+
+def _frys(obj: Any) -> Any:
+    """Lag en privat kopi av en post som skrivetråden aldri muterer."""
+    return type(obj).model_construct(**_tilstand(obj))
+
+
+class FrossetSlektstre(Slektstre):
+    """
+    Skrivebeskyttet slektstre over et publisert øyeblikksbilde.
+
+    Alle lesemetoder fra Slektstre fungerer som før. Grafen er frosset
+    med `nx.freeze`, og alle metoder som endrer treet kaster TypeError.
+    """
+
+    def __init__(self, familie_data: FamilieData, versjon: int = 0):
+        """
+        Initialiser frosset slektstre.
+
+        Args:
+            familie_data: Frosne familie-data (deles ikke med skrivetråden)
+            versjon: Løpenummer for øyeblikksbildet
+        """
+        self.versjon = versjon
+        self._personer: Dict[str, Person] = {p.id: p for p in familie_data.personer}
+        super().__init__(familie_data)
+        nx.freeze(self.graph)
+
+    def get_person(self, person_id: str) -> Optional[Person]:
+        """Hent person basert på ID (oppslag i indeks)."""
+        return self._personer.get(person_id)
+
+    def _skrivebeskyttet(self, *args, **kwargs):
+        raise TypeError("Øyeblikksbildet er skrivebeskyttet")
+
+    add_person = _skrivebeskyttet
+    add_ekteskap = _skrivebeskyttet
+    add_child = _skrivebeskyttet
+    add_marriage = _skrivebeskyttet
+    update_person = _skrivebeskyttet
+
+
+class Publiserer:
+    """
+    Publiserer uforanderlige øyeblikksbilder av et Slektstre.
+
+    Skrivetråden endrer det levende treet inne i `skriv()`; når blokken er
+    ferdig publiseres et nytt FrossetSlektstre. Lesetråder henter
+    `current()` og jobber mot det bildet så lenge de vil, uten låser og
+    uten å se halvferdige endringer.
+
+    Med en Endringsjournal koblet til treet kopieres kun postene som
+    operasjonen berørte; alle andre poster deles med forrige bilde.
+    """
+
+    def __init__(self, slektstre: Slektstre):
+        """
+        Initialiser publiserer og publiser første øyeblikksbilde.
+
+        Args:
+            slektstre: Det levende treet som skrivetråden endrer
+        """
+        self.slektstre = slektstre
+        self._lås = threading.RLock()
+        # id(post) -> (post, kopi); posten holdes med så id-en ikke kan gjenbrukes
+        self._frosne: Dict[int, Tuple[Any, Any]] = {}
+        self._versjon = 0
+        self._gjeldende: Optional[FrossetSlektstre] = None
+        self._koblet = False
+        if slektstre.journal is not None:
+            slektstre.journal.add_listener(self._fra_journal)
+            self._koblet = True
+        self.publish()
+
+    def current(self) -> FrossetSlektstre:
+        """Hent sist publiserte øyeblikksbilde."""
+        return self._gjeldende
+
+    @property
+    def versjon(self) -> int:
+        """Løpenummer for sist publiserte øyeblikksbilde."""
+        return self._versjon
+
+    @contextmanager
+    def skriv(self, beskrivelse: str = 'skriv') -> Iterator[Slektstre]:
+        """
+        Eksklusiv skrivetilgang til det levende treet.
+
+        Endringene publiseres samlet når blokken avsluttes.
+        """
+        with self._lås:
+            if self._koblet:
+                with self.slektstre._endring(beskrivelse):
+                    yield self.slektstre
+            else:
+                yield self.slektstre
+                self.publish()
+
+    def publish(self, endrede: Optional[Iterable[Any]] = None) -> FrossetSlektstre:
+        """
+        Publiser et nytt øyeblikksbilde.
+
+        Args:
+            endrede: Levende poster som er endret siden forrige bilde,
+                     eller None for å kopiere alle poster
+        """
+        with self._lås:
+            if endrede is None:
+                self._frosne = {}
+            else:
+                for obj in endrede:
+                    self._frosne.pop(id(obj), None)
+
+            familie_data = self.slektstre.familie_data
+            personer = self._frosne_poster(familie_data.personer)
+            ekteskap = self._frosne_poster(familie_data.ekteskap)
+
+            # Glem kopier av poster som ikke lenger finnes i treet
+            levende = {id(o) for o in familie_data.personer}
+            levende.update(id(o) for o in familie_data.ekteskap)
+            if len(self._frosne) > len(levende):
+                self._frosne = {k: v for k, v in self._frosne.items() if k in levende}
+
+            frosset_data = FamilieData.model_construct(
+                personer=personer,
+                ekteskap=ekteskap,
+                opprettet=familie_data.opprettet,
+                sist_endret=familie_data.sist_endret,
+                versjon=familie_data.versjon,
+                beskrivelse=familie_data.beskrivelse
+            )
+            self._versjon += 1
+            self._gjeldende = FrossetSlektstre(frosset_data, versjon=self._versjon)
+            return self._gjeldende
+
+    def _frosne_poster(self, poster: List[Any]) -> List[Any]:
+        """Hent frosne kopier, og lag nye kun for poster uten kopi."""
+        resultat = []
+        for obj in poster:
+            post = self._frosne.get(id(obj))
+            if post is None or post[0] is not obj:
+                post = self._frosne[id(obj)] = (obj, _frys(obj))
+            resultat.append(post[1])
+        return resultat
+
+    def _fra_journal(self, operasjon, hendelse: str) -> None:
+        """Lytter for Endringsjournal: publiser med kun de berørte postene kopiert."""
+        self.publish(post[0] for post in operasjon.poster.values())
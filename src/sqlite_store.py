@@ -0,0 +1,271 @@
+"""
+SQLite-basert slektstre med lat lasting av personer
+Personer hentes fra databasen først når en traversering når dem
+"""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable
+from datetime import date
+
+from models import Person, Ekteskap, FamilieData
+from tree import Slektstre
+from family_io import (
+    _SQLITE_SKJEMA, _SQL_PERSON_KOLONNER, _SQL_EKTESKAP_KOLONNER,
+    _PERSON_LISTE, _EKTESKAP_LISTE,
+    _person_from_sql_row, _ekteskap_from_sql_row,
+    _sqlite_metadata, _save_sqlite_delta
+)
+from localization import t
+
+# Maks antall parametre per IN (...)-spørring
+_SQL_BATCH = 500
+
+
+class SqliteSlektstre(Slektstre):
+    """
+    Slektstre som leser personer fra en SQLite-database ved behov.
+
+    Bare personer som faktisk slås opp (direkte eller via forfedre-,
+    etterkommer- og generasjonsspørringer) lastes inn i `familie_data` og
+    grafen. Forfedre og etterkommere hentes med rekursive CTE-er i
+    databasen i stedet for rekursjon i Python.
+
+    Endringer via add_person, add_child osv. gjøres på de lastede postene
+    og skrives tilbake med `flush()`.
+    """
+
+    def __init__(self, file_path: str):
+        """
+        Åpne database laget av save_to_sqlite.
+
+        Args:
+            file_path: Sti til SQLite-fil
+        """
+        if not Path(file_path).exists():
+            raise FileNotFoundError(t('file_not_found'))
+
+        self.file_path = str(file_path)
+        self._conn = sqlite3.connect(self.file_path, check_same_thread=False)
+        self._conn.executescript(_SQLITE_SKJEMA)
+        self._lås = threading.RLock()
+        self._personer: Dict[str, Person] = {}
+        self._ekteskap: Dict[str, Ekteskap] = {}
+        self._mangler: set = set()
+        self._alle_lastet = False
+
+        super().__init__(FamilieData(**_sqlite_metadata(self._conn)))
+
+    def close(self) -> None:
+        """Lukk databasetilkoblingen."""
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def count_persons(self) -> int:
+        """Antall personer i databasen (uten å laste dem)."""
+        return self._conn.execute("SELECT COUNT(*) FROM personer").fetchone()[0]
+
+    def get_person(self, person_id: str) -> Optional[Person]:
+        """Hent person basert på ID, fra minnet eller databasen."""
+        person = self._personer.get(person_id)
+        if person is None and person_id not in self._mangler:
+            self._load_persons([person_id])
+            person = self._personer.get(person_id)
+        return person
+
+    def get_all_persons(self) -> List[Person]:
+        """Hent alle personer (laster hele databasen ved første kall)."""
+        if not self._alle_lastet:
+            with self._lås:
+                rader = self._conn.execute(
+                    f"SELECT {_SQL_PERSON_KOLONNER} FROM personer ORDER BY rowid"
+                ).fetchall()
+                self._add_loaded(_PERSON_LISTE.validate_python(
+                    [_person_from_sql_row(r) for r in rader if r[0] not in self._personer]
+                ))
+                self._alle_lastet = True
+        return self.familie_data.personer.copy()
+
+    def get_ancestors(self, person_id: str, max_generations: Optional[int] = None) -> List[Person]:
+        """Hent alle forfedre til en person med en rekursiv CTE."""
+        return self._traverse(person_id, max_generations, oppover=True)
+
+    def get_descendants(self, person_id: str, max_generations: Optional[int] = None) -> List[Person]:
+        """Hent alle etterkommere til en person med en rekursiv CTE."""
+        return self._traverse(person_id, max_generations, oppover=False)
+
+    def get_generation(self, person_id: str) -> int:
+        """
+        Beregn generasjonsnivå for en person.
+
+        Generasjonen er korteste antall forelder-steg opp til en forfar
+        uten registrerte foreldre, og beregnes helt i databasen.
+        """
+        rad = self._conn.execute("""
+            WITH RECURSIVE forfedre(id, gen) AS (
+                SELECT ?, 0
+                UNION
+                SELECT fb.forelder_id, forfedre.gen + 1
+                FROM foreldre_barn fb JOIN forfedre ON fb.barn_id = forfedre.id
+                WHERE forfedre.gen < 10000
+            )
+            SELECT MIN(gen) FROM forfedre
+            WHERE NOT EXISTS (SELECT 1 FROM foreldre_barn fb WHERE fb.barn_id = forfedre.id)
+        """, (person_id,)).fetchone()
+        return rad[0] if rad and rad[0] is not None else 0
+
+    def find_persons(self, etternavn: Optional[str] = None,
+                     fødested: Optional[str] = None,
+                     født_før: Optional[date] = None,
+                     født_etter: Optional[date] = None,
+                     limit: int = 100) -> List[Person]:
+        """
+        Søk etter personer med indekserte felter, uten å laste hele treet.
+
+        Args:
+            etternavn: Eksakt etternavn
+            fødested: Eksakt fødested
+            født_før: Kun personer født før denne datoen
+            født_etter: Kun personer født etter denne datoen
+            limit: Maks antall treff
+        """
+        vilkår, parametre = [], []
+        if etternavn is not None:
+            vilkår.append("etternavn = ?")
+            parametre.append(etternavn)
+        if fødested is not None:
+            vilkår.append("fødested = ?")
+            parametre.append(fødested)
+        if født_før is not None:
+            vilkår.append("fødselsdato < ?")
+            parametre.append(født_før.isoformat())
+        if født_etter is not None:
+            vilkår.append("fødselsdato > ?")
+            parametre.append(født_etter.isoformat())
+
+        hvor = f"WHERE {' AND '.join(vilkår)}" if vilkår else ""
+        ider = [r[0] for r in self._conn.execute(
+            f"SELECT id FROM personer {hvor} LIMIT ?", (*parametre, limit)
+        )]
+        self._load_persons(ider)
+        return [self._personer[i] for i in ider if i in self._personer]
+
+    def flush(self) -> None:
+        """Skriv personer og ekteskap endret siden sist tilbake til databasen."""
+        with self._lås:
+            _save_sqlite_delta(self._conn, self.familie_data)
+            self.familie_data.mark_saved()
+
+    def _build_graph(self) -> None:
+        """Bygg graf fra de lastede postene, og hold ID-indeksene i synk."""
+        if hasattr(self, '_personer'):
+            self._personer = {p.id: p for p in self.familie_data.personer}
+            self._ekteskap = {e.id: e for e in self.familie_data.ekteskap}
+        super()._build_graph()
+
+    def _traverse(self, person_id: str, max_generations: Optional[int],
+                  oppover: bool) -> List[Person]:
+        """Finn forfedre/etterkommere i databasen og last dem inn."""
+        fra, til = ('forelder_id', 'barn_id') if oppover else ('barn_id', 'forelder_id')
+        # Samme semantikk som Slektstre: personen selv er generasjon 0,
+        # og max_generations=N gir generasjon 1 til N-1
+        grense = max_generations - 1 if max_generations else 10000
+        rader = self._conn.execute(f"""
+            WITH RECURSIVE slekt(id, gen) AS (
+                SELECT {fra}, 1 FROM foreldre_barn WHERE {til} = ?
+                UNION
+                SELECT fb.{fra}, slekt.gen + 1
+                FROM foreldre_barn fb JOIN slekt ON fb.{til} = slekt.id
+                WHERE slekt.gen < ?
+            )
+            SELECT slekt.id, MIN(gen) AS g FROM slekt
+            JOIN personer ON personer.id = slekt.id
+            WHERE slekt.id != ? AND gen <= ?
+            GROUP BY slekt.id ORDER BY g, personer.rowid
+        """, (person_id, grense, person_id, grense)).fetchall()
+
+        ider = [r[0] for r in rader]
+        self._load_persons(ider)
+        return [self._personer[i] for i in ider if i in self._personer]
+
+    def _load_persons(self, ider: Iterable[str]) -> None:
+        """Last personer (og deres ekteskap) som ikke allerede er i minnet."""
+        with self._lås:
+            nye = [i for i in dict.fromkeys(ider)
+                   if i not in self._personer and i not in self._mangler]
+            rader = []
+            for start in range(0, len(nye), _SQL_BATCH):
+                del_ider = nye[start:start + _SQL_BATCH]
+                plass = ', '.join('?' * len(del_ider))
+                rader.extend(self._conn.execute(
+                    f"SELECT {_SQL_PERSON_KOLONNER} FROM personer WHERE id IN ({plass})", del_ider
+                ))
+            personer = _PERSON_LISTE.validate_python([_person_from_sql_row(r) for r in rader])
+            funnet = {p.id for p in personer}
+            self._mangler.update(i for i in nye if i not in funnet)
+            self._add_loaded(personer)
+
+    def _add_loaded(self, personer: List[Person]) -> None:
+        """Legg nylastede personer til i familie-data og grafen (inkrementelt)."""
+        if not personer:
+            return
+
+        graph = self.graph
+        for person in personer:
+            self._personer[person.id] = person
+            self.familie_data.personer.append(person)
+            graph.add_node(person.id, person=person, type='person')
+
+        # Forelder-barn-kanter mot personer som allerede er lastet
+        for person in personer:
+            for forelder_id in person.foreldre:
+                if forelder_id in self._personer:
+                    graph.add_edge(forelder_id, person.id, relation='parent-child')
+            for barn_id in person.barn:
+                if barn_id in self._personer:
+                    graph.add_edge(person.id, barn_id, relation='parent-child')
+        for fra, til in self._edges_touching([p.id for p in personer]):
+            if fra in self._personer and til in self._personer:
+                graph.add_edge(fra, til, relation='parent-child')
+
+        # Ekteskap der minst én av de nye personene er partner
+        ider = [p.id for p in personer]
+        rader = []
+        for start in range(0, len(ider), _SQL_BATCH):
+            del_ider = ider[start:start + _SQL_BATCH]
+            plass = ', '.join('?' * len(del_ider))
+            rader.extend(self._conn.execute(
+                f"SELECT {_SQL_EKTESKAP_KOLONNER} FROM ekteskap "
+                f"WHERE partner1_id IN ({plass}) OR partner2_id IN ({plass})",
+                del_ider + del_ider
+            ))
+        for rad in rader:
+            ekteskap = self._ekteskap.get(rad[0])
+            if ekteskap is None:
+                ekteskap = _EKTESKAP_LISTE.validate_python([_ekteskap_from_sql_row(rad)])[0]
+                self._ekteskap[ekteskap.id] = ekteskap
+                self.familie_data.ekteskap.append(ekteskap)
+                graph.add_node(ekteskap.id, ekteskap=ekteskap, type='marriage')
+            for partner_id in (ekteskap.partner1_id, ekteskap.partner2_id):
+                if partner_id in self._personer:
+                    graph.add_edge(partner_id, ekteskap.id, relation='partner')
+                    graph.add_edge(ekteskap.id, partner_id, relation='partner')
+
+    def _edges_touching(self, ider: List[str]) -> List[tuple]:
+        """Hent forelder-barn-kanter der en av personene er forelder eller barn."""
+        kanter = []
+        for start in range(0, len(ider), _SQL_BATCH):
+            del_ider = ider[start:start + _SQL_BATCH]
+            plass = ', '.join('?' * len(del_ider))
+            kanter.extend(self._conn.execute(
+                f"SELECT forelder_id, barn_id FROM foreldre_barn "
+                f"WHERE forelder_id IN ({plass}) OR barn_id IN ({plass})",
+                del_ider + del_ider
+            ))
+        return kanter
@@ -0,0 +1,557 @@
+"""
+Syntetiske slektstrær for lasttesting i slektstre-prosjektet
+Genererer realistiske norske slekter (1k-10M personer) deterministisk fra et frø
+
+Bruk:
+    python src/synthetic.py 100000 -o stor.jsonl.gz --seed 1
+"""
+
+import argparse
+import bisect
+import json
+import math
+import random
+from datetime import date, datetime
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from models import Person, Ekteskap, FamilieData, Gender
+
+# Navn etter fødselsperiode, omtrent i fallende hyppighet
+_FORNAVN = {
+    1900: {
+        'male': ['Ole', 'Hans', 'Johan', 'Lars', 'Nils', 'Peder', 'Anders', 'Ola', 'Jens', 'Knut',
+                 'Kristian', 'Halvor', 'Olav', 'Erik', 'Jon', 'Martin', 'Paul', 'Jakob', 'Tollef', 'Gunnar'],
+        'female': ['Anne', 'Marie', 'Ingeborg', 'Karen', 'Kari', 'Berit', 'Anna', 'Marte', 'Maren', 'Ragnhild',
+                   'Johanne', 'Guri', 'Sigrid', 'Marit', 'Gunhild', 'Ingrid', 'Gjertrud', 'Kirsten', 'Olava', 'Elen'],
+    },
+    1970: {
+        'male': ['Jan', 'Per', 'Bjørn', 'Ole', 'Lars', 'Kjell', 'Knut', 'Arne', 'Svein', 'Hans',
+                 'Geir', 'Tor', 'Terje', 'Odd', 'Rolf', 'Einar', 'Thomas', 'Harald', 'Leif', 'Trond'],
+        'female': ['Anne', 'Inger', 'Kari', 'Marit', 'Ingrid', 'Liv', 'Eva', 'Berit', 'Astrid', 'Bjørg',
+                   'Randi', 'Solveig', 'Hilde', 'Gerd', 'Turid', 'Wenche', 'Ragnhild', 'Karin', 'Elisabeth', 'Nina'],
+    },
+    9999: {
+        'male': ['Jonas', 'Emil', 'Henrik', 'Kristian', 'Martin', 'Andreas', 'Mathias', 'Magnus', 'Sander', 'Jakob',
+                 'Markus', 'Daniel', 'Kristoffer', 'Noah', 'Oliver', 'Lukas', 'Filip', 'William', 'Elias', 'Aksel'],
+        'female': ['Emma', 'Nora', 'Sara', 'Ida', 'Ingrid', 'Thea', 'Emilie', 'Julie', 'Maja', 'Sofie',
+                   'Hanna', 'Ingeborg', 'Marte', 'Camilla', 'Kristine', 'Silje', 'Olivia', 'Leah', 'Frida', 'Tiril'],
+    },
+}
+
+_ETTERNAVN = [
+    'Hansen', 'Johansen', 'Olsen', 'Larsen', 'Andersen', 'Pedersen', 'Nilsen', 'Kristiansen', 'Jensen',
+    'Karlsen', 'Johnsen', 'Pettersen', 'Eriksen', 'Berg', 'Haugen', 'Hagen', 'Johannessen', 'Andreassen',
+    'Jacobsen', 'Dahl', 'Jørgensen', 'Henriksen', 'Lund', 'Halvorsen', 'Sørensen', 'Jakobsen', 'Moen',
+    'Gundersen', 'Iversen', 'Strand', 'Solberg', 'Svendsen', 'Eide', 'Knutsen', 'Martinsen', 'Paulsen',
+    'Bakken', 'Kristoffersen', 'Mathisen', 'Lie', 'Amundsen', 'Lunde', 'Solheim', 'Berge', 'Moe',
+    'Nygård', 'Bakke', 'Lundervold', 'Fossum', 'Aasen',
+]
+
+# Sted og omtrentlig vekt (innbyggere i tusen)
+_STEDER = [
+    ('Oslo', 700), ('Bergen', 290), ('Trondheim', 210), ('Stavanger', 145), ('Kristiansand', 115),
+    ('Drammen', 100), ('Fredrikstad', 85), ('Tromsø', 78), ('Sandnes', 82), ('Sarpsborg', 58),
+    ('Skien', 55), ('Ålesund', 67), ('Bodø', 53), ('Haugesund', 38), ('Tønsberg', 58), ('Moss', 50),
+    ('Arendal', 45), ('Hamar', 32), ('Larvik', 48), ('Halden', 31), ('Lillehammer', 29), ('Molde', 32),
+    ('Harstad', 25), ('Gjøvik', 30), ('Kongsberg', 28), ('Voss', 15), ('Førde', 13), ('Alta', 21),
+    ('Namsos', 15), ('Levanger', 20), ('Narvik', 22), ('Steinkjer', 24), ('Elverum', 21), ('Stord', 19),
+    ('Florø', 12), ('Røros', 6), ('Lærdal', 2), ('Vadsø', 6),
+]
+
+
+class _Vektet:
+    """Trekk fra en liste med Zipf- eller gitte vekter i O(log n)."""
+
+    def __init__(self, verdier: Sequence[str], vekter: Optional[Sequence[float]] = None):
+        self.verdier = list(verdier)
+        vekter = vekter or [1 / (i + 1) ** 0.8 for i in range(len(verdier))]
+        self.kumulativ = list(accumulate(vekter))
+
+    def trekk(self, rng: random.Random) -> str:
+        x = rng.random() * self.kumulativ[-1]
+        return self.verdier[bisect.bisect_right(self.kumulativ, x)]
+
+
+_FORNAVN_TREKK = {år: {k: _Vektet(navn) for k, navn in kjønn.items()} for år, kjønn in _FORNAVN.items()}
+_ETTERNAVN_TREKK = _Vektet(_ETTERNAVN)
+_STED_TREKK = _Vektet([s for s, _ in _STEDER], [v for _, v in _STEDER])
+
+_ÅR = 365.25
+
+
+class _P:
+    """Person under generering (kompakt; blir Person når alle barn er født)."""
+
+    __slots__ = ('id', 'fornavn', 'mellomnavn', 'etternavn', 'kjønn', 'født', 'død',
+                 'fødested', 'dødssted', 'mor', 'far', 'barn', 'partnere', 'gift')
+
+    def __init__(self, id_, kjønn, født, død, fødested, mor=None, far=None):
+        self.id = id_
+        self.kjønn = kjønn
+        self.født = født
+        self.død = død
+        self.fødested = fødested
+        self.dødssted = None
+        self.mor = mor
+        self.far = far
+        self.barn: List[str] = []
+        self.partnere: List[str] = []
+        self.gift = False
+        self.fornavn = self.mellomnavn = self.etternavn = None
+
+
+class _E:
+    """Ekteskap under generering."""
+
+    __slots__ = ('id', 'mann', 'kone', 'start', 'slutt', 'sted', 'skilt')
+
+    def __init__(self, id_, mann, kone, start, slutt, sted, skilt):
+        self.id = id_
+        self.mann = mann
+        self.kone = kone
+        self.start = start
+        self.slutt = slutt
+        self.sted = sted
+        self.skilt = skilt
+
+
+class SlektsGenerator:
+    """
+    Deterministisk generator for store, realistiske slektstrær.
+
+    Slekta bygges generasjon for generasjon fra et sett stamforeldre:
+    personer gifter seg med en i samme generasjon, en inngiftet person
+    utenfra eller (med `pedigree_collapse`) et søskenbarn. Skilsmisse og
+    enkestand kan følges av nytt ekteskap, så barn fra begge ekteskapene
+    blir halvsøsken. Datoer følger foreldrenes levetid, og barnedødelighet
+    og levealder avhenger av fødselsåret.
+
+    En generasjon gjøres ferdig (og gis videre som Person/Ekteskap) når
+    barna dens er født, så minnebruken er omtrent to generasjoner.
+
+    Eksempel:
+        generator = SlektsGenerator(100_000, seed=1)
+        generator.write('stor.jsonl.gz')
+    """
+
+    def __init__(self, n: int, seed: int = 0,
+                 generations: int = 10,
+                 end_year: int = 2025,
+                 pedigree_collapse: float = 0.02,
+                 marriage_rate: float = 0.85,
+                 internal_marriage_rate: float = 0.5,
+                 divorce_rate: float = 0.2,
+                 remarriage_rate: float = 0.3):
+        """
+        Initialiser generator.
+
+        Args:
+            n: Nøyaktig antall personer
+            seed: Frø; samme frø og parametre gir samme tre
+            generations: Omtrentlig antall generasjoner fra stamforeldrene
+            end_year: Siste mulige fødselsår; senere dødsdatoer utelates (personen lever)
+            pedigree_collapse: Andel ekteskap mellom søskenbarn (slektstap)
+            marriage_rate: Andel voksne som gifter seg
+            internal_marriage_rate: Andel ekteskap innen slekta (resten med inngiftede utenfra)
+            divorce_rate: Sannsynlighet for skilsmisse i ekteskap inngått etter 1950
+            remarriage_rate: Sannsynlighet for nytt ekteskap etter skilsmisse eller enkestand
+        """
+        if n < 1:
+            raise ValueError("n må være minst 1")
+        self.n = n
+        self.seed = seed
+        self.generations = max(1, generations)
+        self.end_year = end_year
+        self.pedigree_collapse = pedigree_collapse
+        self.marriage_rate = marriage_rate
+        self.internal_marriage_rate = internal_marriage_rate
+        self.divorce_rate = divorce_rate
+        self.remarriage_rate = remarriage_rate
+
+        self._slutt = date(end_year, 12, 31).toordinal()
+        self._start_år = end_year - 30 * self.generations - 20
+
+    # -- Offentlig API -----------------------------------------------------
+
+    def __iter__(self) -> Iterator[Union[Person, Ekteskap]]:
+        """Gi personer og ekteskap etter hvert som generasjonene blir ferdige."""
+        self._rng = random.Random(self.seed)
+        self._antall = 0
+        self._ekteskap_nr = 0
+
+        stamfedre = min(self.n, max(2, round(self.n / (self.generations * 1.6))))
+        generasjon = [self._ny_person(self._rng.choice(('male', 'female')),
+                                      self._start_år + self._rng.randint(0, 20))
+                      for _ in range(stamfedre)]
+
+        for g in range(1, self.generations + 2):
+            inngiftede, ekteskap = self._gift(generasjon)
+            neste = self._barn(ekteskap, g)
+            for p in generasjon:
+                yield self._person(p)
+            for p in inngiftede:
+                yield self._person(p)
+            for e in ekteskap:
+                yield self._ekteskap(e)
+            generasjon = neste
+            if not generasjon:
+                break
+
+        for p in generasjon:
+            yield self._person(p)
+
+        # Fyll opp med enslige inngiftede hvis slekta døde ut før n personer
+        while self._antall < self.n:
+            yield self._person(self._ny_person(self._rng.choice(('male', 'female')),
+                                               self._rng.randint(self._start_år, self.end_year)))
+
+    def familie_data(self) -> FamilieData:
+        """Generer hele treet i minnet."""
+        personer, ekteskap = [], []
+        for post in self:
+            (personer if isinstance(post, Person) else ekteskap).append(post)
+        return FamilieData(personer=personer, ekteskap=ekteskap, **self._metadata())
+
+    def write(self, file_path: str) -> Tuple[int, int]:
+        """
+        Skriv treet til fil i formatet gitt av filendelsen.
+
+        JSON Lines og CSV (også komprimert) skrives strømmende med konstant
+        minnebruk; andre formater bygges i minnet og lagres med family_io.
+
+        Returns:
+            (antall personer, antall ekteskap)
+        """
+        from family_io import (
+            save, _format_suffix, _open_fil, _write_csv_rows, _ekteskap_csv_path,
+            _person_csv_row, _ekteskap_csv_row, _PERSON_CSV_KOLONNER, _EKTESKAP_CSV_KOLONNER
+        )
+
+        file_path = Path(file_path)
+        format_ = _format_suffix(file_path)
+        antall = [0, 0]
+
+        if format_ == '.jsonl':
+            metadata = FamilieData(**self._metadata()).model_dump(
+                mode='json', exclude={'personer', 'ekteskap'}
+            )
+            with _open_fil(file_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'metadata': metadata}, ensure_ascii=False) + '\n')
+                for post in self:
+                    er_person = isinstance(post, Person)
+                    antall[0 if er_person else 1] += 1
+                    nøkkel = 'person' if er_person else 'ekteskap'
+                    f.write(f'{{"{nøkkel}": {post.model_dump_json()}}}\n')
+            return antall[0], antall[1]
+
+        if format_ == '.csv':
+            ekteskap_rader = []
+
+            def person_rader():
+                for post in self:
+                    if isinstance(post, Person):
+                        antall[0] += 1
+                        yield _person_csv_row(post)
+                    else:
+                        antall[1] += 1
+                        ekteskap_rader.append(_ekteskap_csv_row(post))
+
+            _write_csv_rows(file_path, _PERSON_CSV_KOLONNER, person_rader())
+            _write_csv_rows(_ekteskap_csv_path(file_path), _EKTESKAP_CSV_KOLONNER, ekteskap_rader)
+            return antall[0], antall[1]
+
+        familie_data = self.familie_data()
+        save(familie_data, str(file_path))
+        return len(familie_data.personer), len(familie_data.ekteskap)
+
+    # -- Generering --------------------------------------------------------
+
+    def _metadata(self) -> Dict[str, str]:
+        return {
+            'beskrivelse': f"Syntetisk slektstre: {self.n} personer, frø {self.seed}",
+            'opprettet': datetime(self.end_year, 12, 31),
+            'sist_endret': datetime(self.end_year, 12, 31),
+        }
+
+    def _ny_person(self, kjønn: str, fødselsår: int, mor: Optional[_P] = None,
+                   far: Optional[_P] = None, født: Optional[int] = None,
+                   voksen: bool = False, lever_til: Optional[int] = None) -> Optional[_P]:
+        """
+        Lag en person, eller None når budsjettet på n personer er brukt opp.
+
+        `voksen` gir en som lever minst til 20 år (inngiftede), og `lever_til`
+        en som lever forbi den datoen.
+        """
+        if self._antall >= self.n:
+            return None
+        rng = self._rng
+        if født is None:
+            født = date(fødselsår, 1, 1).toordinal() + rng.randrange(365)
+        år = date.fromordinal(født).year
+
+        # Barnedødelighet og levealder etter fødselsår
+        if not voksen and rng.random() < (0.2 if år < 1850 else 0.1 if år < 1920 else 0.01):
+            levealder = rng.uniform(0.01, 5)
+        else:
+            snitt = 55 + max(0.0, min(27.0, (år - 1800) * 0.135))
+            levealder = max(20.0 if voksen else 16.0, rng.gauss(snitt, 12))
+        død = født + max(1, int(levealder * _ÅR))
+        if lever_til is not None:
+            død = max(død, lever_til + 1)
+        if død > self._slutt:
+            død = None
+
+        if mor is not None and rng.random() < 0.75:
+            fødested = mor.fødested
+        else:
+            fødested = _STED_TREKK.trekk(rng)
+
+        p = _P(f"p{self._antall}", kjønn, født, død, fødested, mor, far)
+        self._antall += 1
+        p.fornavn = _FORNAVN_TREKK[next(k for k in _FORNAVN_TREKK if år < k)][kjønn].trekk(rng)
+        if far is not None:
+            p.etternavn = far.etternavn
+            if mor is not None and rng.random() < 0.3 and mor.etternavn != far.etternavn:
+                p.mellomnavn = mor.etternavn
+        else:
+            p.etternavn = _ETTERNAVN_TREKK.trekk(rng)
+        if død is not None:
+            p.dødssted = fødested if rng.random() < 0.6 else _STED_TREKK.trekk(rng)
+        return p
+
+    def _voksen(self, p: _P) -> bool:
+        """Lever personen til 18 år?"""
+        return p.død is None or p.død - p.født >= 18 * _ÅR
+
+    def _gift(self, generasjon: List[_P]) -> Tuple[List[_P], List[_E]]:
+        """Gift bort en generasjon. Returnerer (inngiftede utenfra, ekteskap)."""
+        rng = self._rng
+        voksne = [p for p in generasjon if self._voksen(p)]
+        rng.shuffle(voksne)
+
+        # Søskenbarn finnes via felles besteforeldre
+        besteforeldre: Dict[str, List[_P]] = {}
+        if self.pedigree_collapse > 0:
+            for p in voksne:
+                for forelder in (p.mor, p.far):
+                    if forelder is not None:
+                        for bf in (forelder.mor, forelder.far):
+                            if bf is not None:
+                                besteforeldre.setdefault(bf.id, []).append(p)
+        ledige = {'male': [p for p in voksne if p.kjønn == 'male'],
+                  'female': [p for p in voksne if p.kjønn == 'female']}
+
+        inngiftede: List[_P] = []
+        ekteskap: List[_E] = []
+        for p in voksne:
+            if p.gift or rng.random() > self.marriage_rate:
+                continue
+            motsatt = 'female' if p.kjønn == 'male' else 'male'
+            partner = None
+            r = rng.random()
+            if r < self.pedigree_collapse:
+                partner = self._søskenbarn(p, motsatt, besteforeldre)
+            elif r < self.pedigree_collapse + self.internal_marriage_rate:
+                kø = ledige[motsatt]
+                while kø and partner is None:
+                    kandidat = kø.pop()
+                    if not kandidat.gift and not _søsken(p, kandidat):
+                        partner = kandidat
+            if partner is None:
+                partner = self._inngiftet(p, date.fromordinal(p.født).year + rng.randint(-5, 5))
+                if partner is None:
+                    continue
+                inngiftede.append(partner)
+
+            e = self._vie(p, partner)
+            if e is None:
+                continue
+            ekteskap.append(e)
+
+            # Nytt ekteskap etter skilsmisse eller enkestand
+            for person, tidligere in ((p, partner), (partner, p)):
+                ledig_fra = e.slutt
+                if ledig_fra is None or rng.random() > self.remarriage_rate:
+                    continue
+                if person.død is not None and person.død - ledig_fra < _ÅR:
+                    continue
+                ny = self._inngiftet(person, date.fromordinal(person.født).year + rng.randint(-3, 8),
+                                     tidligst=ledig_fra + 180)
+                if ny is None:
+                    continue
+                inngiftede.append(ny)
+                andre = self._vie(person, ny, tidligst=ledig_fra + 180)
+                if andre is not None:
+                    ekteskap.append(andre)
+        return inngiftede, ekteskap
+
+    def _inngiftet(self, p: _P, fødselsår: int, tidligst: Optional[int] = None) -> Optional[_P]:
+        """
+        Lag en inngiftet partner til p, født senest i end_year.
+
+        Partneren lages bare når _vie kan gifte dem (begge voksne og i live
+        samtidig), så ingen inngiftede blir stående uten ektefelle.
+        Returnerer ellers None.
+        """
+        rng = self._rng
+        født = date(min(fødselsår, self.end_year), 1, 1).toordinal() + rng.randrange(365)
+        fra = max(p.født, født) + int(18 * _ÅR)
+        if tidligst is not None:
+            fra = max(fra, tidligst)
+        if fra >= min(d for d in (p.død, self._slutt) if d is not None):
+            return None
+        return self._ny_person('female' if p.kjønn == 'male' else 'male', 0,
+                               født=født, voksen=True, lever_til=fra)
+
+    def _søskenbarn(self, p: _P, kjønn: str, besteforeldre: Dict[str, List[_P]]) -> Optional[_P]:
+        """Finn et ugift søskenbarn av motsatt kjønn."""
+        for forelder in (p.mor, p.far):
+            if forelder is None:
+                continue
+            for bf in (forelder.mor, forelder.far):
+                if bf is None:
+                    continue
+                for kandidat in besteforeldre.get(bf.id, ()):
+                    if (kandidat is not p and not kandidat.gift and kandidat.kjønn == kjønn
+                            and not _søsken(p, kandidat)):
+                        return kandidat
+        return None
+
+    def _vie(self, a: _P, b: _P, tidligst: Optional[int] = None) -> Optional[_E]:
+        """Lag et ekteskap mellom a og b hvis begge lever og er voksne samtidig."""
+        rng = self._rng
+        mann, kone = (a, b) if a.kjønn == 'male' else (b, a)
+        fra = max(mann.født, kone.født) + int(18 * _ÅR)
+        if tidligst is not None:
+            fra = max(fra, tidligst)
+        til = min(d for d in (mann.død, kone.død, self._slutt) if d is not None)
+        if fra >= til:
+            return None
+        start = min(fra + int(rng.uniform(0, 12) * _ÅR), til - 1)
+
+        slutt, skilt = None, False
+        if date.fromordinal(start).year >= 1950 and rng.random() < self.divorce_rate:
+            skilsmisse = start + int(rng.uniform(2, 20) * _ÅR)
+            if skilsmisse < til:
+                slutt, skilt = skilsmisse, True
+        if slutt is None and til < self._slutt:
+            slutt = til  # Enkestand
+
+        self._ekteskap_nr += 1
+        e = _E(f"e{self._ekteskap_nr}", mann, kone, start, slutt, kone.fødested, skilt)
+        mann.gift = kone.gift = True
+        if kone.id not in mann.partnere:
+            mann.partnere.append(kone.id)
+            kone.partnere.append(mann.id)
+        return e
+
+    def _barn(self, ekteskap: List[_E], generasjon: int) -> List[_P]:
+        """Føde neste generasjon, med barnetall tilpasset budsjettet på n personer."""
+        rng = self._rng
+        gjenstår = self.n - self._antall
+        if not ekteskap or gjenstår <= 0:
+            return []
+        igjen = max(1, self.generations - generasjon + 1)
+        # Inngiftede utgjør omtrent en tredel av hver generasjon
+        ønsket = gjenstår / igjen / 1.3 if igjen > 1 else gjenstår
+        snitt = min(8.0, max(0.5, ønsket / len(ekteskap)))
+
+        barn: List[_P] = []
+        while True:
+            født_før = len(barn)
+            for e in ekteskap:
+                mor, far = e.kone, e.mann
+                fra = max(e.start, mor.født + int(18 * _ÅR), far.født + int(18 * _ÅR))
+                til = min(d for d in (e.slutt, mor.død, mor.født + int(44 * _ÅR),
+                                      far.død + 270 if far.død else None, self._slutt)
+                          if d is not None)
+                if fra >= til:
+                    continue
+                for _ in range(_poisson(rng, snitt)):
+                    født = rng.randint(fra, til)
+                    b = self._ny_person(rng.choice(('male', 'female')), 0,
+                                        mor=mor, far=far, født=født)
+                    if b is None:
+                        return barn
+                    mor.barn.append(b.id)
+                    far.barn.append(b.id)
+                    barn.append(b)
+            # Siste generasjon fyller opp resten av budsjettet
+            if igjen > 1 or len(barn) == født_før:
+                return barn
+
+    # -- Ferdige poster ----------------------------------------------------
+
+    def _person(self, p: _P) -> Person:
+        foreldre = [f.id for f in (p.far, p.mor) if f is not None]
+        return Person.model_construct(
+            id=p.id, fornavn=p.fornavn, mellomnavn=p.mellomnavn, etternavn=p.etternavn,
+            kjønn=Gender(p.kjønn).value, fødselsdato=date.fromordinal(p.født),
+            dødsdato=date.fromordinal(p.død) if p.død is not None else None,
+            fødested=p.fødested, dødssted=p.dødssted, bilde_sti=None, notater=None,
+            historier=[], foreldre=foreldre, barn=p.barn, partnere=p.partnere, ekstra_data={}
+        )
+
+    def _ekteskap(self, e: _E) -> Ekteskap:
+        return Ekteskap.model_construct(
+            id=e.id, partner1_id=e.mann.id, partner2_id=e.kone.id,
+            ekteskapsdato=date.fromordinal(e.start),
+            skilsmisse_dato=date.fromordinal(e.slutt) if e.skilt else None,
+            ekteskapssted=e.sted, ekteskapstype='ekteskap', notater=None
+        )
+
+
+def generate_pedigree(n: int, seed: int = 0, **kwargs) -> FamilieData:
+    """
+    Generer et syntetisk slektstre med nøyaktig n personer.
+
+    Args:
+        n: Antall personer
+        seed: Frø for tilfeldighetene
+        **kwargs: Se SlektsGenerator (pedigree_collapse, remarriage_rate, ...)
+
+    Returns:
+        FamilieData objekt
+    """
+    return SlektsGenerator(n, seed=seed, **kwargs).familie_data()
+
+
+def write_pedigree(file_path: str, n: int, seed: int = 0, **kwargs) -> Tuple[int, int]:
+    """Generer et syntetisk slektstre rett til fil (se SlektsGenerator.write)."""
+    return SlektsGenerator(n, seed=seed, **kwargs).write(file_path)
+
+
+def _søsken(a: _P, b: _P) -> bool:
+    """Har a og b minst én felles forelder?"""
+    return ((a.mor is not None and a.mor is b.mor) or (a.far is not None and a.far is b.far))
+
+
+def _poisson(rng: random.Random, snitt: float) -> int:
+    """Trekk fra en Poisson-fordeling (Knuths metode; snitt er lite)."""
+    grense = math.exp(-snitt)
+    k, p = 0, rng.random()
+    while p > grense:
+        k += 1
+        p *= rng.random()
+    return k
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generer et syntetisk slektstre")
+    parser.add_argument('n', type=int, help="Antall personer")
+    parser.add_argument('-o', '--output', required=True, help="Målfil (format fra filendelsen)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--generations', type=int, default=10)
+    parser.add_argument('--pedigree-collapse', type=float, default=0.02)
+    parser.add_argument('--remarriage-rate', type=float, default=0.3)
+    parser.add_argument('--divorce-rate', type=float, default=0.2)
+    args = parser.parse_args()
+
+    personer, ekteskap = write_pedigree(
+        args.output, args.n, seed=args.seed, generations=args.generations,
+        pedigree_collapse=args.pedigree_collapse, remarriage_rate=args.remarriage_rate,
+        divorce_rate=args.divorce_rate
+    )
+    print(f"Skrev {personer} personer og {ekteskap} ekteskap til {args.output}")
@@ -3,8 +3,9 @@ Slektstre-klasse med NetworkX som backend
 """
 
 import networkx as nx
+from contextlib import nullcontext
 from typing import List, Dict, Optional, Set, Tuple, Any
-from datetime import date
+from datetime import date, datetime
 import statistics
 from collections import defaultdict, Counter
 
@@ -23,15 +24,21 @@ class Slektstre:
         """
         self.graph = nx.DiGraph()
         self.familie_data = familie_data or FamilieData()
+        self.journal = None  # Settes av Endringsjournal for angre/gjør om
         self._build_graph()
     
     def _build_graph(self) -> None:
-        """Bygg NetworkX-graf fra familie-data."""
-        self.graph.clear()
+        """
+        Bygg NetworkX-graf fra familie-data.
+        
+        Grafen bygges ferdig ved siden av den gamle og byttes inn til slutt,
+        slik at lesere som holder på `self.graph` aldri ser en halvbygd graf.
+        """
+        graph = nx.DiGraph()
         
         # Legg til alle personer som noder
         for person in self.familie_data.personer:
-            self.graph.add_node(
+            graph.add_node(
                 person.id,
                 person=person,
                 type='person'
@@ -39,40 +46,59 @@ class Slektstre:
         
         # Legg til alle ekteskap som noder
         for ekteskap in self.familie_data.ekteskap:
-            self.graph.add_node(
+            graph.add_node(
                 ekteskap.id,
                 ekteskap=ekteskap,
                 type='marriage'
             )
             
             # Koble partnere til ekteskapet
-            if ekteskap.partner1_id in self.graph:
-                self.graph.add_edge(ekteskap.partner1_id, ekteskap.id, relation='partner')
-                self.graph.add_edge(ekteskap.id, ekteskap.partner1_id, relation='partner')
+            if ekteskap.partner1_id in graph:
+                graph.add_edge(ekteskap.partner1_id, ekteskap.id, relation='partner')
+                graph.add_edge(ekteskap.id, ekteskap.partner1_id, relation='partner')
             
-            if ekteskap.partner2_id in self.graph:
-                self.graph.add_edge(ekteskap.partner2_id, ekteskap.id, relation='partner')
-                self.graph.add_edge(ekteskap.id, ekteskap.partner2_id, relation='partner')
+            if ekteskap.partner2_id in graph:
+                graph.add_edge(ekteskap.partner2_id, ekteskap.id, relation='partner')
+                graph.add_edge(ekteskap.id, ekteskap.partner2_id, relation='partner')
         
         # Legg til forelder-barn relasjoner
         for person in self.familie_data.personer:
             for forelder_id in person.foreldre:
-                if forelder_id in self.graph:
-                    self.graph.add_edge(forelder_id, person.id, relation='parent-child')
+                if forelder_id in graph:
+                    graph.add_edge(forelder_id, person.id, relation='parent-child')
             
             for barn_id in person.barn:
-                if barn_id in self.graph:
-                    self.graph.add_edge(person.id, barn_id, relation='parent-child')
+                if barn_id in graph:
+                    graph.add_edge(person.id, barn_id, relation='parent-child')
+        
+        self.graph = graph
+    
+    def _endring(self, beskrivelse: str):
+        """Kontekst for en journalført endring (no-op uten journal)."""
+        if self.journal is None:
+            return nullcontext()
+        return self.journal.operasjon(beskrivelse)
+    
+    def _registrer(self, *objekter: Any) -> None:
+        """Meld fra til journalen og endringssettet om poster som er i ferd med å endres."""
+        self.familie_data.mark_changed(*objekter)
+        if self.journal is not None:
+            for obj in objekter:
+                self.journal.registrer(obj)
     
     def add_person(self, person: Person) -> None:
         """Legg til person i slektstreet."""
-        self.familie_data.add_person(person)
-        self._build_graph()
+        with self._endring('add_person'):
+            self._registrer(person)
+            self.familie_data.add_person(person)
+            self._build_graph()
     
     def add_ekteskap(self, ekteskap: Ekteskap) -> None:
         """Legg til ekteskap i slektstreet."""
-        self.familie_data.add_ekteskap(ekteskap)
-        self._build_graph()
+        with self._endring('add_ekteskap'):
+            self._registrer(ekteskap)
+            self.familie_data.add_ekteskap(ekteskap)
+            self._build_graph()
     
     def add_child(self, forelder_id: str, barn: Person) -> None:
         """Legg til barn til forelder."""
@@ -80,15 +106,37 @@ class Slektstre:
         if not forelder:
             raise ValueError(f"Forelder med ID {forelder_id} ikke funnet")
         
-        # Legg til barn
-        self.add_person(barn)
+        with self._endring('add_child'):
+            self._registrer(forelder, barn)
+            
+            # Legg til barn
+            self.add_person(barn)
+            
+            # Oppdater relasjoner
+            barn.foreldre.append(forelder_id)
+            forelder.barn.append(barn.id)
+            
+            # Rebuild graph
+            self._build_graph()
+    
+    def update_person(self, person_id: str, **felter: Any) -> Person:
+        """Oppdater felter på en eksisterende person."""
+        person = self.get_person(person_id)
+        if not person:
+            raise ValueError(f"Person med ID {person_id} ikke funnet")
+        
+        ukjente = set(felter) - set(Person.model_fields)
+        if ukjente:
+            raise ValueError(f"Ukjente felter: {', '.join(sorted(ukjente))}")
         
-        # Oppdater relasjoner
-        barn.foreldre.append(forelder_id)
-        forelder.barn.append(barn.id)
+        with self._endring('update_person'):
+            self._registrer(person)
+            for navn, verdi in felter.items():
+                setattr(person, navn, verdi)
+            self.familie_data.sist_endret = datetime.now()
+            self._build_graph()
         
-        # Rebuild graph
-        self._build_graph()
+        return person
     
     def add_marriage(self, partner1_id: str, partner2_id: str, 
                     ekteskapsdato: Optional[date] = None,
@@ -107,11 +155,13 @@ class Slektstre:
             ekteskapssted=ekteskapssted
         )
         
-        self.add_ekteskap(ekteskap)
-        
-        # Oppdater partnere-lister
-        partner1.partnere.append(partner2_id)
-        partner2.partnere.append(partner1_id)
+        with self._endring('add_marriage'):
+            self._registrer(partner1, partner2)
+            self.add_ekteskap(ekteskap)
+            
+            # Oppdater partnere-lister
+            partner1.partnere.append(partner2_id)
+            partner2.partnere.append(partner1_id)
         
         return ekteskap
     
@@ -243,6 +293,157 @@ class Slektstre:
         
         return None
     
+    def find_relation_path(self, person1_id: str, person2_id: str,
+                           max_marriage_hops: Optional[int] = None,
+                           max_length: Optional[int] = None) -> Optional[List[Tuple[str, str, str]]]:
+        """
+        Finn korteste slektskapssti mellom to personer.
+        
+        Søker toveis (fra begge personene, alltid fra den minste fronten) langs
+        forelder-, barn- og ektefellerelasjoner, og stopper så snart de to
+        søkene møtes. Blant like korte stier velges den med færrest ekteskap.
+        
+        Args:
+            person1_id: ID til første person
+            person2_id: ID til andre person
+            max_marriage_hops: Maks antall ektefelle-steg i stien, eller None
+            max_length: Maks antall steg totalt, eller None
+        
+        Returns:
+            Liste med steg (fra_id, relasjon, til_id) der relasjon er hva
+            til-personen er for fra-personen ('far', 'mor', 'forelder',
+            'sønn', 'datter', 'barn' eller 'ektefelle'), tom liste hvis
+            personene er like, eller None hvis ingen sti finnes
+        """
+        if person1_id not in self.graph or person2_id not in self.graph:
+            return None
+        if person1_id == person2_id:
+            return []
+        
+        grense = float('inf') if max_marriage_hops is None else max_marriage_hops
+        ender = (person1_id, person2_id)
+        # Per side: tilstand (node, ekteskap) -> (forrige tilstand, relasjonstype, dybde)
+        forgjengere = [{(e, 0): (None, None, 0)} for e in ender]
+        # Per side: node -> {ekteskap: dybde}, for møtesjekk og dominans
+        tilstander = [{e: {0: 0}} for e in ender]
+        fronter = [[(e, 0)] for e in ender]
+        dybder = [0, 0]
+        beste = None
+        
+        while fronter[0] and fronter[1] and beste is None:
+            if max_length is not None and dybder[0] + dybder[1] >= max_length:
+                break
+            
+            side = 0 if len(fronter[0]) <= len(fronter[1]) else 1
+            andre = 1 - side
+            ny_front = []
+            dybde = dybder[side] + 1
+            
+            for tilstand in fronter[side]:
+                node, ekteskap = tilstand
+                for nabo, relasjon, er_ekteskap in self._kinship_neighbours(node):
+                    nye_ekteskap = ekteskap + er_ekteskap
+                    if nye_ekteskap > grense:
+                        continue
+                    
+                    kjente = tilstander[side].setdefault(nabo, {})
+                    if any(h <= nye_ekteskap for h in kjente):
+                        continue
+                    kjente[nye_ekteskap] = dybde
+                    ny_tilstand = (nabo, nye_ekteskap)
+                    forgjengere[side][ny_tilstand] = (tilstand, relasjon, dybde)
+                    ny_front.append(ny_tilstand)
+                    
+                    # Møtes søkene her?
+                    for andre_ekteskap, andre_dybde in tilstander[andre].get(nabo, {}).items():
+                        totalt = nye_ekteskap + andre_ekteskap
+                        if totalt > grense:
+                            continue
+                        andre_tilstand = (nabo, andre_ekteskap)
+                        if side == 0:
+                            kandidat = (dybde + andre_dybde, totalt, ny_tilstand, andre_tilstand)
+                        else:
+                            kandidat = (dybde + andre_dybde, totalt, andre_tilstand, ny_tilstand)
+                        if beste is None or kandidat[:2] < beste[:2]:
+                            beste = kandidat
+            
+            fronter[side] = ny_front
+            dybder[side] = dybde
+        
+        if beste is None:
+            return None
+        if max_length is not None and beste[0] > max_length:
+            return None
+        
+        # Rekonstruer: fra person1 til møtepunktet, og videre til person2
+        steg = []
+        tilstand = beste[2]
+        while forgjengere[0][tilstand][0] is not None:
+            forrige, relasjon, _ = forgjengere[0][tilstand]
+            steg.append((forrige[0], relasjon, tilstand[0]))
+            tilstand = forrige
+        steg.reverse()
+        
+        motsatt = {'parent': 'child', 'child': 'parent', 'spouse': 'spouse'}
+        tilstand = beste[3]
+        while forgjengere[1][tilstand][0] is not None:
+            forrige, relasjon, _ = forgjengere[1][tilstand]
+            steg.append((tilstand[0], motsatt[relasjon], forrige[0]))
+            tilstand = forrige
+        
+        return [(fra, self._kinship_label(relasjon, til), til) for fra, relasjon, til in steg]
+    
+    def explain_relation(self, person1_id: str, person2_id: str,
+                         max_marriage_hops: Optional[int] = None) -> Optional[str]:
+        """Beskriv korteste slektskapssti som tekst, f.eks. 'Ola → far: Per → ektefelle: Kari'."""
+        sti = self.find_relation_path(person1_id, person2_id, max_marriage_hops)
+        if sti is None:
+            return None
+        
+        deler = [self.get_person(person1_id).fullt_navn]
+        for _, relasjon, til in sti:
+            deler.append(f"{relasjon}: {self.get_person(til).fullt_navn}")
+        return ' → '.join(deler)
+    
+    def _kinship_neighbours(self, node: str):
+        """Gi (nabo, relasjonstype, ekteskapssteg) for en person i grafen."""
+        sett = set()
+        for forelder_id, data in self.graph.pred[node].items():
+            if data.get('relation') == 'parent-child' and forelder_id not in sett:
+                sett.add(forelder_id)
+                yield forelder_id, 'parent', 0
+        
+        for nabo_id, data in self.graph.succ[node].items():
+            relasjon = data.get('relation')
+            if relasjon == 'parent-child':
+                if nabo_id not in sett:
+                    sett.add(nabo_id)
+                    yield nabo_id, 'child', 0
+            elif relasjon == 'partner':
+                # Ekteskapsnode: partneren er på andre siden
+                for partner_id in self.graph.succ[nabo_id]:
+                    if partner_id != node and partner_id not in sett:
+                        sett.add(partner_id)
+                        yield partner_id, 'spouse', 1
+        
+        person = self.graph.nodes[node].get('person')
+        if person:
+            for partner_id in person.partnere:
+                if partner_id in self.graph and partner_id not in sett:
+                    sett.add(partner_id)
+                    yield partner_id, 'spouse', 1
+    
+    def _kinship_label(self, relasjon: str, person_id: str) -> str:
+        """Gi kjønnsbestemt etikett for hva personen er i en relasjon."""
+        if relasjon == 'spouse':
+            return 'ektefelle'
+        
+        person = self.graph.nodes[person_id].get('person')
+        kjønn = person.kjønn if person else None
+        if relasjon == 'parent':
+            return {Gender.MALE: 'far', Gender.FEMALE: 'mor'}.get(kjønn, 'forelder')
+        return {Gender.MALE: 'sønn', Gender.FEMALE: 'datter'}.get(kjønn, 'barn')
+    
     def get_statistics(self) -> Dict[str, Any]:
         """Hent statistikk om slektstreet."""
         persons = self.get_all_persons()
@@ -301,13 +502,13 @@ class Slektstre:
         """Valider slektstreet og returner liste over problemer."""
         problems = []
         
-        # Sjekk for sirkulære relasjoner
-        try:
-            cycles = list(nx.simple_cycles(self.graph))
-            if cycles:
-                problems.append("Sirkulære slektskap funnet")
-        except:
-            pass
+        # Sjekk for sirkulære relasjoner (partnerkanter går begge veier og teller ikke)
+        forelder_barn = self.graph.edge_subgraph(
+            (u, v) for u, v, relasjon in self.graph.edges(data='relation')
+            if relasjon == 'parent-child'
+        )
+        if not nx.is_directed_acyclic_graph(forelder_barn):
+            problems.append("Sirkulære slektskap funnet")
         
         # Sjekk for foreldre som er yngre enn sine barn
         for person in self.get_all_persons():
@@ -0,0 +1,28 @@
+"""Felles oppsett for testene: kildemodulene importeres med bare navn (som i src/)."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROT / 'src'))
+
+EKSEMPEL = ROT / 'data' / 'eksempel_familie.yaml'
+
+
+@pytest.fixture
+def eksempel_fil() -> Path:
+    return EKSEMPEL
+
+
+@pytest.fixture
+def familie_data():
+    from family_io import load_from_yaml
+    return load_from_yaml(str(EKSEMPEL))
+
+
+@pytest.fixture(autouse=True)
+def _egen_cache(tmp_path, monkeypatch):
+    """Hold hurtigbufferen for load() unna brukerens hjemmekatalog."""
+    monkeypatch.setenv('SLEKTSTRE_CACHE_DIR', str(tmp_path / 'cache'))
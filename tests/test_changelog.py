@@ -0,0 +1,65 @@
+"""Endringslogg: avspilling, avkuttede linjer og komprimering."""
+
+from changelog import Endringslogg
+from family_io import load, save
+from models import Person
+
+
+def _person(person_id: str) -> Person:
+    return Person(id=person_id, fornavn=person_id, kjønn='other')
+
+
+def test_avkuttet_siste_linje_mister_ikke_senere_poster(familie_data, tmp_path):
+    sti = tmp_path / 'tre.yaml'
+    save(familie_data, str(sti))
+
+    with Endringslogg(sti) as logg:
+        logg.load()
+        logg.append_person(_person('n1'))
+    with open(logg.log_path, 'a', encoding='utf-8') as f:
+        f.write('{"op": "person", "data": {"id": "n2", "forn')
+
+    with Endringslogg(sti) as logg:
+        familie_data = logg.load()
+        assert familie_data.get_person_by_id('n1') is not None
+        logg.append_person(_person('n3'))
+        logg.append_person(_person('n4'))
+
+    with Endringslogg(sti) as logg:
+        familie_data = logg.load()
+    ider = {p.id for p in familie_data.personer}
+    assert {'n1', 'n3', 'n4'} <= ider
+    assert 'n2' not in ider
+    assert len(logg) == 3
+
+
+def test_skriving_etter_avkuttet_linje_uten_lasting(familie_data, tmp_path):
+    # save(..., delta=True) legger til i loggen uten å spille den av først
+    sti = tmp_path / 'tre.yaml'
+    save(familie_data, str(sti))
+    with Endringslogg(sti) as logg:
+        logg.append_person(_person('n1'))
+    with open(logg.log_path, 'a', encoding='utf-8') as f:
+        f.write('{"op": "pers')
+
+    with Endringslogg(sti) as logg:
+        logg.append_person(_person('n2'))
+
+    ider = {p.id for p in load(str(sti), cache=False).personer}
+    assert {'n1', 'n2'} <= ider
+
+
+def test_komprimering_csv_fjerner_gammel_ekteskapsfil(familie_data, tmp_path):
+    sti = tmp_path / 'tre.csv'
+    save(familie_data, str(sti))
+    assert (tmp_path / 'tre_ekteskap.csv').exists()
+
+    with Endringslogg(sti) as logg:
+        familie_data = logg.load()
+        for ekteskap in list(familie_data.ekteskap):
+            logg.delete_ekteskap(ekteskap.id)
+        familie_data.ekteskap = []
+        logg.compact(familie_data)
+
+    assert not (tmp_path / 'tre_ekteskap.csv').exists()
+    assert load(str(sti), cache=False).ekteskap == []
@@ -0,0 +1,91 @@
+"""Røyktester for kommandolinjen."""
+
+import io
+import json
+
+import pytest
+
+from cli import main
+
+
+def _kjør(capsys, *argumenter, stdin=None, monkeypatch=None):
+    if stdin is not None:
+        monkeypatch.setattr('sys.stdin', io.StringIO(stdin))
+    kode = main([str(a) for a in argumenter])
+    ut = capsys.readouterr()
+    return kode, ut.out, ut.err
+
+
+def test_stats(capsys, eksempel_fil):
+    kode, ut, _ = _kjør(capsys, 'stats', eksempel_fil, '--json', '--no-cache')
+    assert kode == 0
+    assert json.loads(ut)['total_persons'] == 17
+
+
+def test_ancestors_fra_stdin(capsys, eksempel_fil, monkeypatch):
+    kode, ut, _ = _kjør(capsys, 'ancestors', eksempel_fil, '--json',
+                        stdin='p13\n', monkeypatch=monkeypatch)
+    assert kode == 0
+    resultat = json.loads(ut)
+    assert resultat['id'] == 'p13'
+    assert {p['id'] for p in resultat['personer']} == {'p1', 'p2', 'p3', 'p7', 'p8'}
+
+
+@pytest.mark.parametrize('generasjoner, forventet', [
+    (1, {'p7', 'p8'}),
+    (2, {'p3', 'p7', 'p8'}),
+    (3, {'p1', 'p2', 'p3', 'p7', 'p8'}),
+])
+def test_ancestors_generasjoner(capsys, eksempel_fil, generasjoner, forventet):
+    kode, ut, _ = _kjør(capsys, 'ancestors', eksempel_fil, 'p13', '-g', generasjoner, '--json')
+    assert kode == 0
+    assert {p['id'] for p in json.loads(ut)['personer']} == forventet
+
+
+@pytest.mark.parametrize('verdi', ['0', '-1', 'to'])
+def test_ancestors_ugyldige_generasjoner(capsys, eksempel_fil, verdi):
+    with pytest.raises(SystemExit) as feil:
+        main(['ancestors', str(eksempel_fil), 'p13', '-g', verdi])
+    assert feil.value.code == 2
+    assert 'minst 1' in capsys.readouterr().err
+
+
+def test_ukjent_person(capsys, eksempel_fil):
+    kode, _, feil = _kjør(capsys, 'ancestors', eksempel_fil, 'finnes_ikke')
+    assert kode == 1
+    assert 'finnes_ikke' in feil
+
+
+def test_relation(capsys, eksempel_fil):
+    kode, ut, _ = _kjør(capsys, 'relation', eksempel_fil, 'p13', 'p1', '--json')
+    assert kode == 0
+    assert json.loads(ut)['sti'] is not None
+
+
+def test_validate(capsys, eksempel_fil):
+    kode, ut, _ = _kjør(capsys, 'validate', eksempel_fil)
+    assert kode == 0
+    assert 'OK' in ut
+
+
+def test_convert_og_diff(capsys, eksempel_fil, tmp_path):
+    kopi = tmp_path / 'kopi.jsonl'
+    kode, _, _ = _kjør(capsys, 'convert', eksempel_fil, kopi)
+    assert kode == 0
+
+    kode, ut, _ = _kjør(capsys, 'diff', eksempel_fil, kopi, '--no-cache')
+    assert kode == 0
+    assert 'Ingen forskjeller' in ut
+
+
+def test_manglende_fil(capsys, tmp_path):
+    kode, _, feil = _kjør(capsys, 'stats', tmp_path / 'borte.yaml')
+    assert kode == 2
+    assert feil
+
+
+def test_render_uten_person(capsys, eksempel_fil, tmp_path):
+    pytest.importorskip('matplotlib')
+    kode, _, feil = _kjør(capsys, 'render', eksempel_fil, '-o', tmp_path / 'f.png', '--kind', 'fan')
+    assert kode == 2
+    assert '--person' in feil
@@ -0,0 +1,87 @@
+"""Lagring av bare endringene (save(..., delta=True))."""
+
+import pytest
+
+from family_io import load, save, _patch_path, _person_to_dict
+from sqlite_store import SqliteSlektstre
+from tree import Slektstre
+
+
+def test_sqlite_delta_beholder_kanter_fra_uendrede_slektninger(familie_data, tmp_path):
+    sti = str(tmp_path / 'tre.sqlite')
+    save(familie_data, sti)
+    familie_data.mark_saved()
+
+    # p3 står bare som forelder i barnas lister, ikke med barn i egen liste
+    tre = Slektstre(familie_data)
+    tre.update_person('p3', fornavn='X')
+    save(familie_data, sti, delta=True)
+
+    lagret = SqliteSlektstre(sti)
+    try:
+        assert {p.id for p in lagret.get_ancestors('p13')} == {'p1', 'p2', 'p3', 'p7', 'p8'}
+        assert lagret.get_person('p3').fornavn == 'X'
+    finally:
+        lagret.close()
+
+
+def test_sqlite_delta_fjerner_kant_når_begge_sider_slipper(familie_data, tmp_path):
+    sti = str(tmp_path / 'tre.sqlite')
+    save(familie_data, sti)
+    familie_data.mark_saved()
+
+    tre = Slektstre(familie_data)
+    barn = tre.get_person('p13')
+    forelder = tre.get_person(barn.foreldre[0])
+    tre.update_person(barn.id, foreldre=barn.foreldre[1:])
+    tre.update_person(forelder.id, barn=[b for b in forelder.barn if b != barn.id])
+    save(familie_data, sti, delta=True)
+
+    lagret = SqliteSlektstre(sti)
+    try:
+        assert forelder.id not in {p.id for p in lagret.get_ancestors('p13')}
+    finally:
+        lagret.close()
+
+
+@pytest.mark.parametrize('suffiks', ['yaml', 'json', 'jsonl', 'csv', 'sqlite', 'slkt'])
+def test_delta_rundtur(familie_data, tmp_path, suffiks):
+    sti = str(tmp_path / f'tre.{suffiks}')
+    save(familie_data, sti)
+    familie_data.mark_saved()
+
+    tre = Slektstre(familie_data)
+    tre.update_person('p3', fornavn='X')
+    save(familie_data, sti, delta=True)
+
+    lest = load(sti, cache=False)
+    assert ([_person_to_dict(p) for p in lest.personer]
+            == [_person_to_dict(p) for p in familie_data.personer])
+
+
+def test_delta_parquet_skriver_bare_endringsfil(familie_data, tmp_path):
+    pytest.importorskip('pyarrow')
+    sti = tmp_path / 'tre.parquet'
+    save(familie_data, str(sti))
+    familie_data.mark_saved()
+    personer_før = (sti / 'personer.parquet').stat().st_mtime_ns
+
+    Slektstre(familie_data).update_person('p3', fornavn='X')
+    save(familie_data, str(sti), delta=True)
+
+    assert (sti / 'personer.parquet').stat().st_mtime_ns == personer_før
+    assert _patch_path(sti).exists()
+    assert load(str(sti), cache=False).get_person_by_id('p3').fornavn == 'X'
+
+
+def test_endringsfiler_deles_ikke_mellom_formater(familie_data, tmp_path):
+    yaml_sti, json_sti = str(tmp_path / 'tre.yaml'), str(tmp_path / 'tre.json')
+    save(familie_data, yaml_sti)
+    save(familie_data, json_sti)
+    familie_data.mark_saved()
+
+    Slektstre(familie_data).update_person('p3', fornavn='X')
+    save(familie_data, yaml_sti, delta=True)
+
+    assert load(yaml_sti, cache=False).get_person_by_id('p3').fornavn == 'X'
+    assert load(json_sti, cache=False).get_person_by_id('p3').fornavn == 'Arvid'
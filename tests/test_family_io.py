@@ -0,0 +1,119 @@
+"""Lagring og innlasting i alle støttede formater."""
+
+import os
+
+import pytest
+
+from family_io import load, load_from_csv, save, save_to_csv, _person_to_dict, _ekteskap_to_dict
+
+
+def _personer(familie_data):
+    return [_person_to_dict(p) for p in familie_data.personer]
+
+
+def _ekteskap(familie_data):
+    return [_ekteskap_to_dict(e) for e in familie_data.ekteskap]
+
+
+@pytest.mark.parametrize('suffiks', [
+    'yaml', 'json', 'jsonl', 'sqlite', 'slkt', 'yaml.gz', 'jsonl.gz', 'json.bz2',
+])
+def test_rundtur(familie_data, tmp_path, suffiks):
+    sti = str(tmp_path / f'tre.{suffiks}')
+    save(familie_data, sti)
+    lest = load(sti, cache=False)
+
+    assert _personer(lest) == _personer(familie_data)
+    assert _ekteskap(lest) == _ekteskap(familie_data)
+    assert lest.beskrivelse == familie_data.beskrivelse
+    assert lest.versjon == familie_data.versjon
+
+
+def test_rundtur_parquet(familie_data, tmp_path):
+    pytest.importorskip('pyarrow')
+    sti = str(tmp_path / 'tre.parquet')
+    save(familie_data, sti)
+    lest = load(sti, cache=False)
+
+    assert _personer(lest) == _personer(familie_data)
+    assert _ekteskap(lest) == _ekteskap(familie_data)
+
+
+@pytest.mark.parametrize('suffiks', ['csv', 'csv.gz'])
+def test_rundtur_csv(familie_data, tmp_path, suffiks):
+    # CSV har ingen metadata, bare personer og ekteskap
+    sti = str(tmp_path / f'tre.{suffiks}')
+    save(familie_data, sti)
+    lest = load(sti, cache=False)
+
+    assert _personer(lest) == _personer(familie_data)
+    assert _ekteskap(lest) == _ekteskap(familie_data)
+
+
+@pytest.mark.parametrize('suffiks', ['csv', 'csv.gz'])
+def test_rundtur_csv_i_deler(familie_data, tmp_path, suffiks):
+    sti = tmp_path / f'tre.{suffiks}'
+    save_to_csv(familie_data, str(sti), chunk_size=5)
+    assert not sti.exists()
+    assert (tmp_path / f'tre-00003.{suffiks}').exists()
+
+    for lest in (load_from_csv(str(sti)), load(str(sti)), load(str(sti)),
+                 load(str(tmp_path / f'tre-00002.{suffiks}'), cache=False),
+                 load(str(tmp_path / f'tre_ekteskap-00000.{suffiks}'), cache=False)):
+        assert _personer(lest) == _personer(familie_data)
+        assert _ekteskap(lest) == _ekteskap(familie_data)
+
+
+def test_csv_uten_deler_fjerner_gamle_deler(familie_data, tmp_path):
+    sti = tmp_path / 'tre.csv'
+    save_to_csv(familie_data, str(sti), chunk_size=5)
+    save_to_csv(familie_data, str(sti))
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['tre.csv', 'tre_ekteskap.csv']
+
+    save_to_csv(familie_data, str(sti), chunk_size=10)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        'tre-00000.csv', 'tre-00001.csv', 'tre_ekteskap-00000.csv'
+    ]
+    assert _personer(load(str(sti), cache=False)) == _personer(familie_data)
+
+
+def test_rundtur_gedcom(familie_data, tmp_path):
+    # GEDCOM mister historier, men navn, datoer og foreldre skal med
+    sti = str(tmp_path / 'tre.ged')
+    save(familie_data, sti)
+    lest = load(sti, cache=False)
+
+    # GEDCOM lagrer far (HUSB) før mor (WIFE), så rekkefølgen på foreldre kan endres
+    def felter(p):
+        return (p.id, p.fornavn, p.etternavn, p.kjønn, p.fødselsdato, p.dødsdato, sorted(p.foreldre))
+
+    assert [felter(p) for p in lest.personer] == [felter(p) for p in familie_data.personer]
+    assert len(lest.ekteskap) == len(familie_data.ekteskap)
+
+
+def test_hurtigbuffer_ser_endringer(familie_data, tmp_path):
+    sti = str(tmp_path / 'tre.json')
+    save(familie_data, sti)
+    assert load(sti).get_person_by_id('p1').fornavn == 'Erik'
+
+    familie_data.get_person_by_id('p1').fornavn = 'Eirik'
+    save(familie_data, sti)
+    assert load(sti).get_person_by_id('p1').fornavn == 'Eirik'
+
+
+def test_hurtigbuffer_ser_endring_med_samme_storrelse(familie_data, tmp_path):
+    sti = tmp_path / 'tre.json'
+    save(familie_data, str(sti))
+    assert load(str(sti)).get_person_by_id('p1').fornavn == 'Erik'
+
+    # Nøkkelen bygger på stat(), ikke innholdet: samme størrelse, ny mtime
+    stat = sti.stat()
+    sti.write_text(sti.read_text(encoding='utf-8').replace('"Erik"', '"Eirk"'), encoding='utf-8')
+    os.utime(sti, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert sti.stat().st_size == stat.st_size
+    assert load(str(sti)).get_person_by_id('p1').fornavn == 'Eirk'
+
+
+def test_ukjent_fil(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load(str(tmp_path / 'finnes_ikke.yaml'))
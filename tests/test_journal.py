@@ -0,0 +1,53 @@
+"""Angre/gjør om med Endringsjournal."""
+
+from journal import Endringsjournal
+from models import Person
+from tree import Slektstre
+
+
+def test_angre_og_gjør_om_oppdatering(familie_data):
+    tre = Slektstre(familie_data)
+    journal = Endringsjournal(tre)
+
+    tre.update_person('p3', fornavn='Arne')
+    assert journal.can_undo and not journal.can_redo
+
+    journal.undo()
+    assert tre.get_person('p3').fornavn == 'Arvid'
+    assert journal.can_redo
+
+    journal.redo()
+    assert tre.get_person('p3').fornavn == 'Arne'
+
+
+def test_angre_nytt_barn(familie_data):
+    tre = Slektstre(familie_data)
+    journal = Endringsjournal(tre)
+    barn_før = list(tre.get_person('p3').barn)
+
+    tre.add_child('p3', Person(id='ny', fornavn='Ny', kjønn='female'))
+    assert tre.get_person('ny') is not None
+    assert 'ny' in tre.get_person('p3').barn
+
+    journal.undo()
+    assert tre.get_person('ny') is None
+    assert tre.get_person('p3').barn == barn_før
+    assert 'ny' not in tre.graph
+
+    journal.redo()
+    assert 'ny' in tre.get_person('p3').barn
+    assert 'ny' in tre.graph
+
+
+def test_operasjon_er_ett_steg(familie_data):
+    tre = Slektstre(familie_data)
+    journal = Endringsjournal(tre)
+
+    with journal.operasjon('to endringer'):
+        tre.update_person('p1', fornavn='A')
+        tre.update_person('p2', fornavn='B')
+    assert journal.history() == ['to endringer']
+
+    journal.undo()
+    assert tre.get_person('p1').fornavn == 'Erik'
+    assert tre.get_person('p2').fornavn == 'Ingrid'
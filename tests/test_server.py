@@ -0,0 +1,46 @@
+"""HTTP-tjenesten i server.py."""
+
+import asyncio
+import json
+
+import pytest
+
+from server import SlektstreService
+from tree import Slektstre
+
+
+def _forespørsler(familie_data, *forespørsler):
+    """Send rå forespørsler på hver sin tilkobling og returner (statuslinje, kropp)."""
+    async def kjør():
+        service = SlektstreService(Slektstre(familie_data), workers=1)
+        server = await service.start('127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        svar = []
+        try:
+            for forespørsel in forespørsler:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.write(forespørsel)
+                await writer.drain()
+                data = await asyncio.wait_for(reader.read(), timeout=5)
+                writer.close()
+                hode, _, kropp = data.partition(b'\r\n\r\n')
+                svar.append((hode.split(b'\r\n')[0].decode(), json.loads(kropp)))
+        finally:
+            service.close()
+        return svar
+    return asyncio.run(kjør())
+
+
+def test_person(familie_data):
+    [(status, kropp)] = _forespørsler(
+        familie_data, b'GET /person/p1 HTTP/1.1\r\nConnection: close\r\n\r\n')
+    assert status == 'HTTP/1.1 200 OK'
+    assert kropp['fornavn'] == 'Erik'
+
+
+@pytest.mark.parametrize('lengde', [b'abc', b'-1', b'1e3'])
+def test_ugyldig_content_length(familie_data, lengde):
+    [(status, kropp)] = _forespørsler(
+        familie_data, b'GET /health HTTP/1.1\r\nContent-Length: ' + lengde + b'\r\n\r\n')
+    assert status == 'HTTP/1.1 400 Bad Request'
+    assert kropp == {'error': 'Bad Request'}
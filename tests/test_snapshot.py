@@ -0,0 +1,28 @@
+"""Øyeblikksbilder fra Publiserer."""
+
+from models import Person
+from snapshot import Publiserer
+from tree import Slektstre
+
+
+def test_nytt_bilde_ser_endringer(familie_data):
+    tre = Slektstre(familie_data)
+    publiserer = Publiserer(tre)
+    før = publiserer.current()
+
+    with publiserer.skriv():
+        tre.update_person('p3', fornavn='Arne')
+
+    assert publiserer.current().get_person('p3').fornavn == 'Arne'
+    assert før.get_person('p3').fornavn == 'Arvid'
+
+
+def test_gjenbrukt_id_gir_ikke_gammel_kopi(familie_data):
+    tre = Slektstre(familie_data)
+    publiserer = Publiserer(tre)
+    ny = Person(id='ny', fornavn='Ny', kjønn='female')
+    # Som om en slettet post hadde hatt samme id() som den nye
+    publiserer._frosne[id(ny)] = (tre.get_person('p1'), publiserer.current().get_person('p1'))
+
+    tre.add_person(ny)
+    assert publiserer.publish([]).get_person('ny').fornavn == 'Ny'
@@ -0,0 +1,34 @@
+"""Syntetiske slektstrær fra synthetic.py."""
+
+from family_io import load, save, _person_to_dict
+from synthetic import generate_pedigree
+
+
+def test_noyaktig_antall_og_samme_tre_for_samme_fro():
+    a = generate_pedigree(500, seed=3)
+    b = generate_pedigree(500, seed=3)
+    assert len(a.personer) == 500
+    assert [_person_to_dict(p) for p in a.personer] == [_person_to_dict(p) for p in b.personer]
+
+
+def test_ingen_fodt_etter_sluttaar():
+    familie_data = generate_pedigree(2000, seed=0, end_year=2000)
+    assert max(p.fødselsdato.year for p in familie_data.personer) <= 2000
+
+
+def test_inngiftede_er_gift():
+    # Alle uten foreldre er stamforeldre (de første) eller inngiftede, som alltid får en ektefelle
+    familie_data = generate_pedigree(2000, seed=1)
+    stamforeldre = {p.id for p in familie_data.personer[:round(2000 / 16)]}
+    enslige = [p.id for p in familie_data.personer
+               if not p.foreldre and not p.partnere and p.id not in stamforeldre]
+    assert enslige == []
+
+
+def test_rundtur_yaml(tmp_path):
+    familie_data = generate_pedigree(200, seed=2)
+    sti = str(tmp_path / 'tre.yaml')
+    save(familie_data, sti)
+    lest = load(sti, cache=False)
+    assert [_person_to_dict(p) for p in lest.personer] == \
+        [_person_to_dict(p) for p in familie_data.personer]
@@ -0,0 +1,61 @@
+"""Strømmende YAML-lesing (ankere, aliaser og merge-nøkler)."""
+
+import textwrap
+
+import yaml
+
+from family_io import load_from_yaml
+
+YAML_MED_ANKERE = textwrap.dedent("""\
+    metadata:
+      versjon: "1.0"
+      opprettet: "2025-01-27T10:00:00"
+      sist_endret: "2025-01-27T10:00:00"
+    standard: &standard
+      etternavn: Lundervold
+      fødested: Bergen
+      historier: &historier
+        - Felles historie
+    personer:
+      - <<: *standard
+        id: p1
+        fornavn: Erik
+        kjønn: male
+      - <<: [*standard, {dødssted: Oslo}]
+        id: p2
+        fornavn: Ingrid
+        kjønn: female
+        fødested: Trondheim
+      - id: p3
+        fornavn: Arvid
+        kjønn: male
+        historier: *historier
+        "<<": bokstavelig
+    ekteskap: []
+""")
+
+
+def test_merge_nøkler_og_aliaser(tmp_path):
+    sti = tmp_path / 'ankere.yaml'
+    sti.write_text(YAML_MED_ANKERE, encoding='utf-8')
+
+    familie_data = load_from_yaml(str(sti))
+    p1, p2, p3 = familie_data.personer
+
+    assert (p1.etternavn, p1.fødested) == ('Lundervold', 'Bergen')
+    # Eksplisitte nøkler vinner over sammenslåtte
+    assert (p2.etternavn, p2.fødested, p2.dødssted) == ('Lundervold', 'Trondheim', 'Oslo')
+    assert p3.historier == ['Felles historie']
+    # En sitert "<<" er en vanlig nøkkel, ikke en merge
+    assert p3.etternavn is None
+
+
+def test_samme_resultat_som_safe_load(tmp_path):
+    sti = tmp_path / 'ankere.yaml'
+    sti.write_text(YAML_MED_ANKERE, encoding='utf-8')
+    forventet = yaml.safe_load(YAML_MED_ANKERE)
+
+    personer = load_from_yaml(str(sti)).personer
+    for person, rå in zip(personer, forventet['personer']):
+        assert person.etternavn == rå.get('etternavn')
+        assert person.fødested == rå.get('fødested')